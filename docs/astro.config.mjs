@@ -48,6 +48,7 @@ export default defineConfig({
 						  { label: 'Bedrock Classifier', link: '/classifiers/built-in/bedrock-classifier'},
 						  { label: 'Anthropic Classifier', link: '/classifiers/built-in/anthropic-classifier' },
 						  { label: 'OpenAI Classifier', link: '/classifiers/built-in/openai-classifier' },
+						  { label: 'Embedding Classifier', link: '/classifiers/built-in/embedding-classifier' },
 						]
 					  },
 					  { label: 'Custom Classifier', link: '/classifiers/custom-classifier' },
@@ -1,14 +1,19 @@
-from typing import Union, AsyncIterable, Optional, Any, TypeAlias
+from typing import Union, AsyncIterable, Optional, Any, TypeAlias, Iterator
 import re
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass, field
-from multi_agent_orchestrator.types import ConversationMessage
+from multi_agent_orchestrator.types import ConversationMessage, TemplateVariables
 from multi_agent_orchestrator.utils import Logger
 
 # Type aliases for complex types
 AgentParamsType: TypeAlias = dict[str, Any]
 AgentOutputType: TypeAlias = Union[str, "AgentStreamResponse", Any]  # Forward reference
 
+# Template variables of the system prompts for the request being processed, per agent ID
+_request_variables: ContextVar[dict[str, TemplateVariables]] = ContextVar('request_variables', default={})
+
 @dataclass
 class AgentProcessingResult:
     """
@@ -21,6 +26,8 @@ class AgentProcessingResult:
         user_id: Identifier for the user
         session_id: Identifier for the current session
         additional_params: Optional additional parameters for the agent
+        candidates: Latency and cost of each candidate agent, when the request
+            was routed speculatively to several agents
     """
     user_input: str
     agent_id: str
@@ -28,6 +35,7 @@ class AgentProcessingResult:
     user_id: str
     session_id: str
     additional_params: AgentParamsType = field(default_factory=dict)
+    candidates: list[dict[str, Any]] = field(default_factory=list)
 
 
 @dataclass
@@ -140,6 +148,31 @@ class Agent(ABC):
         key = re.sub(r"\s+", "-", key)
         return key.lower()
 
+    @contextmanager
+    def request_variables(self, variables: TemplateVariables) -> Iterator[None]:
+        """
+        Set template variables of this agent's system prompt for the requests processed
+        in the block only. Concurrent requests, which run in other asyncio tasks, do not
+        see them, so a single agent instance can serve them all.
+
+        Args:
+            variables: The template variables, added to the agent's custom variables
+        """
+        token = _request_variables.set({**_request_variables.get(), self.id: variables})
+        try:
+            yield
+        finally:
+            _request_variables.reset(token)
+
+    def get_request_variables(self) -> TemplateVariables:
+        """
+        Get the template variables set for the current request with request_variables.
+
+        Returns:
+            The template variables, empty outside of a request_variables block
+        """
+        return _request_variables.get().get(self.id, {})
+
     @abstractmethod
     async def process_request(
         self,
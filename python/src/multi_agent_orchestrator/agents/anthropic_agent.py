@@ -2,20 +2,25 @@ import json
 from typing import AsyncIterable, Optional, Any, AsyncGenerator
 from typing import Any, AsyncIterable, Optional
 from dataclasses import dataclass, field
+import asyncio
+import functools
 import re
-from anthropic import AsyncAnthropic, Anthropic
+from anthropic import AsyncAnthropic, Anthropic, DefaultAsyncHttpxClient
 from multi_agent_orchestrator.agents import Agent, AgentOptions, AgentStreamResponse
 from multi_agent_orchestrator.types import (ConversationMessage,
                        ParticipantRole,
                        TemplateVariables,
                        AgentProviderType)
-from multi_agent_orchestrator.utils import Logger, AgentTools, AgentTool
+from multi_agent_orchestrator.utils import Logger, AgentTools, AgentTool, get_default_http_client
 from multi_agent_orchestrator.retrievers import Retriever
 
 @dataclass
 class AnthropicAgentOptions(AgentOptions):
     api_key: Optional[str] = None
     client: Optional[Any] = None
+    # httpx.AsyncClient of the default client. If not set, the Anthropic agents and classifiers
+    # share one connection pool per event loop
+    http_client: Optional[Any] = None
     model_id: str = "claude-3-5-sonnet-20240620"
     streaming: Optional[bool] = False
     inference_config: Optional[dict[str, Any]] = None
@@ -35,18 +40,16 @@ class AnthropicAgent(Agent):
         self.streaming = options.streaming
 
         if options.client:
-            if self.streaming:
-                if not isinstance(options.client, AsyncAnthropic):
-                    raise ValueError("If streaming is enabled, the provided client must be an AsyncAnthropic client")
-            else:
-                if not isinstance(options.client, Anthropic):
-                    raise ValueError("If streaming is disabled, the provided client must be an Anthropic client")
+            if self.streaming and not isinstance(options.client, AsyncAnthropic):
+                raise ValueError("If streaming is enabled, the provided client must be an AsyncAnthropic client")
+            if not isinstance(options.client, (AsyncAnthropic, Anthropic)):
+                raise ValueError("The provided client must be an AsyncAnthropic or Anthropic client")
             self.client = options.client
         else:
-            if self.streaming:
-                self.client = AsyncAnthropic(api_key=options.api_key)
-            else:
-                self.client = Anthropic(api_key=options.api_key)
+            self.client = AsyncAnthropic(
+                api_key=options.api_key,
+                http_client=options.http_client or get_default_http_client('anthropic', DefaultAsyncHttpxClient)
+            )
 
         self.system_prompt = ''
         self.custom_variables = {}
@@ -104,8 +107,11 @@ class AnthropicAgent(Agent):
     async def _prepare_system_prompt(self, input_text: str) -> str:
         """Prepare the system prompt with optional retrieval context."""
 
-        self.update_system_prompt()
-        system_prompt = self.system_prompt
+        # Built locally, as concurrent requests may use other request variables
+        system_prompt = self.replace_placeholders(
+            self.prompt_template,
+            {**self.custom_variables, **self.get_request_variables()}
+        )
 
         if self.retriever:
             response = await self.retriever.retrieve_and_combine_results(input_text)
@@ -269,8 +275,11 @@ class AnthropicAgent(Agent):
 
     async def handle_single_response(self, input_data: dict) -> Any:
         try:
-            response = self.client.messages.create(**input_data)
-            return response
+            if isinstance(self.client, AsyncAnthropic):
+                return await self.client.messages.create(**input_data)
+            # A synchronous client would block the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(self.client.messages.create, **input_data))
         except Exception as error:
             Logger.error(f"Error invoking Anthropic: {error}")
             raise error
@@ -1,16 +1,20 @@
-from typing import Any, Optional, AsyncGenerator, AsyncIterable
+from typing import Any, Callable, Optional, AsyncGenerator, AsyncIterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+import asyncio
+import functools
 import re
 import json
 import os
 import boto3
+from botocore.config import Config
 from multi_agent_orchestrator.agents import Agent, AgentOptions, AgentStreamResponse
 from multi_agent_orchestrator.types import (ConversationMessage,
                        ParticipantRole,
                        BEDROCK_MODEL_ID_CLAUDE_3_HAIKU,
                        TemplateVariables,
                        AgentProviderType)
-from multi_agent_orchestrator.utils import conversation_to_dict, Logger, AgentTools, AgentTool
+from multi_agent_orchestrator.utils import conversation_to_dict, iterate_in_executor, Logger, AgentTools, AgentTool
 from multi_agent_orchestrator.retrievers import Retriever
 from multi_agent_orchestrator.shared import user_agent
 
@@ -25,6 +29,8 @@ class BedrockLLMAgentOptions(AgentOptions):
     tool_config: dict[str, Any] | AgentTools | None = None
     custom_system_prompt: Optional[dict[str, Any]] = None
     client: Optional[Any] = None
+    # Maximum number of model calls running at the same time, and of HTTP connections of the default client
+    max_pool_connections: int = 10
 
 
 class BedrockLLMAgent(Agent):
@@ -33,12 +39,18 @@ class BedrockLLMAgent(Agent):
         if options.client:
             self.client = options.client
         else:
+            config = Config(max_pool_connections=options.max_pool_connections)
             if options.region:
                 self.client = boto3.client(
                     'bedrock-runtime',
-                    region_name=options.region)
+                    region_name=options.region,
+                    config=config)
             else:
-                self.client = boto3.client('bedrock-runtime')
+                self.client = boto3.client('bedrock-runtime', config=config)
+        # boto3 calls are blocking: they run on a bounded pool, so a model call
+        # never stalls the event loop.
+        self.executor = ThreadPoolExecutor(max_workers=options.max_pool_connections,
+                                           thread_name_prefix='bedrock-llm-agent')
 
         user_agent.register_feature_to_client(self.client, feature="bedrock-llm-agent")
 
@@ -100,8 +112,11 @@ class BedrockLLMAgent(Agent):
     async def _prepare_system_prompt(self, input_text: str) -> str:
         """Prepare the system prompt with optional retrieval context."""
 
-        self.update_system_prompt()
-        system_prompt = self.system_prompt
+        # Built locally, as concurrent requests may use other request variables
+        system_prompt = self.replace_placeholders(
+            self.prompt_template,
+            {**self.custom_variables, **self.get_request_variables()}
+        )
 
         if self.retriever:
             response = await self.retriever.retrieve_and_combine_results(input_text)
@@ -278,7 +293,7 @@ class BedrockLLMAgent(Agent):
 
     async def handle_single_response(self, converse_input: dict[str, Any]) -> ConversationMessage:
         try:
-            response = self.client.converse(**converse_input)
+            response = await self._run(self.client.converse, **converse_input)
             if 'output' not in response:
                 raise ValueError("No output received from Bedrock model")
 
@@ -305,7 +320,9 @@ class BedrockLLMAgent(Agent):
             StreamChunk: Contains either a text chunk or the final complete message
         """
         try:
-            response = self.client.converse_stream(**converse_input)
+            # The event stream is read on the executor, chunks are passed to the loop as they arrive
+            stream = iterate_in_executor(self.executor,
+                                         lambda: self.client.converse_stream(**converse_input)['stream'])
 
             message = {}
             content = []
@@ -313,7 +330,7 @@ class BedrockLLMAgent(Agent):
             text = ''
             tool_use = {}
 
-            for chunk in response['stream']:
+            async for chunk in stream:
                 if 'messageStart' in chunk:
                     message['role'] = chunk['messageStart']['role']
                 elif 'contentBlockStart' in chunk:
@@ -351,6 +368,16 @@ class BedrockLLMAgent(Agent):
             Logger.error(f"Error getting stream from Bedrock model: {str(error)}")
             raise error
 
+    async def close(self) -> None:
+        """Release the threads used for the Bedrock calls, once the calls in flight are done."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
+
+    async def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking boto3 call on the agent executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
     def set_system_prompt(self,
                           template: Optional[str] = None,
                           variables: Optional[TemplateVariables] = None) -> None:
@@ -1,6 +1,8 @@
 from typing import AsyncIterable, Optional, Any, AsyncGenerator
 from dataclasses import dataclass
-from openai import OpenAI
+import asyncio
+import functools
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from multi_agent_orchestrator.agents import (
     Agent,
     AgentOptions,
@@ -12,7 +14,7 @@ from multi_agent_orchestrator.types import (
     OPENAI_MODEL_ID_GPT_O_MINI,
     TemplateVariables
 )
-from multi_agent_orchestrator.utils import Logger
+from multi_agent_orchestrator.utils import Logger, iterate_in_executor, get_default_http_client
 from multi_agent_orchestrator.retrievers import Retriever
 
 
@@ -26,19 +28,27 @@ class OpenAIAgentOptions(AgentOptions):
     custom_system_prompt: Optional[dict[str, Any]] = None
     retriever: Optional[Retriever] = None
     client: Optional[Any] = None
+    # httpx.AsyncClient of the default client. If not set, the OpenAI agents and classifiers
+    # share one connection pool per event loop
+    http_client: Optional[Any] = None
 
 
 
 class OpenAIAgent(Agent):
     def __init__(self, options: OpenAIAgentOptions):
         super().__init__(options)
-        if not options.api_key:
+        if not options.api_key and not options.client:
             raise ValueError("OpenAI API key is required")
 
         if options.client:
+            # An AsyncOpenAI client can be shared by several agents.
+            # Synchronous OpenAI clients are still supported, their calls run on a thread.
             self.client = options.client
         else:
-            self.client = OpenAI(api_key=options.api_key)
+            self.client = AsyncOpenAI(
+                api_key=options.api_key,
+                http_client=options.http_client or get_default_http_client('openai', DefaultAsyncHttpxClient)
+            )
 
 
         self.model = options.model or OPENAI_MODEL_ID_GPT_O_MINI
@@ -144,7 +154,7 @@ class OpenAIAgent(Agent):
     async def handle_single_response(self, request_options: dict[str, Any]) -> ConversationMessage:
         try:
             request_options['stream'] = False
-            chat_completion = self.client.chat.completions.create(**request_options)
+            chat_completion = await self._create_completion(request_options)
 
             if not chat_completion.choices:
                 raise ValueError('No choices returned from OpenAI API')
@@ -165,11 +175,10 @@ class OpenAIAgent(Agent):
 
     async def handle_streaming_response(self, request_options: dict[str, Any]) -> AsyncGenerator[AgentStreamResponse, None]:
         try:
-            stream = self.client.chat.completions.create(**request_options)
             accumulated_message = []
 
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
+            async for chunk in self._stream_completion(request_options):
+                if chunk.choices and chunk.choices[0].delta.content:
                     chunk_content = chunk.choices[0].delta.content
                     accumulated_message.append(chunk_content)
                     self.callbacks.on_llm_new_token(chunk_content)
@@ -185,6 +194,23 @@ class OpenAIAgent(Agent):
             Logger.error(f"Error getting stream from OpenAI model: {str(error)}")
             raise error
 
+    async def _create_completion(self, request_options: dict[str, Any]) -> Any:
+        if isinstance(self.client, AsyncOpenAI):
+            return await self.client.chat.completions.create(**request_options)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.client.chat.completions.create,
+                                                                  **request_options))
+
+    async def _stream_completion(self, request_options: dict[str, Any]) -> AsyncIterable[Any]:
+        """Yield the completion chunks as they arrive, without blocking the event loop."""
+        if isinstance(self.client, AsyncOpenAI):
+            async for chunk in await self.client.chat.completions.create(**request_options):
+                yield chunk
+        else:
+            async for chunk in iterate_in_executor(None,
+                                                   lambda: self.client.chat.completions.create(**request_options)):
+                yield chunk
+
     def set_system_prompt(self,
                          template: Optional[str] = None,
                          variables: Optional[TemplateVariables] = None) -> None:
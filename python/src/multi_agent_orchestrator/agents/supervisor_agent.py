@@ -1,7 +1,9 @@
-from typing import Optional, Any, AsyncIterable, Union, TYPE_CHECKING
+from typing import Optional, Any, AsyncIterable, AsyncIterator, Union, TYPE_CHECKING
+from collections import OrderedDict, deque
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 import asyncio
-from multi_agent_orchestrator.agents import Agent, AgentOptions
+from multi_agent_orchestrator.agents import Agent, AgentOptions, AgentStreamResponse
 if TYPE_CHECKING:
     from multi_agent_orchestrator.agents import AnthropicAgent, BedrockLLMAgent
 
@@ -11,6 +13,51 @@ from multi_agent_orchestrator.utils import Logger, AgentTools, AgentTool
 from multi_agent_orchestrator.storage import ChatStorage, InMemoryChatStorage
 
 
+@dataclass
+class SupervisorRequestContext:
+    """The request being processed by a supervisor, for the messages sent to its team."""
+    user_id: str
+    session_id: str
+    additional_params: Optional[dict[str, str]] = None
+    # Team messages of the turn by agent ID, saved at once when the turn ends.
+    # None outside of a supervisor turn, where the messages are saved immediately.
+    pending_messages: Optional[dict[str, list[TimestampedMessage]]] = None
+
+# Set by process_request for the current asyncio task, so that concurrent requests of a
+# shared supervisor do not send messages on behalf of each other
+_request_context: ContextVar[Optional[SupervisorRequestContext]] = ContextVar(
+    'supervisor_request_context', default=None
+)
+
+
+class AgentsMemory:
+    """
+    Rendered exchanges between a supervisor and its team in a session, oldest first.
+
+    Exchanges are appended as the team responds, and the oldest ones are dropped
+    beyond max_chars, so the memory is never rebuilt from the whole session.
+    """
+    def __init__(self, max_chars: Optional[int] = None):
+        self.max_chars = max_chars
+        self.exchanges: deque[str] = deque()
+        self.size = 0
+        self._rendered: Optional[str] = None
+
+    def add(self, exchange: str) -> None:
+        if not exchange:
+            return
+        self.exchanges.append(exchange)
+        self.size += len(exchange)
+        while self.max_chars is not None and self.size > self.max_chars and self.exchanges:
+            self.size -= len(self.exchanges.popleft())
+        self._rendered = None
+
+    def render(self) -> str:
+        if self._rendered is None:
+            self._rendered = ''.join(self.exchanges)
+        return self._rendered
+
+
 @dataclass
 class SupervisorAgentOptions(AgentOptions):
     lead_agent: Agent = None # The agent that leads the team coordination
@@ -18,6 +65,9 @@ class SupervisorAgentOptions(AgentOptions):
     storage: Optional[ChatStorage] = None # memory storage for the team
     trace: Optional[bool] = None # enable tracing/logging
     extra_tools: Optional[Union[AgentTools, list[AgentTool]]] = None # add extra tools to the lead_agent
+    max_concurrency: Optional[int] = None # maximum number of team agents processing messages at the same time
+    agent_timeout: Optional[float] = None # seconds a team agent has to respond before its message is abandoned
+    max_agents_memory_chars: Optional[int] = None # size of the team exchanges given to the lead_agent, unbounded if None
 
     def validate(self) -> None:
         # Get the actual class names as strings for comparison
@@ -55,14 +105,27 @@ class SupervisorAgentOptions(AgentOptions):
         if self.lead_agent.tool_config:
             raise ValueError('Supervisor tools are managed by SupervisorAgent. Use extra_tools for additional tools.')
 
+        if self.max_concurrency is not None and self.max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+
 class SupervisorAgent(Agent):
     """Supervisor agent that orchestrates interactions between multiple agents.
 
     Manages communication, task delegation, and response aggregation between a team of agents.
     Supports parallel processing of messages and maintains conversation history.
+    Team agents are awaited on the event loop of the request, at most max_concurrency at a time.
+    A team agent that fails or does not respond within agent_timeout is reported in the
+    response of send_messages, along with the responses of the other agents.
+    Streaming team agents are read as they generate, and the supervisor streams whenever
+    its lead agent does, so the final answer reaches the user as soon as it is generated.
+    The team exchanges of a turn are saved with a single storage write when the turn ends,
+    and the agents memory of each session is kept rendered, updated as the team responds.
+    The memory is read from the storage once per session: sessions whose team storage is
+    also written by other processes may miss their exchanges.
     """
 
     DEFAULT_TOOL_MAX_RECURSIONS = 40
+    MAX_CACHED_SESSIONS = 1000
 
     def __init__(self, options: SupervisorAgentOptions):
         options.validate()
@@ -74,13 +137,18 @@ class SupervisorAgent(Agent):
         self.team = options.team
         self.storage = options.storage or InMemoryChatStorage()
         self.trace = options.trace
-        self.user_id = ''
-        self.session_id = ''
-        self.additional_params = None
+        self.max_concurrency = options.max_concurrency
+        self.agent_timeout = options.agent_timeout
+        self.max_agents_memory_chars = options.max_agents_memory_chars
+        # (user_id, session_id) -> agents memory, from the least to the most recently used
+        self.agents_memories: OrderedDict[tuple[str, str], AgentsMemory] = OrderedDict()
 
         self._configure_supervisor_tools(options.extra_tools)
         self._configure_prompt()
 
+    def is_streaming_enabled(self) -> bool:
+        return self.lead_agent.is_streaming_enabled()
+
     def _configure_supervisor_tools(self, extra_tools: Optional[Union[AgentTools, list[AgentTool]]]) -> None:
         """Configure the tools available to the lead_agent."""
         self.supervisor_tools = AgentTools([AgentTool(
@@ -166,12 +234,12 @@ When communicating with other agents, including the User, please follow these gu
 </guidelines>
 
 <agents_memory>
-{{AGENTS_MEMORY}}
+{{{{AGENTS_MEMORY}}}}
 </agents_memory>
 """
         self.lead_agent.set_system_prompt(self.prompt_template)
 
-    def send_message(
+    async def send_message(
         self,
         agent: Agent,
         content: str,
@@ -184,55 +252,112 @@ When communicating with other agents, including the User, please follow these gu
             if self.trace:
                 Logger.info(f"\033[32m\n===>>>>> Supervisor sending {agent.name}: {content}\033[0m")
 
+            context = _request_context.get()
+            pending_messages = context.pending_messages if context is not None else None
             agent_chat_history = (
-                asyncio.run(self.storage.fetch_chat(user_id, session_id, agent.id))
+                await self.storage.fetch_chat(user_id, session_id, agent.id)
                 if agent.save_chat else []
             )
+            if agent.save_chat and pending_messages:
+                # Exchanges of this turn that are not saved yet
+                agent_chat_history = [*agent_chat_history, *pending_messages.get(agent.id, [])]
 
             user_message = TimestampedMessage(
                 role=ParticipantRole.USER.value,
                 content=[{'text': content}]
             )
-            response = asyncio.run(agent.process_request(
+            response = await agent.process_request(
                 content, user_id, session_id, agent_chat_history, additional_params
-            ))
+            )
+            if isinstance(response, AsyncIterable):
+                response = await self._read_stream(response)
+            response_text = self._message_text(response)
 
             assistant_message = TimestampedMessage(
                 role=ParticipantRole.ASSISTANT.value,
-                content=[{'text': response.content[0].get('text', '')}]
+                content=[{'text': response_text}]
             )
 
 
             if agent.save_chat:
-                asyncio.run(self.storage.save_chat_messages(
-                user_id, session_id, agent.id,[user_message, assistant_message]
-                ))
+                if pending_messages is not None:
+                    pending_messages.setdefault(agent.id, []).extend([user_message, assistant_message])
+                else:
+                    await self.storage.save_chat_messages(
+                    user_id, session_id, agent.id,[user_message, assistant_message]
+                    )
+                agents_memory = self.agents_memories.get((user_id, session_id))
+                if agents_memory is not None:
+                    agents_memory.add(self._format_exchange(user_message,
+                                                            self._prefixed(agent.id, assistant_message)))
 
             if self.trace:
                 Logger.info(
-                    f"\033[33m\n<<<<<===Supervisor received from {agent.name}:\n{response.content[0].get('text','')[:500]}...\033[0m"
+                    f"\033[33m\n<<<<<===Supervisor received from {agent.name}:\n{response_text[:500]}...\033[0m"
                 )
 
-            return f"{agent.name}: {response.content[0].get('text', '')}"
+            return f"{agent.name}: {response_text}"
 
         except Exception as e:
             Logger.error(f"Error in send_message: {e}")
             raise e
 
+    @staticmethod
+    async def _read_stream(stream: AsyncIterable[AgentStreamResponse]) -> ConversationMessage:
+        """Read the response of a streaming team agent as it is generated."""
+        chunks = []
+        final_message = None
+        async for chunk in stream:
+            if chunk.final_message:
+                # Agents using tools send the message of each turn, the last one is the answer
+                final_message = chunk.final_message
+            elif chunk.text:
+                chunks.append(chunk.text)
+        return final_message or ConversationMessage(
+            role=ParticipantRole.ASSISTANT.value,
+            content=[{'text': ''.join(chunks)}]
+        )
+
+    @staticmethod
+    def _message_text(message: ConversationMessage) -> str:
+        """Text of a team agent response, ignoring its tool use blocks."""
+        return ''.join(block.get('text', '') for block in message.content or []
+                       if isinstance(block, dict))
+
+    async def _send_message_with_limits(
+        self,
+        agent: Agent,
+        content: str,
+        context: SupervisorRequestContext,
+        semaphore: Optional[asyncio.Semaphore]
+    ) -> str:
+        """Send a message within the concurrency limit and the timeout,
+        reporting a failure instead of raising it so that the other responses are kept."""
+        try:
+            if semaphore:
+                await semaphore.acquire()
+            try:
+                return await asyncio.wait_for(
+                    self.send_message(agent, content, context.user_id,
+                                      context.session_id, context.additional_params),
+                    timeout=self.agent_timeout
+                )
+            finally:
+                if semaphore:
+                    semaphore.release()
+        except asyncio.TimeoutError:
+            Logger.warn(f"{agent.name} did not respond within {self.agent_timeout} seconds")
+            return f"{agent.name}: No response within {self.agent_timeout} seconds."
+        except Exception as e:
+            return f"{agent.name}: Failed to respond ({e})."
+
     async def send_messages(self, messages: list[dict[str, str]]) -> str:
         """Process messages for agents in parallel."""
         try:
+            context = _request_context.get() or SupervisorRequestContext(user_id='', session_id='')
+            semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
             tasks = [
-                asyncio.create_task(
-                    asyncio.to_thread(
-                        self.send_message,
-                        agent,
-                        message.get('content'),
-                        self.user_id,
-                        self.session_id,
-                        self.additional_params
-                    )
-                )
+                self._send_message_with_limits(agent, message.get('content'), context, semaphore)
                 for agent in self.team
                 for message in messages
                 if agent.name == message.get('recipient')
@@ -251,12 +376,67 @@ When communicating with other agents, including the User, please follow these gu
     def _format_agents_memory(self, agents_history: list[ConversationMessage]) -> str:
         """Format agent conversation history."""
         return ''.join(
-            f"{user_msg.role}:{user_msg.content[0].get('text','')}\n"
-            f"{asst_msg.role}:{asst_msg.content[0].get('text','')}\n"
+            self._format_exchange(user_msg, asst_msg)
             for user_msg, asst_msg in zip(agents_history[::2], agents_history[1::2])
-            if self.id not in asst_msg.content[0].get('text', '')
         )
 
+    def _format_exchange(self, user_msg: ConversationMessage, asst_msg: ConversationMessage) -> str:
+        """Format a team exchange of the agents memory, skipping the supervisor's own messages."""
+        if self.id in asst_msg.content[0].get('text', ''):
+            return ''
+        return (f"{user_msg.role}:{user_msg.content[0].get('text','')}\n"
+                f"{asst_msg.role}:{asst_msg.content[0].get('text','')}\n")
+
+    @staticmethod
+    def _prefixed(agent_id: str, message: ConversationMessage) -> ConversationMessage:
+        """The message as fetch_all_chats returns it, prefixed with the agent ID."""
+        return ConversationMessage(role=message.role,
+                                   content=[{'text': f"[{agent_id}] {message.content[0].get('text', '')}"}])
+
+    async def _get_agents_memory(self, user_id: str, session_id: str) -> AgentsMemory:
+        """Return the agents memory of a session, read from the storage on first use."""
+        key = (user_id, session_id)
+        agents_memory = self.agents_memories.get(key)
+        if agents_memory is None:
+            agents_memory = AgentsMemory(self.max_agents_memory_chars)
+            agents_history = await self.storage.fetch_all_chats(user_id, session_id)
+            for user_msg, asst_msg in zip(agents_history[::2], agents_history[1::2]):
+                agents_memory.add(self._format_exchange(user_msg, asst_msg))
+            # A concurrent request of the session may have loaded it first
+            agents_memory = self.agents_memories.setdefault(key, agents_memory)
+        self.agents_memories.move_to_end(key)
+        while len(self.agents_memories) > self.MAX_CACHED_SESSIONS:
+            self.agents_memories.popitem(last=False)
+        return agents_memory
+
+    async def _save_pending_messages(self, context: SupervisorRequestContext) -> None:
+        """Save the team exchanges of the turn with a single storage write."""
+        pending_messages, context.pending_messages = context.pending_messages, {}
+        if pending_messages:
+            await self.storage.save_session_messages(context.user_id, context.session_id, pending_messages)
+
+    async def _save_after_stream(self,
+                                 stream: AsyncIterable[Any],
+                                 context: SupervisorRequestContext) -> AsyncIterator[Any]:
+        """
+        Pass the lead_agent stream through, then save the team exchanges of the turn.
+        The request context is set while each chunk is generated, as the tools of the lead agent
+        run then, and reset before the chunk is yielded to the task reading the stream.
+        """
+        iterator = stream.__aiter__()
+        try:
+            while True:
+                token = _request_context.set(context)
+                try:
+                    chunk = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    _request_context.reset(token)
+                yield chunk
+        finally:
+            await self._save_pending_messages(context)
+
     async def process_request(
         self,
         input_text: str,
@@ -267,21 +447,27 @@ When communicating with other agents, including the User, please follow these gu
     ) -> Union[ConversationMessage, AsyncIterable[Any]]:
         """Process a user request through the lead_agent agent."""
         try:
-            self.user_id = user_id
-            self.session_id = session_id
-            self.additional_params = additional_params
-
-            agents_history = await self.storage.fetch_all_chats(user_id, session_id)
-            agents_memory = self._format_agents_memory(agents_history)
-
-            self.lead_agent.set_system_prompt(
-                self.prompt_template.replace('{AGENTS_MEMORY}', agents_memory)
-            )
+            # A streaming lead agent runs its tools while the stream is read: _save_after_stream
+            # sets the context again then
+            context = SupervisorRequestContext(user_id, session_id, additional_params, pending_messages={})
+            token = _request_context.set(context)
+
+            response = None
+            try:
+                agents_memory = await self._get_agents_memory(user_id, session_id)
+                with self.lead_agent.request_variables({'AGENTS_MEMORY': agents_memory.render()}):
+                    response = await self.lead_agent.process_request(
+                        input_text, user_id, session_id, chat_history, additional_params
+                    )
+            finally:
+                _request_context.reset(token)
+                if not isinstance(response, AsyncIterable):
+                    await self._save_pending_messages(context)
 
-            return await self.lead_agent.process_request(
-                input_text, user_id, session_id, chat_history, additional_params
-            )
+            if isinstance(response, AsyncIterable):
+                return self._save_after_stream(response, context)
+            return response
 
         except Exception as e:
             Logger.error(f"Error in process_request: {e}")
-            raise e
\ No newline at end of file
+            raise e
@@ -1,7 +1,8 @@
 """
 Code for Classifier.
 """
-from .classifier import Classifier, ClassifierResult
+from .classifier import Classifier, ClassifierResult, ClassifierContext, classifier_session
+from .classification_cache import ClassificationCache
 
 try:
     from .bedrock_classifier import BedrockClassifier, BedrockClassifierOptions
@@ -21,9 +22,18 @@ try:
 except Exception as e:
     _OPENAI_AVAILABLE = False
 
+try:
+    from .embedding_classifier import EmbeddingClassifier, EmbeddingClassifierOptions, HashedNgramEmbedder
+    _NUMPY_AVAILABLE = True
+except Exception as e:
+    _NUMPY_AVAILABLE = False
+
 __all__ = [
     "Classifier",
     "ClassifierResult",
+    "ClassifierContext",
+    "classifier_session",
+    "ClassificationCache",
 ]
 
 if _AWS_AVAILABLE:
@@ -42,4 +52,11 @@ if _OPENAI_AVAILABLE:
     __all__.extend([
         "OpenAIClassifier",
         "OpenAIClassifierOptions"
-    ])
\ No newline at end of file
+    ])
+
+if _NUMPY_AVAILABLE:
+    __all__.extend([
+        "EmbeddingClassifier",
+        "EmbeddingClassifierOptions",
+        "HashedNgramEmbedder"
+    ])
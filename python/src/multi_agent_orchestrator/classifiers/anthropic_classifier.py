@@ -1,7 +1,8 @@
 from typing import List, Optional, Dict, Any
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 from multi_agent_orchestrator.utils.helpers import is_tool_input
 from multi_agent_orchestrator.utils.logger import Logger
+from multi_agent_orchestrator.utils.http_clients import get_default_http_client
 from multi_agent_orchestrator.types import ConversationMessage
 from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
 import logging
@@ -13,10 +14,14 @@ class AnthropicClassifierOptions:
     def __init__(self,
                  api_key: str,
                  model_id: Optional[str] = None,
-                 inference_config: Optional[Dict[str, Any]] = None):
+                 inference_config: Optional[Dict[str, Any]] = None,
+                 http_client: Optional[Any] = None):
         self.api_key = api_key
         self.model_id = model_id
         self.inference_config = inference_config or {}
+        # httpx.AsyncClient of the client. If not set, the Anthropic agents and classifiers
+        # share one connection pool per event loop
+        self.http_client = http_client
 
 class AnthropicClassifier(Classifier):
     def __init__(self, options: AnthropicClassifierOptions):
@@ -25,7 +30,10 @@ class AnthropicClassifier(Classifier):
         if not options.api_key:
             raise ValueError("Anthropic API key is required")
 
-        self.client = Anthropic(api_key=options.api_key)
+        self.client = AsyncAnthropic(
+            api_key=options.api_key,
+            http_client=options.http_client or get_default_http_client('anthropic', DefaultAsyncHttpxClient)
+        )
         self.model_id = options.model_id or ANTHROPIC_MODEL_ID_CLAUDE_3_5_SONNET
 
         default_max_tokens = 1000
@@ -70,7 +78,7 @@ class AnthropicClassifier(Classifier):
         user_message = {"role": "user", "content": input_text}
 
         try:
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model_id,
                 max_tokens=self.inference_config['max_tokens'],
                 messages=[user_message],
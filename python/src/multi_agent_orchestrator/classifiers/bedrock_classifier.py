@@ -1,8 +1,12 @@
 import os
 from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
 import boto3
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError
-from multi_agent_orchestrator.utils.helpers import is_tool_input
+from multi_agent_orchestrator.utils.helpers import is_tool_input, conversation_to_dict
 from multi_agent_orchestrator.utils import Logger
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole, BEDROCK_MODEL_ID_CLAUDE_3_5_SONNET
 from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
@@ -14,12 +18,16 @@ class BedrockClassifierOptions:
         model_id: Optional[str] = None,
         region: Optional[str] = None,
         inference_config: Optional[Dict] = None,
-        client: Optional[Any] = None
+        client: Optional[Any] = None,
+        max_pool_connections: int = 10
     ):
         self.model_id = model_id
         self.region = region
         self.inference_config = inference_config if inference_config is not None else {}
         self.client = client
+        # Maximum number of classifications running at the same time,
+        # and of HTTP connections of the default client
+        self.max_pool_connections = max_pool_connections
 
 
 class BedrockClassifier(Classifier):
@@ -29,7 +37,13 @@ class BedrockClassifier(Classifier):
         if options.client:
             self.client = options.client
         else:
-            self.client = boto3.client('bedrock-runtime',region_name=self.region)
+            self.client = boto3.client('bedrock-runtime',
+                                       region_name=self.region,
+                                       config=Config(max_pool_connections=options.max_pool_connections))
+        # boto3 calls are blocking: they run on a bounded pool, so a classification
+        # never stalls the event loop.
+        self.executor = ThreadPoolExecutor(max_workers=options.max_pool_connections,
+                                           thread_name_prefix='bedrock-classifier')
 
         user_agent.register_feature_to_client(self.client, feature="bedrock-classifier")
 
@@ -94,7 +108,7 @@ class BedrockClassifier(Classifier):
 
         converse_cmd = {
             "modelId": self.model_id,
-            "messages": [user_message.__dict__],
+            "messages": [conversation_to_dict(user_message)],
             "system": [{"text": self.system_prompt}],
             "toolConfig": toolConfig,
             "inferenceConfig": {
@@ -106,7 +120,8 @@ class BedrockClassifier(Classifier):
         }
 
         try:
-            response = self.client.converse(**converse_cmd)
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self.executor, lambda: self.client.converse(**converse_cmd))
 
             if not response.get('output'):
                 raise ValueError("No output received from Bedrock model")
@@ -134,3 +149,8 @@ class BedrockClassifier(Classifier):
         except (BotoCoreError, ClientError) as error:
             Logger.error(f"Error processing request:{str(error)}")
             raise error
+
+    async def close(self) -> None:
+        """Release the threads used for the Bedrock calls, once the calls in flight are done."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
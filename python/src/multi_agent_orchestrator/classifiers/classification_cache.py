@@ -0,0 +1,101 @@
+from typing import Optional
+from collections import OrderedDict
+import hashlib
+import re
+import time
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from multi_agent_orchestrator.agents import Agent
+from multi_agent_orchestrator.classifiers.classifier import ClassifierResult
+
+# Assistant messages of the classifier history are prefixed with the ID of their agent
+AGENT_PREFIX = re.compile(r'^\[([^\]]+)\]')
+
+
+class ClassificationCache:
+    """
+    Cache of classification results, to skip the classifier for repeated inputs.
+
+    Results are keyed on the normalized input, a digest of the most recent history
+    messages and the set of agents, and expire after a TTL. Optionally, short inputs
+    such as "yes" or "1" are routed to the agent that answered last (sticky agent),
+    as the classifier prompt asks for follow-ups.
+    """
+    def __init__(self,
+                 max_size: int = 1000,
+                 ttl: float = 300.0,
+                 history_size: int = 4,
+                 sticky_max_words: int = 0):
+        """
+        Args:
+            max_size: Maximum number of cached results, 0 to disable the cache.
+            ttl: Time in seconds after which a cached result expires.
+            history_size: Number of the most recent history messages included in the key.
+            sticky_max_words: Inputs with at most this number of words are routed to the
+                agent that answered last, without calling the classifier. 0 to disable.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.history_size = history_size
+        self.sticky_max_words = sticky_max_words
+        self.results: OrderedDict[str, tuple[float, ClassifierResult]] = OrderedDict()
+
+    def make_key(self,
+                 input_text: str,
+                 chat_history: list[ConversationMessage],
+                 agents: dict[str, Agent]) -> str:
+        """Build the cache key of a classification."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.normalize(input_text).encode())
+        for message in chat_history[-self.history_size:] if self.history_size else []:
+            digest.update(b'\x00')
+            digest.update(f"{message.role}:{self.message_text(message)}".encode())
+        digest.update(b'\x01')
+        digest.update(','.join(sorted(agents)).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[ClassifierResult]:
+        """Return the cached result, or None if it is missing or expired."""
+        entry = self.results.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self.results[key]
+            return None
+        self.results.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: ClassifierResult) -> None:
+        """Cache a result, evicting the least recently used ones above max_size."""
+        if not self.max_size:
+            return
+        self.results[key] = (time.monotonic() + self.ttl, result)
+        self.results.move_to_end(key)
+        while len(self.results) > self.max_size:
+            self.results.popitem(last=False)
+
+    def get_sticky_result(self,
+                          input_text: str,
+                          chat_history: list[ConversationMessage],
+                          agents: dict[str, Agent]) -> Optional[ClassifierResult]:
+        """Route a short follow-up to the agent that answered last, if any."""
+        if not self.sticky_max_words or len(input_text.split()) > self.sticky_max_words:
+            return None
+        for message in reversed(chat_history):
+            if message.role == ParticipantRole.ASSISTANT.value:
+                match = AGENT_PREFIX.match(self.message_text(message))
+                agent = agents.get(match.group(1)) if match else None
+                return ClassifierResult(selected_agent=agent, confidence=1.0) if agent else None
+        return None
+
+    @staticmethod
+    def normalize(input_text: str) -> str:
+        """Lowercase the input and ignore punctuation and repeated whitespace."""
+        return ' '.join(re.sub(r'[^\w\s]', ' ', input_text.lower()).split())
+
+    @staticmethod
+    def message_text(message: ConversationMessage) -> str:
+        content = message.content
+        if isinstance(content, list):
+            return content[0].get('text', '') if content and isinstance(content[0], dict) else ''
+        return content or ''
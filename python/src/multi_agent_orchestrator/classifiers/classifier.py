@@ -1,21 +1,69 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 import re
-from typing import Dict, List, Optional
+from typing import Dict, Hashable, Iterator, List, Optional
 from dataclasses import dataclass
 from multi_agent_orchestrator.types import ConversationMessage, AgentTypes, TemplateVariables
 from multi_agent_orchestrator.agents import Agent
 
 
+HISTORY_PLACEHOLDER = "{{HISTORY}}"
+# Number of sessions whose formatted history is kept by each classifier
+MAX_FORMATTED_HISTORIES = 1000
+
 @dataclass
 class ClassifierResult:
     selected_agent: Optional[Agent]
     confidence: float
 
+@dataclass
+class ClassifierContext:
+    """The history and system prompt of the classification being processed by a classifier."""
+    classifier: 'Classifier'
+    history: str
+    system_prompt: str
+
+@dataclass
+class FormattedHistory:
+    """The formatted history of a session, with the lines of its first and last messages."""
+    size: int
+    first_line: str
+    last_line: str
+    text: str
+
+# Set by classify for the current asyncio task, so that concurrent classifications
+# of a shared classifier do not see each other's history
+_classifier_context: ContextVar[Optional[ClassifierContext]] = ContextVar('classifier_context', default=None)
+# Set by classifier_session for the classifications of a session's history
+_classifier_session: ContextVar[Optional[Hashable]] = ContextVar('classifier_session', default=None)
+
+@contextmanager
+def classifier_session(session_key: Hashable) -> Iterator[None]:
+    """
+    Mark the classifications made in the block as classifying the history of the given session,
+    so that the classifiers only format the messages added since its previous classification.
+
+    Args:
+        session_key (Hashable): Identifies the session, such as (user_id, session_id).
+    """
+    token = _classifier_session.set(session_key)
+    try:
+        yield
+    finally:
+        _classifier_session.reset(token)
+
 class Classifier(ABC):
     def __init__(self):
         self.agent_descriptions = ""
         self.history = ""
         self.custom_variables: TemplateVariables = {}
+        # Prompt template with every placeholder but the history replaced, split around the history
+        self.prompt_segments: List[str] = []
+        # Template, custom variables and agent descriptions the prompt segments were compiled from
+        self.compiled_from: Optional[tuple] = None
+        self.formatted_histories: OrderedDict[Hashable, FormattedHistory] = OrderedDict()
         self.prompt_template = """
 You are AgentMatcher, an intelligent assistant designed to analyze user queries and match them with
 the most suitable agent or department. Your task is to understand the user's request,
@@ -126,9 +174,10 @@ Skip any preamble and provide only the response in the specified format.
         self.agent_descriptions = "\n\n".join(f"{agent.id}:{agent.description}"
                                               for agent in agents.values())
         self.agents = agents
+        self.compile_prompt()
 
     def set_history(self, messages: List[ConversationMessage]) -> None:
-        self.history = self.format_messages(messages)
+        self.history = self.format_history(messages)
 
     def set_system_prompt(self,
                           template: Optional[str] = None,
@@ -137,20 +186,114 @@ Skip any preamble and provide only the response in the specified format.
             self.prompt_template = template
         if variables:
             self.custom_variables = variables
+        self.compile_prompt()
         self.update_system_prompt()
 
     @staticmethod
     def format_messages(messages: List[ConversationMessage]) -> str:
-        return "\n".join([
-            f"{message.role}: {' '.join([message.content[0]['text']])}" for message in messages
-        ])
+        return "\n".join([Classifier.format_message(message) for message in messages])
+
+    @staticmethod
+    def format_message(message: ConversationMessage) -> str:
+        return f"{message.role}: {' '.join([message.content[0]['text']])}"
+
+    def format_history(self, messages: List[ConversationMessage]) -> str:
+        """
+        Format the history of the session being classified.
+
+        Within classifier_session, the formatted history of the session is kept, and only the
+        messages appended since it was formatted are formatted again. It is reused when its first
+        and last messages are still at the same positions; otherwise, such as when the oldest
+        messages fell out of the history window, the whole history is formatted.
+
+        Args:
+            messages (List[ConversationMessage]): The history of the session.
+
+        Returns:
+            str: The formatted history, as format_messages returns it.
+        """
+        session_key = _classifier_session.get()
+        if session_key is None or not messages:
+            return self.format_messages(messages)
+
+        cached = self.formatted_histories.get(session_key)
+        if (cached is not None
+                and cached.size <= len(messages)
+                and self.format_message(messages[0]) == cached.first_line
+                and self.format_message(messages[cached.size - 1]) == cached.last_line):
+            new_lines = [self.format_message(message) for message in messages[cached.size:]]
+            text = "\n".join([cached.text, *new_lines]) if new_lines else cached.text
+            last_line = new_lines[-1] if new_lines else cached.last_line
+            first_line = cached.first_line
+        else:
+            lines = [self.format_message(message) for message in messages]
+            text = "\n".join(lines)
+            first_line, last_line = lines[0], lines[-1]
+
+        self.formatted_histories[session_key] = FormattedHistory(len(messages), first_line, last_line, text)
+        self.formatted_histories.move_to_end(session_key)
+        if len(self.formatted_histories) > MAX_FORMATTED_HISTORIES:
+            self.formatted_histories.popitem(last=False)
+        return text
+
+    @property
+    def history(self) -> str:
+        """The formatted history of the classification being processed, if any."""
+        context = self.get_context()
+        return context.history if context else self._history
+
+    @history.setter
+    def history(self, history: str) -> None:
+        self._history = history
+
+    @property
+    def system_prompt(self) -> str:
+        """The system prompt of the classification being processed, if any."""
+        context = self.get_context()
+        return context.system_prompt if context else self._system_prompt
+
+    @system_prompt.setter
+    def system_prompt(self, system_prompt: str) -> None:
+        self._system_prompt = system_prompt
+
+    def get_context(self) -> Optional[ClassifierContext]:
+        """Return the context of the classification being processed in this task, if any."""
+        context = _classifier_context.get()
+        return context if context is not None and context.classifier is self else None
 
     async def classify(self,
                        input_text: str,
                        chat_history: List[ConversationMessage]) -> ClassifierResult:
-        self.set_history(chat_history)
-        self.update_system_prompt()
-        return await self.process_request(input_text, chat_history)
+        history = self.format_history(chat_history)
+        context = ClassifierContext(self, history, self.build_system_prompt(history))
+        token = _classifier_context.set(context)
+        try:
+            return await self.process_request(input_text, chat_history)
+        finally:
+            _classifier_context.reset(token)
+
+    async def classify_candidates(self,
+                                  input_text: str,
+                                  chat_history: List[ConversationMessage],
+                                  max_candidates: int) -> List[ClassifierResult]:
+        """
+        Return the agents that could handle the input, the most likely first.
+
+        Classifiers selecting a single agent, such as the LLM classifiers, return it alone.
+        Classifiers that can rank the agents override this to return the other candidates
+        when the input is ambiguous, with confidences between 0 and 1 that the orchestrator
+        compares with SPECULATIVE_CONFIDENCE_THRESHOLD.
+
+        Args:
+            input_text (str): The user input.
+            chat_history (List[ConversationMessage]): The conversation history.
+            max_candidates (int): Maximum number of candidates to return.
+
+        Returns:
+            List[ClassifierResult]: The candidates, empty when no agent was selected.
+        """
+        result = await self.classify(input_text, chat_history)
+        return [result] if result.selected_agent else []
 
     @abstractmethod
     async def process_request(self,
@@ -159,12 +302,43 @@ Skip any preamble and provide only the response in the specified format.
         pass
 
     def update_system_prompt(self) -> None:
-        all_variables: TemplateVariables = {
+        self.system_prompt = self.build_system_prompt(self.history)
+
+    def compile_prompt(self) -> None:
+        """
+        Replace the placeholders of the prompt template that do not change between requests,
+        so that building the system prompt of a request only inserts the history.
+        """
+        variables: TemplateVariables = {
             **self.custom_variables,
             "AGENT_DESCRIPTIONS": self.agent_descriptions,
-            "HISTORY": self.history,
         }
-        self.system_prompt = self.replace_placeholders(self.prompt_template, all_variables)
+        self.prompt_segments = [
+            self.replace_placeholders(segment, variables)
+            for segment in self.prompt_template.split(HISTORY_PLACEHOLDER)
+        ]
+        self.compiled_from = self.compiled_key()
+
+    def build_system_prompt(self, history: str) -> str:
+        """
+        Build the system prompt from the compiled template and a formatted history.
+
+        Args:
+            history (str): The formatted conversation history.
+
+        Returns:
+            str: The system prompt.
+        """
+        if self.compiled_from != self.compiled_key():
+            self.compile_prompt()
+        return history.join(self.prompt_segments)
+
+    def compiled_key(self) -> tuple:
+        """
+        Return what the prompt segments are compiled from, so that a template or custom
+        variables assigned or modified directly are compiled on the next request.
+        """
+        return self.prompt_template, dict(self.custom_variables), self.agent_descriptions
 
     @staticmethod
     def replace_placeholders(template: str, variables: TemplateVariables) -> str:
@@ -0,0 +1,161 @@
+from typing import List, Optional, Callable, Dict
+import re
+import zlib
+import numpy as np
+from multi_agent_orchestrator.utils.logger import Logger
+from multi_agent_orchestrator.types import ConversationMessage
+from multi_agent_orchestrator.agents import Agent
+from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
+
+EmbeddingFunction = Callable[[List[str]], np.ndarray]
+
+
+class HashedNgramEmbedder:
+    """
+    Local TF-IDF embedding of character n-grams, hashed into a fixed number of dimensions.
+
+    It needs no model nor network access. The IDF weights are learned from the agent
+    descriptions with fit, so that n-grams shared by every agent weigh less.
+    """
+    def __init__(self, dimensions: int = 4096, ngram_sizes: tuple[int, ...] = (3, 4)):
+        self.dimensions = dimensions
+        self.ngram_sizes = ngram_sizes
+        self.idf = np.ones(dimensions, dtype=np.float32)
+
+    def fit(self, documents: List[str]) -> None:
+        """Learn the IDF weights from the given documents."""
+        document_frequency = np.zeros(self.dimensions, dtype=np.float32)
+        for document in documents:
+            document_frequency[np.unique(self._hashes(document))] += 1
+        self.idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """Return one L2-normalized vector per text."""
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            np.add.at(vectors[row], self._hashes(text), 1.0)
+        vectors *= self.idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _hashes(self, text: str) -> np.ndarray:
+        # Words are padded so that their start and end make distinct n-grams
+        ngrams = [
+            padded[i:i + size]
+            for padded in (f' {word} ' for word in re.findall(r'\w+', text.lower()))
+            for size in self.ngram_sizes
+            for i in range(max(1, len(padded) - size + 1))
+        ]
+        return np.array([zlib.crc32(ngram.encode()) % self.dimensions for ngram in ngrams], dtype=np.int64)
+
+
+class EmbeddingClassifierOptions:
+    def __init__(self,
+                 fallback_classifier: Optional[Classifier] = None,
+                 embedding_function: Optional[EmbeddingFunction] = None,
+                 threshold: float = 0.15,
+                 margin: float = 0.05):
+        """
+        Args:
+            fallback_classifier: Classifier used when no agent is similar enough to the input.
+            embedding_function: Function returning one L2-normalized vector per text.
+                Defaults to a HashedNgramEmbedder fitted on the agent descriptions.
+            threshold: Minimum cosine similarity between the input and an agent
+                description to select the agent without the fallback classifier.
+            margin: Minimum difference between the similarities of the closest and the
+                second closest agents, so that ambiguous inputs go to the fallback classifier.
+        """
+        self.fallback_classifier = fallback_classifier
+        self.embedding_function = embedding_function
+        self.threshold = threshold
+        self.margin = margin
+
+
+class EmbeddingClassifier(Classifier):
+    """
+    Classifier that routes locally by comparing the input with the agent descriptions.
+
+    The agent descriptions are embedded once, when the agents are set. An input whose
+    cosine similarity with the closest agent clears the threshold, by the given margin over
+    the second closest agent, is routed to that agent without calling a model. Otherwise it
+    goes to the fallback classifier, if any.
+    """
+    def __init__(self, options: Optional[EmbeddingClassifierOptions] = None):
+        super().__init__()
+        options = options or EmbeddingClassifierOptions()
+        self.fallback_classifier = options.fallback_classifier
+        self.threshold = options.threshold
+        self.margin = options.margin
+        self.embedder = options.embedding_function or HashedNgramEmbedder()
+        self.agent_ids: List[str] = []
+        self.agent_vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def set_agents(self, agents: Dict[str, Agent]) -> None:
+        super().set_agents(agents)
+        if self.fallback_classifier:
+            self.fallback_classifier.set_agents(agents)
+        self.agent_ids = list(agents)
+        documents = [f"{agent.name} {agent.description}" for agent in agents.values()]
+        if isinstance(self.embedder, HashedNgramEmbedder):
+            self.embedder.fit(documents)
+        self.agent_vectors = self.embedder(documents) if documents else np.zeros((0, 0), dtype=np.float32)
+
+    def score(self, input_texts: List[str]) -> np.ndarray:
+        """
+        Return the cosine similarity of each input with each agent description.
+
+        Args:
+            input_texts (List[str]): The inputs to score.
+
+        Returns:
+            np.ndarray: A matrix of shape (len(input_texts), number of agents).
+        """
+        if not self.agent_ids or not input_texts:
+            return np.zeros((len(input_texts), len(self.agent_ids)), dtype=np.float32)
+        return self.embedder(input_texts) @ self.agent_vectors.T
+
+    async def process_request(self,
+                              input_text: str,
+                              chat_history: List[ConversationMessage]) -> ClassifierResult:
+        scores = self.score([input_text])[0]
+        if scores.size:
+            best = int(np.argmax(scores))
+            runner_up = float(np.partition(scores, -2)[-2]) if scores.size > 1 else 0.0
+            if scores[best] >= self.threshold and scores[best] - runner_up >= self.margin:
+                return ClassifierResult(selected_agent=self.agents[self.agent_ids[best]],
+                                        confidence=float(scores[best]))
+
+        if self.fallback_classifier:
+            Logger.debug("> No agent similar enough to the input, using the fallback classifier")
+            return await self.fallback_classifier.classify(input_text, chat_history)
+        return ClassifierResult(selected_agent=None, confidence=0.0)
+
+    async def classify_candidates(self,
+                                  input_text: str,
+                                  chat_history: List[ConversationMessage],
+                                  max_candidates: int) -> List[ClassifierResult]:
+        """
+        Return the closest agent alone when it clears the threshold and the margin,
+        else every agent clearing the threshold, by decreasing similarity.
+
+        Cosine similarities are not on the scale of the confidences of the LLM classifiers,
+        so the confidence of a candidate is its share of the similarity of the candidates:
+        1.0 for an agent returned alone, 0.5 for two equally close agents.
+        """
+        scores = self.score([input_text])[0]
+        ranked = [int(index) for index in np.argsort(-scores, kind='stable')
+                  if scores[index] >= self.threshold]
+        if len(ranked) > 1 and scores[ranked[0]] - scores[ranked[1]] >= self.margin:
+            ranked = ranked[:1]
+        ranked = ranked[:max_candidates]
+        if ranked:
+            total = float(sum(scores[index] for index in ranked))
+            return [ClassifierResult(selected_agent=self.agents[self.agent_ids[index]],
+                                     confidence=float(scores[index]) / total if total > 0 else 1.0 / len(ranked))
+                    for index in ranked]
+
+        if self.fallback_classifier:
+            Logger.debug("> No agent similar enough to the input, using the fallback classifier")
+            return await self.fallback_classifier.classify_candidates(input_text, chat_history, max_candidates)
+        return []
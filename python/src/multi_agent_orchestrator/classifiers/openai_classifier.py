@@ -1,8 +1,9 @@
 import json
 from typing import List, Optional, Dict, Any
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from multi_agent_orchestrator.utils.helpers import is_tool_input
 from multi_agent_orchestrator.utils.logger import Logger
+from multi_agent_orchestrator.utils.http_clients import get_default_http_client
 from multi_agent_orchestrator.types import ConversationMessage
 from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
 import logging
@@ -14,19 +15,29 @@ class OpenAIClassifierOptions:
     def __init__(self,
                  api_key: str,
                  model_id: Optional[str] = None,
-                 inference_config: Optional[Dict[str, Any]] = None):
+                 inference_config: Optional[Dict[str, Any]] = None,
+                 client: Optional[AsyncOpenAI] = None,
+                 http_client: Optional[Any] = None):
         self.api_key = api_key
         self.model_id = model_id
         self.inference_config = inference_config or {}
+        # AsyncOpenAI client, which can be shared with the OpenAI agents
+        self.client = client
+        # httpx.AsyncClient of the default client. If not set, the OpenAI agents and classifiers
+        # share one connection pool per event loop
+        self.http_client = http_client
 
 class OpenAIClassifier(Classifier):
     def __init__(self, options: OpenAIClassifierOptions):
         super().__init__()
 
-        if not options.api_key:
+        if not options.api_key and not options.client:
             raise ValueError("OpenAI API key is required")
 
-        self.client = OpenAI(api_key=options.api_key)
+        self.client = options.client or AsyncOpenAI(
+            api_key=options.api_key,
+            http_client=options.http_client or get_default_http_client('openai', DefaultAsyncHttpxClient)
+        )
         self.model_id = options.model_id or OPENAI_MODEL_ID_GPT_O_MINI
 
         default_max_tokens = 1000
@@ -76,7 +87,7 @@ class OpenAIClassifier(Classifier):
         ]
 
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model=self.model_id,
                 messages=messages,
                 max_tokens=self.inference_config['max_tokens'],
@@ -1,17 +1,24 @@
-from typing import Any, AsyncIterable
-from dataclasses import dataclass, fields, asdict, replace
+from typing import Any, AsyncIterable, AsyncIterator, Iterable
+from collections import OrderedDict
+from collections.abc import Sized
+from contextvars import ContextVar
+from dataclasses import dataclass, field, fields, asdict, replace
+import asyncio
 import time
 from multi_agent_orchestrator.utils.logger import Logger
 from multi_agent_orchestrator.types import (ConversationMessage,
                                             ParticipantRole,
                                             OrchestratorConfig,
                                             TimestampedMessage)
-from multi_agent_orchestrator.classifiers import Classifier,ClassifierResult
+from multi_agent_orchestrator.classifiers import (Classifier,
+                                                  ClassifierResult,
+                                                  ClassificationCache,
+                                                  classifier_session)
 from multi_agent_orchestrator.agents import (Agent,
                                              AgentStreamResponse,
                                              AgentResponse,
                                              AgentProcessingResult)
-from multi_agent_orchestrator.storage import ChatStorage
+from multi_agent_orchestrator.storage import ChatStorage, SessionSnapshot
 from multi_agent_orchestrator.storage import InMemoryChatStorage
 try:
     from multi_agent_orchestrator.classifiers import BedrockClassifier, BedrockClassifierOptions
@@ -19,8 +26,85 @@ try:
 except ImportError:
     _BEDROCK_AVAILABLE = False
 
+class ProviderLimits:
+    """Semaphores bounding the concurrent calls to each provider during a batch."""
+    def __init__(self, limits: int | dict[str, int] | None):
+        self.limits = limits
+        self.semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def get_semaphore(self, provider: str) -> asyncio.Semaphore | None:
+        limit = self.limits.get(provider) if isinstance(self.limits, dict) else self.limits
+        if not limit:
+            return None
+        if provider not in self.semaphores:
+            self.semaphores[provider] = asyncio.Semaphore(limit)
+        return self.semaphores[provider]
+
+# Set by route_requests_batch for the tasks routing its requests
+_provider_limits: ContextVar[ProviderLimits | None] = ContextVar('provider_limits', default=None)
+# Execution times of the request routed by a task of route_requests_batch
+_request_execution_times: ContextVar[dict[str, float] | None] = ContextVar('request_execution_times', default=None)
+
+
+@dataclass
+class BatchProgress:
+    """
+    Progress of a batch of requests.
+
+    Attributes:
+        total: Number of requests of the batch, None if the iterable has no length
+        completed: Number of requests routed, including the failed ones
+        failed: Number of requests that raised an error
+        in_flight: Number of requests being routed
+        elapsed: Time in seconds since the batch started
+    """
+    total: int | None
+    completed: int = 0
+    failed: int = 0
+    in_flight: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Completed requests per second."""
+        return self.completed / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class BatchRouteResult:
+    """
+    Result of one request of a batch.
+
+    Attributes:
+        index: Position of the request in the batch
+        user_input: The user input
+        user_id: The user ID
+        session_id: The session ID
+        response: The agent response, None if routing the request failed
+        error: The error raised by the classifier, the agent or the storage, if any
+        latency: Time in seconds spent routing the request, without waiting for the previous turn
+        progress: Progress of the batch when the request completed
+        execution_times: Execution times of the request, when LOG_EXECUTION_TIMES is enabled
+    """
+    index: int
+    user_input: str
+    user_id: str
+    session_id: str
+    response: AgentResponse | None
+    error: Exception | None
+    latency: float
+    progress: BatchProgress
+    execution_times: dict[str, float] = field(default_factory=dict)
+
+
 @dataclass
 class MultiAgentOrchestrator:
+    # Upper bound on the number of sessions for which the last selected agent
+    # is remembered when PREFETCH_AGENT_HISTORY is enabled.
+    MAX_TRACKED_SESSIONS = 10000
+    # Class name prefixes of the agents and classifiers of each provider
+    PROVIDER_PREFIXES = ('Bedrock', 'Anthropic', 'OpenAI', 'Lambda', 'Lex', 'Comprehend')
+
     def __init__(self,
                  options: OrchestratorConfig | None = None,
                  storage: ChatStorage | None = None,
@@ -56,10 +140,35 @@ class MultiAgentOrchestrator:
         else:
             raise ValueError("No classifier provided and BedrockClassifier is not available. Please provide a classifier.")
 
-        self.execution_times: dict[str, float] = {}
+        self._execution_times: dict[str, float] = {}
         self.default_agent: Agent = default_agent
+        self.last_selected_agents: OrderedDict[str, str] = OrderedDict()
+        self.pending_writes: set[asyncio.Task] = set()
+        self.classification_cache: ClassificationCache | None = None
+        if self.config.CLASSIFICATION_CACHE_SIZE or self.config.STICKY_AGENT_MAX_WORDS:
+            self.classification_cache = ClassificationCache(
+                max_size=self.config.CLASSIFICATION_CACHE_SIZE,
+                ttl=self.config.CLASSIFICATION_CACHE_TTL,
+                sticky_max_words=self.config.STICKY_AGENT_MAX_WORDS
+            )
 
 
+    @property
+    def execution_times(self) -> dict[str, float]:
+        """
+        The execution times of the last request routed. Concurrent route_request calls share
+        them; route_requests_batch keeps the times of each request in its result instead.
+        """
+        execution_times = _request_execution_times.get()
+        return execution_times if execution_times is not None else self._execution_times
+
+    @execution_times.setter
+    def execution_times(self, execution_times: dict[str, float]) -> None:
+        if _request_execution_times.get() is not None:
+            _request_execution_times.set(execution_times)
+        else:
+            self._execution_times = execution_times
+
     def add_agent(self, agent: Agent):
         if agent.id in self.agents:
             raise ValueError(f"An agent with ID '{agent.id}' already exists.")
@@ -85,38 +194,91 @@ class MultiAgentOrchestrator:
         session_id = params['session_id']
         classifier_result:ClassifierResult = params['classifier_result']
         additional_params = params.get('additional_params', {})
+        session_snapshot: SessionSnapshot | None = params.get('session_snapshot')
 
         if not classifier_result.selected_agent:
             return "I'm sorry, but I need more information to understand your request. \
                 Could you please be more specific?"
 
         selected_agent = classifier_result.selected_agent
-        agent_chat_history = await self.storage.fetch_chat(user_id, session_id, selected_agent.id)
+        agent_chat_history = params.get('agent_chat_history')
+        if agent_chat_history is None and session_snapshot is not None:
+            agent_chat_history = session_snapshot.agent_chat(selected_agent.id)
+        if agent_chat_history is None:
+            agent_chat_history = await self.storage.fetch_chat(user_id, session_id, selected_agent.id)
 
         self.logger.print_chat_history(agent_chat_history, selected_agent.id)
 
-        response = await self.measure_execution_time(
-            f"Agent {selected_agent.name} | Processing request",
-            lambda: selected_agent.process_request(user_input,
-                                                   user_id,
-                                                   session_id,
-                                                   agent_chat_history,
-                                                   additional_params)
-        )
+        semaphore = self.get_provider_semaphore(selected_agent)
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            response = await self.measure_execution_time(
+                f"Agent {selected_agent.name} | Processing request",
+                lambda: selected_agent.process_request(user_input,
+                                                       user_id,
+                                                       session_id,
+                                                       agent_chat_history,
+                                                       additional_params)
+            )
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
 
+        if semaphore is not None:
+            if isinstance(response, AsyncIterable):
+                # The provider is busy until the stream is read
+                return self._release_after_stream(response, semaphore)
+            semaphore.release()
         return response
 
+    @staticmethod
+    async def _release_after_stream(stream: AsyncIterable[Any],
+                                    semaphore: asyncio.Semaphore) -> AsyncIterator[Any]:
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            semaphore.release()
+
+    def get_provider(self, component: Agent | Classifier) -> str:
+        """
+        Return the provider of an agent or a classifier, such as 'bedrock', whose
+        calls share the concurrency limit of route_requests_batch.
+        Override this method to group the agents differently.
+        """
+        for cls in type(component).__mro__:
+            for prefix in self.PROVIDER_PREFIXES:
+                if cls.__name__.startswith(prefix):
+                    return prefix.lower()
+        return type(component).__name__
+
+    def get_provider_semaphore(self, component: Agent | Classifier) -> asyncio.Semaphore | None:
+        """Return the semaphore limiting the calls to the provider of a component in the current batch, if any."""
+        limits = _provider_limits.get()
+        if limits is None:
+            return None
+        return limits.get_semaphore(self.get_provider(component))
+
+    async def call_provider(self, component: Agent | Classifier, fn, *args):
+        """Await fn(*args) within the concurrency limit of the provider of the component."""
+        semaphore = self.get_provider_semaphore(component)
+        if semaphore is None:
+            return await fn(*args)
+        async with semaphore:
+            return await fn(*args)
+
     async def classify_request(self,
                              user_input: str,
                              user_id: str,
-                             session_id: str) -> ClassifierResult:
+                             session_id: str,
+                             session_snapshot: SessionSnapshot | None = None) -> ClassifierResult:
         """Classify user request with conversation history."""
         try:
-            chat_history = await self.storage.fetch_all_chats(user_id, session_id) or []
-            classifier_result = await self.measure_execution_time(
-                "Classifying user intent",
-                lambda: self.classifier.classify(user_input, chat_history)
-            )
+            chat_history = await self.fetch_classifier_history(user_id, session_id, session_snapshot)
+            with classifier_session((user_id, session_id)):
+                classifier_result = await self.run_classifier(user_input, chat_history)
 
             if self.config.LOG_CLASSIFIER_OUTPUT:
                 self.print_intent(user_input, classifier_result)
@@ -132,13 +294,255 @@ class MultiAgentOrchestrator:
             self.logger.error(f"Error during intent classification: {str(error)}")
             raise error
 
+    async def classify_request_candidates(self,
+                                          user_input: str,
+                                          user_id: str,
+                                          session_id: str,
+                                          session_snapshot: SessionSnapshot | None = None
+    ) -> list[ClassifierResult]:
+        """Rank up to SPECULATIVE_TOP_K agents for the user request, the most likely first."""
+        try:
+            chat_history = await self.fetch_classifier_history(user_id, session_id, session_snapshot)
+            with classifier_session((user_id, session_id)):
+                candidates = await self.measure_execution_time(
+                    "Classifying user intent",
+                    lambda: self.call_provider(self.classifier,
+                                               self.classifier.classify_candidates,
+                                               user_input,
+                                               chat_history,
+                                               self.config.SPECULATIVE_TOP_K)
+                )
+            candidates = [candidate for candidate in candidates
+                          if candidate.selected_agent][:self.config.SPECULATIVE_TOP_K]
+
+            if self.config.LOG_CLASSIFIER_OUTPUT:
+                for candidate in candidates:
+                    self.print_intent(user_input, candidate)
+
+            if not candidates:
+                if self.config.USE_DEFAULT_AGENT_IF_NONE_IDENTIFIED and self.default_agent:
+                    candidates = [self.get_fallback_result()]
+                    self.logger.info("Using default agent as no agent was selected")
+
+            return candidates
+
+        except Exception as error:
+            self.logger.error(f"Error during intent classification: {str(error)}")
+            raise error
+
+    def should_speculate(self, candidates: list[ClassifierResult]) -> bool:
+        """Whether to dispatch the request to every candidate, because the best one is uncertain."""
+        return len(candidates) > 1 \
+            and candidates[0].confidence < self.config.SPECULATIVE_CONFIDENCE_THRESHOLD
+
+    async def speculative_process_request(self,
+                                          user_input: str,
+                                          user_id: str,
+                                          session_id: str,
+                                          candidates: list[ClassifierResult],
+                                          additional_params: dict[str, str] = {},
+                                          session_snapshot: SessionSnapshot | None = None
+    ) -> AgentResponse:
+        """
+        Dispatch the request to the candidate agents concurrently and keep one response.
+
+        Without SPECULATIVE_SCORER, the first response wins. With a scorer, the first response
+        scoring at least SPECULATIVE_MIN_SCORE wins, else the best scored response once all
+        candidates answered, ties going to the most likely agent. The other candidates are
+        cancelled, and only the winning agent saves the turn.
+
+        The latency of each candidate, and its cost as the agent time it used and the
+        size of its response, are reported in the candidates of the metadata.
+        Streaming agents are read to the end, so the response is never streamed.
+        """
+        start_time = time.time()
+        reports = [{
+            'agent_id': candidate.selected_agent.id,
+            'agent_name': candidate.selected_agent.name,
+            'confidence': candidate.confidence,
+            'status': 'running',
+            'latency': None,
+            'output_chars': 0,
+            'score': None,
+        } for candidate in candidates]
+
+        async def run_candidate(candidate: ClassifierResult) -> ConversationMessage:
+            response = await self.dispatch_to_agent({
+                "user_input": user_input,
+                "user_id": user_id,
+                "session_id": session_id,
+                "classifier_result": candidate,
+                "additional_params": additional_params,
+                "session_snapshot": session_snapshot
+            })
+            if isinstance(response, AsyncIterable):
+                response = await self._read_agent_stream(response)
+            return response
+
+        tasks = {asyncio.create_task(run_candidate(candidate)): index
+                 for index, candidate in enumerate(candidates)}
+        pending = set(tasks)
+        winner: tuple[int, ConversationMessage] | None = None
+        best: tuple[float, int, ConversationMessage] | None = None
+        errors: list[Exception] = []
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=tasks.get):
+                    index = tasks[task]
+                    report = reports[index]
+                    report['latency'] = time.time() - start_time
+                    error = asyncio.CancelledError() if task.cancelled() else task.exception()
+                    if error:
+                        report['status'] = 'failed'
+                        errors.append(error)
+                        self.logger.warn(f"Candidate agent {report['agent_name']} failed: {str(error)}")
+                        continue
+
+                    message = task.result()
+                    report['status'] = 'completed'
+                    report['output_chars'] = len(ClassificationCache.message_text(message))
+                    scorer = self.config.SPECULATIVE_SCORER
+                    if scorer is None:
+                        winner = winner or (index, message)
+                        continue
+                    score = report['score'] = scorer(candidates[index], message)
+                    min_score = self.config.SPECULATIVE_MIN_SCORE
+                    if winner is None and min_score is not None and score >= min_score:
+                        winner = (index, message)
+                    if best is None or (score, -index) > (best[0], -best[1]):
+                        best = (score, index, message)
+        finally:
+            for task in pending:
+                task.cancel()
+                reports[tasks[task]]['status'] = 'cancelled'
+                reports[tasks[task]]['latency'] = time.time() - start_time
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None and best is not None:
+            winner = (best[1], best[2])
+        if winner is None:
+            raise errors[0]
+
+        index, final_response = winner
+        reports[index]['status'] = 'selected'
+        classifier_result = candidates[index]
+        selected_agent = classifier_result.selected_agent
+        if self.config.LOG_EXECUTION_TIMES:
+            self.execution_times["Speculative routing | Winner latency"] = reports[index]['latency']
+
+        if self.config.PREFETCH_AGENT_HISTORY:
+            self.remember_selected_agent(user_id, session_id, selected_agent)
+
+        user_message = ConversationMessage(
+            role=ParticipantRole.USER.value,
+            content=[{'text': user_input}]
+        )
+        if self.config.WRITE_BEHIND_MESSAGES:
+            await self.end_turn(final_response, [user_message], user_id, session_id,
+                                selected_agent, session_snapshot)
+        else:
+            await self.save_message(user_message, user_id, session_id, selected_agent, session_snapshot)
+            await self.end_turn(final_response, None, user_id, session_id,
+                                selected_agent, session_snapshot)
+
+        metadata = self.create_metadata(classifier_result,
+                                        user_input,
+                                        user_id,
+                                        session_id,
+                                        additional_params)
+        metadata.candidates = reports
+        return AgentResponse(
+            metadata=metadata,
+            output=final_response,
+            streaming=False
+        )
+
+    @staticmethod
+    async def _read_agent_stream(stream: AsyncIterable[Any]) -> ConversationMessage:
+        """Read a streamed agent response to the end and return the complete message."""
+        chunks = []
+        final_message = None
+        async for chunk in stream:
+            if isinstance(chunk, AgentStreamResponse):
+                if chunk.final_message:
+                    final_message = chunk.final_message
+                elif chunk.text:
+                    chunks.append(chunk.text)
+        return final_message or ConversationMessage(
+            role=ParticipantRole.ASSISTANT.value,
+            content=[{'text': ''.join(chunks)}]
+        )
+
+    async def fetch_classifier_history(self,
+                                       user_id: str,
+                                       session_id: str,
+                                       session_snapshot: SessionSnapshot | None = None
+    ) -> list[ConversationMessage]:
+        """Fetch the window of the session history configured for the classifier."""
+        # A turn is a user message and its response
+        max_messages = 2 * self.config.CLASSIFIER_HISTORY_MAX_TURNS or None
+        max_messages_per_agent = self.config.CLASSIFIER_HISTORY_MAX_MESSAGES_PER_AGENT or None
+        if session_snapshot is not None:
+            chat_history = session_snapshot.all_chats(max_messages, max_messages_per_agent)
+        elif max_messages or max_messages_per_agent:
+            chat_history = await self.storage.fetch_recent_chats(user_id,
+                                                                 session_id,
+                                                                 max_messages,
+                                                                 max_messages_per_agent) or []
+        else:
+            chat_history = await self.storage.fetch_all_chats(user_id, session_id) or []
+
+        max_chars = self.config.CLASSIFIER_HISTORY_MAX_CHARS
+        if max_chars:
+            # Keep the most recent messages whose text fits in the budget
+            total_chars = 0
+            for start in range(len(chat_history) - 1, -1, -1):
+                total_chars += len(ClassificationCache.message_text(chat_history[start]))
+                if total_chars > max_chars:
+                    return chat_history[start + 1:]
+        return chat_history
+
+    async def run_classifier(self,
+                             user_input: str,
+                             chat_history: list[ConversationMessage]) -> ClassifierResult:
+        """Classify the input, unless the classification cache already has the result."""
+        cache = self.classification_cache
+        if cache is None:
+            return await self.measure_execution_time(
+                "Classifying user intent",
+                lambda: self.call_provider(self.classifier, self.classifier.classify, user_input, chat_history)
+            )
+
+        start_time = time.time()
+        timer_name = "Classifying user intent | Sticky agent"
+        classifier_result = cache.get_sticky_result(user_input, chat_history, self.agents)
+        if classifier_result is None:
+            timer_name = "Classifying user intent | Cache hit"
+            key = cache.make_key(user_input, chat_history, self.agents)
+            classifier_result = cache.get(key)
+        if classifier_result is not None:
+            if self.config.LOG_EXECUTION_TIMES:
+                self.execution_times[timer_name] = time.time() - start_time
+            return classifier_result
+
+        classifier_result = await self.measure_execution_time(
+            "Classifying user intent",
+            lambda: self.call_provider(self.classifier, self.classifier.classify, user_input, chat_history)
+        )
+        if classifier_result.selected_agent:
+            cache.put(key, classifier_result)
+        return classifier_result
+
     async def agent_process_request(self,
                                user_input: str,
                                user_id: str,
                                session_id: str,
                                classifier_result: ClassifierResult,
                                additional_params: dict[str, str] = {},
-                               stream_response: bool | None = False # wether to stream back the response from the agent
+                               stream_response: bool | None = False, # wether to stream back the response from the agent
+                               agent_chat_history: list[ConversationMessage] | None = None, # already fetched history, if any
+                               session_snapshot: SessionSnapshot | None = None # session loaded once for this request
     ) -> AgentResponse:
         """Process agent response and handle chat storage."""
         try:
@@ -147,7 +551,9 @@ class MultiAgentOrchestrator:
                 "user_id": user_id,
                 "session_id": session_id,
                 "classifier_result": classifier_result,
-                "additional_params": additional_params
+                "additional_params": additional_params,
+                "agent_chat_history": agent_chat_history,
+                "session_snapshot": session_snapshot
             })
 
             metadata = self.create_metadata(classifier_result,
@@ -156,15 +562,20 @@ class MultiAgentOrchestrator:
                                         session_id,
                                         additional_params)
 
-            await self.save_message(
-                ConversationMessage(
-                    role=ParticipantRole.USER.value,
-                    content=[{'text': user_input}]
-                ),
-                user_id,
-                session_id,
-                classifier_result.selected_agent
+            user_message = ConversationMessage(
+                role=ParticipantRole.USER.value,
+                content=[{'text': user_input}]
             )
+            # With write-behind, the messages of the turn are buffered and saved at once
+            turn_messages: list[ConversationMessage] | None = None
+            if self.config.WRITE_BEHIND_MESSAGES:
+                turn_messages = [user_message]
+            else:
+                await self.save_message(user_message,
+                                        user_id,
+                                        session_id,
+                                        classifier_result.selected_agent,
+                                        session_snapshot)
 
             final_response = None
             if classifier_result.selected_agent.is_streaming_enabled():
@@ -182,11 +593,12 @@ class MultiAgentOrchestrator:
                                     Logger.error("Invalid response type from agent. Expected AgentStreamResponse")
                                     pass
 
-                            if full_message:
-                                await self.save_message(full_message,
-                                                    user_id,
-                                                    session_id,
-                                                    classifier_result.selected_agent)
+                            await self.end_turn(full_message,
+                                                turn_messages,
+                                                user_id,
+                                                session_id,
+                                                classifier_result.selected_agent,
+                                                session_snapshot)
 
 
                         final_response = process_stream()
@@ -201,21 +613,24 @@ class MultiAgentOrchestrator:
                                 Logger.error("Invalid response type from agent. Expected AgentStreamResponse")
                                 pass
 
-                        if full_message:
-                            await self.save_message(full_message,
+                        await self.end_turn(full_message,
+                                            turn_messages,
                                             user_id,
                                             session_id,
-                                            classifier_result.selected_agent)
+                                            classifier_result.selected_agent,
+                                            session_snapshot)
                         return full_message
                     final_response = await process_stream()
 
 
             else:  # Non-streaming response
                 final_response = agent_response
-                await self.save_message(final_response,
-                                        user_id,
-                                        session_id,
-                                        classifier_result.selected_agent)
+                await self.end_turn(final_response,
+                                    turn_messages,
+                                    user_id,
+                                    session_id,
+                                    classifier_result.selected_agent,
+                                    session_snapshot)
 
             return AgentResponse(
                 metadata=metadata,
@@ -234,10 +649,61 @@ class MultiAgentOrchestrator:
                        additional_params: dict[str, str] = {},
                        stream_response: bool | None = False) -> AgentResponse:
         """Route user request to appropriate agent."""
+        try:
+            return await self._route_request(user_input,
+                                             user_id,
+                                             session_id,
+                                             additional_params,
+                                             stream_response)
+
+        except Exception as error:
+            return AgentResponse(
+                metadata=self.create_metadata(None, user_input, user_id, session_id, additional_params),
+                output=self.config.GENERAL_ROUTING_ERROR_MSG_MESSAGE or str(error),
+                streaming=False
+            )
+
+    async def _route_request(self,
+                             user_input: str,
+                             user_id: str,
+                             session_id: str,
+                             additional_params: dict[str, str],
+                             stream_response: bool | None) -> AgentResponse:
+        """Route user request to appropriate agent, raising the routing errors."""
         self.execution_times.clear()
+        prefetches: dict[str, asyncio.Task] = {}
+        session_snapshot: SessionSnapshot | None = None
 
         try:
-            classifier_result = await self.classify_request(user_input, user_id, session_id)
+            if self.config.USE_SESSION_SNAPSHOT:
+                session_snapshot = await self.measure_execution_time(
+                    "Loading session",
+                    lambda: self.storage.fetch_session(user_id, session_id)
+                )
+
+            # A session snapshot already holds every agent history, nothing to prefetch
+            if self.config.PREFETCH_AGENT_HISTORY and session_snapshot is None:
+                prefetches = self.start_history_prefetch(user_id, session_id)
+
+            if self.config.SPECULATIVE_TOP_K > 1:
+                candidates = await self.classify_request_candidates(user_input,
+                                                                    user_id,
+                                                                    session_id,
+                                                                    session_snapshot)
+                if self.should_speculate(candidates):
+                    return await self.speculative_process_request(user_input,
+                                                                  user_id,
+                                                                  session_id,
+                                                                  candidates,
+                                                                  additional_params,
+                                                                  session_snapshot)
+                classifier_result = candidates[0] if candidates \
+                    else ClassifierResult(selected_agent=None, confidence=0.0)
+            else:
+                classifier_result = await self.classify_request(user_input,
+                                                                user_id,
+                                                                session_id,
+                                                                session_snapshot)
 
             if not classifier_result.selected_agent:
                 return AgentResponse(
@@ -249,25 +715,195 @@ class MultiAgentOrchestrator:
                     streaming=False
                 )
 
+            agent_chat_history = None
+            if self.config.PREFETCH_AGENT_HISTORY:
+                self.remember_selected_agent(user_id, session_id, classifier_result.selected_agent)
+                agent_chat_history = await self.resolve_history_prefetch(
+                    prefetches,
+                    classifier_result.selected_agent
+                )
+
             return await self.agent_process_request(
                 user_input,
                 user_id,
                 session_id,
                 classifier_result,
                 additional_params,
-                stream_response
-            )
-
-        except Exception as error:
-            return AgentResponse(
-                metadata=self.create_metadata(None, user_input, user_id, session_id, additional_params),
-                output=self.config.GENERAL_ROUTING_ERROR_MSG_MESSAGE or str(error),
-                streaming=False
+                stream_response,
+                agent_chat_history,
+                session_snapshot
             )
 
         finally:
+            self._discard_prefetches(prefetches)
             self.logger.print_execution_times(self.execution_times)
 
+    async def route_requests_batch(self,
+                                   requests: Iterable[tuple[str, str, str]],
+                                   max_concurrency: int = 10,
+                                   max_concurrency_per_provider: int | dict[str, int] | None = None,
+                                   additional_params: dict[str, str] | None = None
+    ) -> AsyncIterator[BatchRouteResult]:
+        """
+        Route many requests, such as replayed transcripts, with bounded concurrency.
+
+        Requests of different sessions are routed concurrently, while the turns of a session
+        are routed one after the other, in order. The requests are read from the iterable as
+        they are scheduled, and responses of streaming agents are read to the end.
+
+        Args:
+            requests: (user_input, user_id, session_id) tuples.
+            max_concurrency: Maximum number of requests routed at the same time.
+            max_concurrency_per_provider: Maximum number of concurrent classifier and agent
+                calls per provider (see get_provider), either for every provider or by provider
+                name. Providers missing from the dict are not limited.
+            additional_params: Additional parameters passed with every request.
+
+        Yields:
+            BatchRouteResult: The result of each request, as soon as it completes.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        limits = ProviderLimits(max_concurrency_per_provider)
+        progress = BatchProgress(total=len(requests) if isinstance(requests, Sized) else None)
+        start_time = time.time()
+        concurrency = asyncio.Semaphore(max_concurrency)
+        # Bounds the requests read ahead of the results, so that large batches are not loaded at once
+        read_ahead = asyncio.Semaphore(4 * max_concurrency)
+        results: asyncio.Queue[BatchRouteResult | None] = asyncio.Queue()
+        last_turns: dict[str, asyncio.Task] = {}
+        tasks: set[asyncio.Task] = set()
+
+        async def route(index: int, user_input: str, user_id: str, session_id: str,
+                        previous_turn: asyncio.Task | None) -> None:
+            if previous_turn is not None:
+                await asyncio.wait([previous_turn])
+            # Each request runs in its own task, so these are not seen by the other requests
+            _provider_limits.set(limits)
+            _request_execution_times.set({})
+            response, error = None, None
+            async with concurrency:
+                progress.in_flight += 1
+                request_start = time.time()
+                try:
+                    response = await self._route_request(user_input,
+                                                         user_id,
+                                                         session_id,
+                                                         dict(additional_params or {}),
+                                                         stream_response=False)
+                except Exception as routing_error:
+                    self.logger.error(f"Error routing request {index} of the batch: {str(routing_error)}")
+                    error = routing_error
+                latency = time.time() - request_start
+                progress.in_flight -= 1
+
+            progress.completed += 1
+            if error is not None:
+                progress.failed += 1
+            progress.elapsed = time.time() - start_time
+            results.put_nowait(BatchRouteResult(index, user_input, user_id, session_id,
+                                                response, error, latency, replace(progress),
+                                                _request_execution_times.get()))
+
+        def on_done(task: asyncio.Task, key: str) -> None:
+            tasks.discard(task)
+            if last_turns.get(key) is task:
+                del last_turns[key]
+
+        async def schedule() -> None:
+            try:
+                for index, (user_input, user_id, session_id) in enumerate(requests):
+                    await read_ahead.acquire()
+                    key = self._session_key(user_id, session_id)
+                    task = asyncio.create_task(route(index, user_input, user_id, session_id, last_turns.get(key)))
+                    last_turns[key] = task
+                    tasks.add(task)
+                    task.add_done_callback(lambda done, key=key: on_done(done, key))
+                if tasks:
+                    await asyncio.wait(list(tasks))
+            finally:
+                results.put_nowait(None)
+
+        scheduler = asyncio.create_task(schedule())
+        try:
+            while (result := await results.get()) is not None:
+                read_ahead.release()
+                yield result
+            await scheduler
+        finally:
+            scheduler.cancel()
+            for task in list(tasks):
+                task.cancel()
+            await asyncio.gather(scheduler, *tasks, return_exceptions=True)
+
+    def get_prefetch_candidates(self, user_id: str, session_id: str) -> list[Agent]:
+        """Return the agents whose history is worth fetching while classification runs."""
+        agent_id = self.last_selected_agents.get(self._session_key(user_id, session_id))
+        agent = self.agents.get(agent_id) if agent_id else None
+        return [agent] if agent else []
+
+    def remember_selected_agent(self, user_id: str, session_id: str, agent: Agent | None) -> None:
+        """Record the agent selected for a session so the next turn can prefetch its history."""
+        if not agent:
+            return
+        key = self._session_key(user_id, session_id)
+        self.last_selected_agents[key] = agent.id
+        self.last_selected_agents.move_to_end(key)
+        while len(self.last_selected_agents) > self.MAX_TRACKED_SESSIONS:
+            self.last_selected_agents.popitem(last=False)
+
+    def start_history_prefetch(self, user_id: str, session_id: str) -> dict[str, asyncio.Task]:
+        """Start fetching the chat history of likely agents in the background."""
+        async def fetch(agent_id: str) -> tuple[list[ConversationMessage], float, float]:
+            start_time = time.time()
+            history = await self.storage.fetch_chat(user_id, session_id, agent_id)
+            return history, start_time, time.time()
+
+        return {
+            agent.id: asyncio.create_task(fetch(agent.id))
+            for agent in self.get_prefetch_candidates(user_id, session_id)
+            if agent.save_chat
+        }
+
+    async def resolve_history_prefetch(self,
+                                       prefetches: dict[str, asyncio.Task],
+                                       selected_agent: Agent) -> list[ConversationMessage] | None:
+        """
+        Return the prefetched history of the selected agent and cancel the other fetches.
+        Returns None when the history was not prefetched, so it is fetched as usual.
+        """
+        task = prefetches.pop(selected_agent.id, None)
+        for other in prefetches.values():
+            other.cancel()
+
+        if task is None:
+            return None
+
+        awaited_at = time.time()
+        try:
+            history, start_time, end_time = await task
+        except Exception as error:
+            self.logger.warn(f"Agent history prefetch failed, fetching again: {str(error)}")
+            return None
+
+        if self.config.LOG_EXECUTION_TIMES:
+            self.execution_times["Agent history prefetch | Latency saved"] = \
+                max(0.0, min(end_time, awaited_at) - start_time)
+        return history
+
+    @staticmethod
+    def _discard_prefetches(prefetches: dict[str, asyncio.Task]) -> None:
+        for task in prefetches.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # mark as retrieved so asyncio does not log it
+
+    @staticmethod
+    def _session_key(user_id: str, session_id: str) -> str:
+        return f"{user_id}#{session_id}"
+
 
     def print_intent(self, user_input: str, intent_classifier_result: ClassifierResult) -> None:
         """Print the classified intent."""
@@ -328,22 +964,75 @@ class MultiAgentOrchestrator:
     async def save_message(self,
                            message: ConversationMessage,
                            user_id: str, session_id: str,
-                           agent: Agent):
+                           agent: Agent,
+                           session_snapshot: SessionSnapshot | None = None):
         if agent and agent.save_chat:
-            return await self.storage.save_chat_message(user_id,
-                                                        session_id,
-                                                        agent.id,
-                                                        message,
-                                                        self.config.MAX_MESSAGE_PAIRS_PER_AGENT)
+            result = await self.storage.save_chat_message(user_id,
+                                                          session_id,
+                                                          agent.id,
+                                                          message,
+                                                          self.config.MAX_MESSAGE_PAIRS_PER_AGENT)
+            if session_snapshot is not None:
+                session_snapshot.append(agent.id, message, self.config.MAX_MESSAGE_PAIRS_PER_AGENT)
+            return result
     async def save_messages(self,
                            messages: list[ConversationMessage] | list[TimestampedMessage],
                            user_id: str, session_id: str,
-                           agent: Agent):
-        if agent and agent.save_chat:
-            for message in messages:
-                # TODO: change this to self.storage.save_chat_messages() when SupervisorAgent is merged
-                await self.storage.save_chat_message(user_id,
-                                                        session_id,
-                                                        agent.id,
-                                                        message,
-                                                        self.config.MAX_MESSAGE_PAIRS_PER_AGENT)
+                           agent: Agent,
+                           session_snapshot: SessionSnapshot | None = None):
+        if agent and agent.save_chat and messages:
+            result = await self.storage.save_chat_messages(user_id,
+                                                           session_id,
+                                                           agent.id,
+                                                           messages,
+                                                           self.config.MAX_MESSAGE_PAIRS_PER_AGENT)
+            if session_snapshot is not None:
+                for message in messages:
+                    session_snapshot.append(agent.id, message, self.config.MAX_MESSAGE_PAIRS_PER_AGENT)
+            return result
+
+    async def end_turn(self,
+                       response_message: ConversationMessage | None,
+                       turn_messages: list[ConversationMessage] | None,
+                       user_id: str, session_id: str,
+                       agent: Agent,
+                       session_snapshot: SessionSnapshot | None = None) -> None:
+        """
+        Save the agent response once it is complete.
+        With WRITE_BEHIND_MESSAGES, the buffered messages of the turn are flushed with a
+        single storage write, either awaited or in the background
+        depending on WAIT_FOR_MESSAGE_WRITES.
+        """
+        if turn_messages is None:
+            if response_message:
+                await self.save_message(response_message, user_id, session_id, agent, session_snapshot)
+            return
+
+        if response_message:
+            turn_messages.append(response_message)
+
+        write = self.save_messages(list(turn_messages), user_id, session_id, agent, session_snapshot)
+        turn_messages.clear()
+
+        if self.config.WAIT_FOR_MESSAGE_WRITES:
+            await write
+            return
+
+        task = asyncio.create_task(write)
+        self.pending_writes.add(task)
+        task.add_done_callback(self._on_write_done)
+
+    def _on_write_done(self, task: asyncio.Task) -> None:
+        self.pending_writes.discard(task)
+        if not task.cancelled() and task.exception():
+            self.logger.error(f"Error saving messages: {str(task.exception())}")
+
+    async def flush_pending_writes(self) -> None:
+        """
+        Wait for the messages still being written in the background.
+        Call this before shutting down when WAIT_FOR_MESSAGE_WRITES is disabled.
+        """
+        while self.pending_writes:
+            pending = list(self.pending_writes)
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.pending_writes.difference_update(pending)
@@ -1,14 +1,17 @@
 """
 Storage implementations for chat history.
 """
+from .session_snapshot import SessionSnapshot
 from .chat_storage import ChatStorage
 from .in_memory_chat_storage import InMemoryChatStorage
+from .tiered_chat_storage import TieredChatStorage
 
 _AWS_AVAILABLE = False
 _SQL_AVAILABLE = False
 
 try:
     from .dynamodb_chat_storage import DynamoDbChatStorage
+    from .dynamodb_append_only_chat_storage import DynamoDbAppendOnlyChatStorage
     _AWS_AVAILABLE = True
 except ImportError:
     _AWS_AVAILABLE = False
@@ -21,12 +24,15 @@ except ImportError:
 
 __all__ = [
     'ChatStorage',
+    'SessionSnapshot',
     'InMemoryChatStorage',
+    'TieredChatStorage',
 ]
 
 if _AWS_AVAILABLE:
     __all__.extend([
-        'DynamoDbChatStorage'
+        'DynamoDbChatStorage',
+        'DynamoDbAppendOnlyChatStorage'
     ])
 
 if _SQL_AVAILABLE:
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+import asyncio
 from typing import Optional, Union
 from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage
+from multi_agent_orchestrator.storage.session_snapshot import SessionSnapshot
 
 class ChatStorage(ABC):
     """Abstract base class representing the interface for an agent.
@@ -119,3 +121,76 @@ class ChatStorage(ABC):
         Returns:
             list[ConversationMessage]: All chat messages for the user and session.
         """
+
+    async def fetch_recent_chats(self,
+                                 user_id: str,
+                                 session_id: str,
+                                 max_messages: Optional[int] = None,
+                                 max_messages_per_agent: Optional[int] = None) -> list[ConversationMessage]:
+        """
+        Fetch the most recent chat messages of a session, as fetch_all_chats would.
+
+        Storages that can read only the requested window override this method. The default
+        implementation reads the whole session. Without fetch_session support, the limit
+        per agent is not applied, as fetch_all_chats does not tell the agent of user messages.
+
+        Args:
+            user_id (str): The user ID.
+            session_id (str): The session ID.
+            max_messages (Optional[int]): The maximum number of messages to fetch.
+            max_messages_per_agent (Optional[int]): The maximum number of messages of each agent.
+
+        Returns:
+            list[ConversationMessage]: The most recent chat messages, oldest first.
+        """
+        if max_messages_per_agent:
+            snapshot = await self.fetch_session(user_id, session_id)
+            if snapshot is not None:
+                return snapshot.all_chats(max_messages, max_messages_per_agent)
+        messages = await self.fetch_all_chats(user_id, session_id)
+        return messages[-max_messages:] if max_messages else messages
+
+    async def fetch_session(self,
+                            user_id: str,
+                            session_id: str) -> Optional[SessionSnapshot]:
+        """
+        Load every agent conversation of a session with a single storage read.
+
+        Storages that can do so override this method. The default implementation
+        returns None, in which case callers fall back to fetch_all_chats and fetch_chat.
+
+        Args:
+            user_id (str): The user ID.
+            session_id (str): The session ID.
+
+        Returns:
+            Optional[SessionSnapshot]: The session snapshot, or None if not supported.
+        """
+        return None
+
+    async def save_session_messages(self,
+                                    user_id: str,
+                                    session_id: str,
+                                    messages_by_agent: dict[str, Union[list[ConversationMessage], list[TimestampedMessage]]],
+                                    max_history_size: Optional[int] = None) -> bool:
+        """
+        Save the messages of several agents of a session at once.
+
+        Storages that can write several conversations in one request override this method.
+        The default implementation saves the conversations concurrently with save_chat_messages.
+
+        Args:
+            user_id (str): The user ID.
+            session_id (str): The session ID.
+            messages_by_agent (dict[str, list[ConversationMessage or TimestampedMessage]]):
+                The messages to save, by agent ID.
+            max_history_size (Optional[int]): The maximum history size.
+
+        Returns:
+            bool: True if every conversation was saved successfully, False otherwise.
+        """
+        results = await asyncio.gather(*(
+            self.save_chat_messages(user_id, session_id, agent_id, messages, max_history_size)
+            for agent_id, messages in messages_by_agent.items()
+        ))
+        return all(results)
@@ -0,0 +1,313 @@
+from typing import Union, Optional, Any
+import time
+from botocore.exceptions import ClientError
+from multi_agent_orchestrator.storage.dynamodb_chat_storage import DynamoDbChatStorage
+from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage
+from multi_agent_orchestrator.utils import Logger
+
+# Width of the zero-padded sequence number, so that sort keys order like integers
+SEQUENCE_WIDTH = 20
+# Sorts after the digits of the sequence numbers, to read past the messages of an agent
+SEQUENCE_END = ':'
+
+
+class DynamoDbAppendOnlyChatStorage(DynamoDbChatStorage):
+    """
+    DynamoDB chat storage that stores one item per message.
+
+    Messages are written with sort key `session_id#agent_id#sequence`. The sequence is
+    allocated atomically on a counter item (sort key `session_id#agent_id`), which also
+    records the role of the last message to reject consecutive messages with the same role.
+    Saving a message never reads nor rewrites the conversation, so the write cost does not
+    grow with the history and concurrent writers do not overwrite each other.
+
+    This layout is not compatible with the one used by DynamoDbChatStorage,
+    use a dedicated table.
+    """
+
+    async def save_chat_message(
+        self,
+        user_id: str,
+        session_id: str,
+        agent_id: str,
+        new_message: Union[ConversationMessage, TimestampedMessage],
+        max_history_size: Optional[int] = None
+    ) -> bool:
+        return await self.save_chat_messages(user_id,
+                                             session_id,
+                                             agent_id,
+                                             [new_message],
+                                             max_history_size)
+
+    async def save_chat_messages(self,
+        user_id: str,
+        session_id: str,
+        agent_id: str,
+        new_messages: Union[list[ConversationMessage], list[TimestampedMessage]],
+        max_history_size: Optional[int] = None
+    ) -> bool:
+        try:
+            return await self._run(self._save_messages,
+                                   user_id,
+                                   session_id,
+                                   agent_id,
+                                   list(new_messages),
+                                   max_history_size)
+        except Exception as error:
+            Logger.error(f"Error saving conversation to DynamoDB:{str(error)}")
+            raise error
+
+    async def fetch_chat(
+        self,
+        user_id: str,
+        session_id: str,
+        agent_id: str,
+        max_history_size: Optional[int] = None
+    ) -> list[ConversationMessage]:
+        return self._remove_timestamps(
+            await self.fetch_chat_with_timestamp(user_id, session_id, agent_id, max_history_size)
+        )
+
+    async def fetch_chat_with_timestamp(
+        self,
+        user_id: str,
+        session_id: str,
+        agent_id: str,
+        max_history_size: Optional[int] = None
+    ) -> list[TimestampedMessage]:
+        """
+        Fetch the messages of a conversation. With max_history_size, only the last messages
+        are read, newest first.
+        """
+        try:
+            if max_history_size:
+                items = await self._run(self._recent_items, user_id, session_id, agent_id, max_history_size)
+                return [self._item_to_message(item) for item in items]
+            items = await self._run(
+                self._query_items,
+                KeyConditionExpression="PK = :pk AND begins_with(SK, :skPrefix)",
+                ExpressionAttributeValues={
+                    ':pk': user_id,
+                    ':skPrefix': f"{self._generate_key(user_id, session_id, agent_id)}#"
+                }
+            )
+            return [self._item_to_message(item) for item in items]
+        except Exception as error:
+            Logger.error(f"Error getting conversation from DynamoDB: {str(error)}")
+            raise error
+
+    async def fetch_recent_chats(self,
+                                 user_id: str,
+                                 session_id: str,
+                                 max_messages: Optional[int] = None,
+                                 max_messages_per_agent: Optional[int] = None) -> list[ConversationMessage]:
+        """
+        Fetch the most recent chat messages of a session. The agents of the session are found
+        from their sequence counters, then the messages of each agent are read newest first,
+        up to the window, so that the older messages are not read.
+        """
+        limits = [limit for limit in (max_messages, max_messages_per_agent) if limit]
+        if not limits:
+            return await self.fetch_all_chats(user_id, session_id)
+        try:
+            return await self._run(self._collect_recent_messages,
+                                   user_id,
+                                   session_id,
+                                   max_messages,
+                                   min(limits))
+        except Exception as error:
+            Logger.error(f"Error querying conversations from DynamoDB:{str(error)}")
+            raise error
+
+    def _save_messages(self,
+                       user_id: str,
+                       session_id: str,
+                       agent_id: str,
+                       new_messages: list[ConversationMessage],
+                       max_history_size: Optional[int]) -> bool:
+        last_sequence = None
+        while new_messages and last_sequence is None:
+            last_sequence = self._allocate_sequences(user_id, session_id, agent_id, new_messages)
+            if last_sequence is None:
+                Logger.debug(f"> Consecutive {new_messages[0].role} \
+                             message detected for agent {agent_id}. Not saving.")
+                new_messages = new_messages[1:]
+
+        if not new_messages:
+            return False
+
+        first_sequence = last_sequence - len(new_messages) + 1
+        with self.table.batch_writer() as batch:
+            for offset, message in enumerate(new_messages):
+                batch.put_item(Item=self._message_to_item(
+                    user_id, session_id, agent_id, first_sequence + offset, message
+                ))
+
+        if max_history_size is not None:
+            adjusted_max_history_size = max_history_size - (max_history_size % 2)
+            if adjusted_max_history_size:
+                # The messages that fell out of the window are those before the saved ones
+                self._delete_sequences(user_id,
+                                       session_id,
+                                       agent_id,
+                                       first_sequence - adjusted_max_history_size,
+                                       last_sequence - adjusted_max_history_size)
+        return True
+
+    def _session_query_args(self,
+                            user_id: str,
+                            session_id: str,
+                            since: Optional[int] = None) -> dict[str, Any]:
+        """Query arguments reading the messages of a session, filtered by DynamoDB when a time window is set."""
+        query_args = super()._session_query_args(user_id, session_id, since)
+        if since is not None:
+            query_args['FilterExpression'] = "#timestamp >= :since"
+            query_args['ExpressionAttributeNames'] = {'#timestamp': 'timestamp'}
+            query_args['ExpressionAttributeValues'][':since'] = since
+        return query_args
+
+    def _parse_item(self, item: dict[str, Any]) -> Optional[tuple[str, str, list[TimestampedMessage]]]:
+        if 'role' not in item:  # sequence counter item
+            return None
+        session_id, agent_key = item['SK'].split('#', 1)
+        return session_id, agent_key.rsplit('#', 1)[0], [self._item_to_message(item)]
+
+    def _collect_recent_messages(self,
+                                 user_id: str,
+                                 session_id: str,
+                                 max_messages: Optional[int],
+                                 max_messages_per_agent: int) -> list[ConversationMessage]:
+        """Read the last messages of each agent of the session and keep the most recent ones."""
+        selected: list[tuple[int, int, str, TimestampedMessage]] = []
+        position = 0
+        for agent_id in self._session_agent_ids(user_id, session_id):
+            for item in self._recent_items(user_id, session_id, agent_id, max_messages_per_agent):
+                message = self._item_to_message(item)
+                self._keep_recent(selected, (message.timestamp, position, agent_id, message), max_messages)
+                position += 1
+        return self._entries_to_history(selected)
+
+    def _session_agent_ids(self, user_id: str, session_id: str) -> list[str]:
+        """
+        Return the agents of a session, reading one item per query instead of their messages.
+
+        Each query reads the first key after a cursor. A sequence counter sorts before the
+        messages of its agent, and once a message is read the cursor moves past the messages
+        of its agent.
+        """
+        prefix = f"{session_id}#"
+        agent_ids: list[str] = []
+        cursor = prefix
+        while True:
+            items = self.table.query(
+                KeyConditionExpression="PK = :pk AND SK > :cursor",
+                ExpressionAttributeValues={':pk': user_id, ':cursor': cursor},
+                ProjectionExpression="SK",
+                Limit=1
+            ).get('Items', [])
+            if not items or not items[0]['SK'].startswith(prefix):
+                return agent_ids
+            key = items[0]['SK']
+            agent_id, separator, _ = key[len(prefix):].partition('#')
+            if agent_id not in agent_ids:
+                agent_ids.append(agent_id)
+            cursor = f"{prefix}{agent_id}#{SEQUENCE_END}" if separator else key
+
+    def _recent_items(self, user_id: str, session_id: str, agent_id: str, limit: int) -> list[dict]:
+        """Read the last messages of a conversation, newest first, and return them oldest first."""
+        items: list[dict] = []
+        for page in self._query_pages(
+            KeyConditionExpression="PK = :pk AND SK BETWEEN :start AND :end",
+            ExpressionAttributeValues={
+                ':pk': user_id,
+                ':start': self._message_key(session_id, agent_id, 0),
+                ':end': f"{self._generate_key(user_id, session_id, agent_id)}#{SEQUENCE_END}"
+            },
+            ScanIndexForward=False,
+            Limit=limit
+        ):
+            items.extend(page)
+            if len(items) >= limit:
+                break
+        return items[:limit][::-1]
+
+    def _allocate_sequences(self,
+                            user_id: str,
+                            session_id: str,
+                            agent_id: str,
+                            new_messages: list[ConversationMessage]) -> Optional[int]:
+        """
+        Atomically reserve one sequence number per message.
+        Returns the last reserved sequence, or None if the first message has the same
+        role as the last stored message.
+        """
+        update_expression = "SET last_role = :lastRole"
+        attribute_names = {}
+        attribute_values = {
+            ':firstRole': new_messages[0].role,
+            ':lastRole': new_messages[-1].role,
+            ':count': len(new_messages)
+        }
+        if self.ttl_key:
+            update_expression += ", #ttl = :ttl"
+            attribute_names['#ttl'] = self.ttl_key
+            attribute_values[':ttl'] = int(time.time()) + self.ttl_duration
+
+        update_args = {
+            'Key': {'PK': user_id, 'SK': self._generate_key(user_id, session_id, agent_id)},
+            'UpdateExpression': f"{update_expression} ADD seq :count",
+            'ConditionExpression': "attribute_not_exists(last_role) OR last_role <> :firstRole",
+            'ExpressionAttributeValues': attribute_values,
+            'ReturnValues': "UPDATED_NEW"
+        }
+        if attribute_names:
+            update_args['ExpressionAttributeNames'] = attribute_names
+
+        try:
+            response = self.table.update_item(**update_args)
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return None
+            raise error
+        return int(response['Attributes']['seq'])
+
+    def _delete_sequences(self, user_id: str, session_id: str, agent_id: str, first: int, last: int) -> None:
+        """
+        Delete the messages with a sequence between first and last, included, without reading
+        them. Each save deletes the messages its own sequences pushed out of the window, so
+        concurrent writers trim the conversation together.
+        """
+        first = max(first, 1)
+        if last < first:
+            return
+        with self.table.batch_writer() as batch:
+            for sequence in range(first, last + 1):
+                batch.delete_item(Key={'PK': user_id, 'SK': self._message_key(session_id, agent_id, sequence)})
+
+    def _message_to_item(self,
+                         user_id: str,
+                         session_id: str,
+                         agent_id: str,
+                         sequence: int,
+                         message: Union[ConversationMessage, TimestampedMessage]) -> dict[str, Any]:
+        timestamp = getattr(message, 'timestamp', None) or int(time.time() * 1000)
+        item = {
+            'PK': user_id,
+            'SK': self._message_key(session_id, agent_id, sequence),
+            'role': message.role,
+            'content': message.content,
+            'timestamp': timestamp,
+        }
+        if self.ttl_key:
+            item[self.ttl_key] = int(time.time()) + self.ttl_duration
+        return item
+
+    @staticmethod
+    def _item_to_message(item: dict[str, Any]) -> TimestampedMessage:
+        return TimestampedMessage(role=item['role'],
+                                  content=item['content'],
+                                  timestamp=int(item['timestamp']))
+
+    @staticmethod
+    def _message_key(session_id: str, agent_id: str, sequence: int) -> str:
+        return f"{session_id}#{agent_id}#{sequence:0{SEQUENCE_WIDTH}d}"
@@ -1,10 +1,15 @@
-from typing import Union, Optional
+from typing import Union, Optional, Any, Callable, Iterator, AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import heapq
 import time
 import boto3
-from multi_agent_orchestrator.storage import ChatStorage
-from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole, TimestampedMessage
+from botocore.config import Config
+from multi_agent_orchestrator.storage import ChatStorage, SessionSnapshot
+from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage
 from multi_agent_orchestrator.utils import Logger, conversation_to_dict
-from operator import attrgetter
+from operator import itemgetter
 
 
 class DynamoDbChatStorage(ChatStorage):
@@ -12,13 +17,34 @@ class DynamoDbChatStorage(ChatStorage):
                  table_name: str,
                  region: str,
                  ttl_key: Optional[str] = None,
-                 ttl_duration: int = 3600):
+                 ttl_duration: int = 3600,
+                 max_pool_connections: int = 50,
+                 max_retries: int = 3):
+        """
+        Args:
+            table_name: The DynamoDB table name
+            region: The AWS region of the table
+            ttl_key: Optional attribute name used as the table TTL key
+            ttl_duration: Time to live of the conversations, in seconds
+            max_pool_connections: Maximum number of HTTP connections to DynamoDB,
+                which is also the number of DynamoDB calls that can run at the same time
+            max_retries: Maximum number of attempts for a DynamoDB call (standard retry mode)
+        """
         super().__init__()
         self.table_name = table_name
         self.ttl_key = ttl_key
         self.ttl_duration = int(ttl_duration)
-        self.dynamodb = boto3.resource('dynamodb', region_name=region)
+        self.dynamodb = boto3.resource(
+            'dynamodb',
+            region_name=region,
+            config=Config(max_pool_connections=max_pool_connections,
+                          retries={'max_attempts': max_retries, 'mode': 'standard'})
+        )
         self.table = self.dynamodb.Table(table_name)
+        # boto3 calls are blocking: they run on a bounded pool sized like the connection
+        # pool, so a DynamoDB round trip never stalls the event loop.
+        self.executor = ThreadPoolExecutor(max_workers=max_pool_connections,
+                                           thread_name_prefix='dynamodb-chat-storage')
 
     async def save_chat_message(
         self,
@@ -58,7 +84,7 @@ class DynamoDbChatStorage(ChatStorage):
             item[self.ttl_key] = int(time.time()) + self.ttl_duration
 
         try:
-            self.table.put_item(Item=item)
+            await self._run(self.table.put_item, Item=item)
         except Exception as error:
             Logger.error(f"Error saving conversation to DynamoDB:{str(error)}")
             raise error
@@ -79,11 +105,13 @@ class DynamoDbChatStorage(ChatStorage):
         key = self._generate_key(user_id, session_id, agent_id)
         existing_conversation = await self.fetch_chat_with_timestamp(user_id, session_id, agent_id)
 
-        #TODO: check messages are consecutive
-        # if self.is_same_role_as_last_message(existing_conversation, new_messages):
-        #     Logger.debug(f"> Consecutive {new_message.role} \
-        #                   message detected for agent {agent_id}. Not saving.")
-        #     return existing_conversation
+        if new_messages and self.is_same_role_as_last_message(existing_conversation, new_messages[0]):
+            Logger.debug(f"> Consecutive {new_messages[0].role} \
+                          message detected for agent {agent_id}. Not saving.")
+            new_messages = new_messages[1:]
+
+        if not new_messages:
+            return self._remove_timestamps(existing_conversation)
 
         if isinstance(new_messages[0], ConversationMessage):  # Check only first message
             new_messages = [
@@ -110,7 +138,7 @@ class DynamoDbChatStorage(ChatStorage):
             item[self.ttl_key] = int(time.time()) + self.ttl_duration
 
         try:
-            self.table.put_item(Item=item)
+            await self._run(self.table.put_item, Item=item)
         except Exception as error:
             Logger.error(f"Error saving conversation to DynamoDB:{str(error)}")
             raise error
@@ -125,11 +153,9 @@ class DynamoDbChatStorage(ChatStorage):
     ) -> list[ConversationMessage]:
         key = self._generate_key(user_id, session_id, agent_id)
         try:
-            response = self.table.get_item(Key={'PK': user_id, 'SK': key})
-            stored_messages: list[TimestampedMessage] = self._dict_to_conversation(
-                response.get('Item', {}).get('conversation', [])
-            )
-            return self._remove_timestamps(stored_messages)
+            response = await self._run(self.table.get_item, Key={'PK': user_id, 'SK': key})
+            return [ConversationMessage(role=msg['role'], content=msg['content'])
+                    for msg in response.get('Item', {}).get('conversation', [])]
         except Exception as error:
             Logger.error(f"Error getting conversation from DynamoDB:{str(error)}")
             raise error
@@ -142,7 +168,7 @@ class DynamoDbChatStorage(ChatStorage):
     ) -> list[TimestampedMessage]:
         key = self._generate_key(user_id, session_id, agent_id)
         try:
-            response = self.table.get_item(Key={'PK': user_id, 'SK': key})
+            response = await self._run(self.table.get_item, Key={'PK': user_id, 'SK': key})
             stored_messages: list[TimestampedMessage] = self._dict_to_conversation(
                 response.get('Item', {}).get('conversation', [])
             )
@@ -151,47 +177,221 @@ class DynamoDbChatStorage(ChatStorage):
             Logger.error(f"Error getting conversation from DynamoDB: {str(error)}")
             raise error
 
-    async def fetch_all_chats(self, user_id: str, session_id: str) -> list[ConversationMessage]:
+    async def fetch_all_chats(self,
+                              user_id: str,
+                              session_id: str,
+                              since: Optional[int] = None,
+                              max_messages: Optional[int] = None) -> list[ConversationMessage]:
+        """
+        Fetch all chat messages of a session, following every page of the query.
+
+        Args:
+            user_id: The user ID
+            session_id: The session ID
+            since: Optional timestamp, in milliseconds. Only the messages created at or
+                after this time are returned.
+            max_messages: Optional maximum number of messages to return. The most recent
+                messages are kept, without holding the whole session in memory.
+        """
         try:
-            response = self.table.query(
-                KeyConditionExpression="PK = :pk AND begins_with(SK, :skPrefix)",
-                ExpressionAttributeValues={
-                    ':pk': user_id,
-                    ':skPrefix': f"{session_id}#"
-                }
-            )
-
-            if not response.get('Items'):
-                return []
+            return await self._run(self._collect_session_messages,
+                                   user_id,
+                                   session_id,
+                                   since,
+                                   max_messages)
+        except Exception as error:
+            Logger.error(f"Error querying conversations from DynamoDB:{str(error)}")
+            raise error
 
-            all_chats = []
-            for item in response['Items']:
-                if not isinstance(item.get('conversation'), list):
-                    Logger.error(f"Unexpected item structure:{item}")
-                    continue
+    async def fetch_recent_chats(self,
+                                 user_id: str,
+                                 session_id: str,
+                                 max_messages: Optional[int] = None,
+                                 max_messages_per_agent: Optional[int] = None) -> list[ConversationMessage]:
+        """
+        Fetch the most recent chat messages of a session. Each conversation is a single item,
+        so the items are read in full, but only the messages of the window are kept.
+        """
+        try:
+            return await self._run(self._collect_session_messages,
+                                   user_id,
+                                   session_id,
+                                   None,
+                                   max_messages,
+                                   max_messages_per_agent)
+        except Exception as error:
+            Logger.error(f"Error querying conversations from DynamoDB:{str(error)}")
+            raise error
 
-                agent_id = item['SK'].split('#')[1]
-                for msg in item['conversation']:
-                    content = msg['content']
-                    if msg['role'] == ParticipantRole.ASSISTANT.value:
-                        text = content[0]['text'] if isinstance(content, list) else content
-                        content = [{'text': f"[{agent_id}] {text}"}]
-                    elif not isinstance(content, list):
-                        content = [{'text': content}]
-
-                    all_chats.append(
-                        TimestampedMessage(
-                            role=msg['role'],
-                            content=content,
-                            timestamp=int(msg['timestamp'])
-                        ))
-
-            all_chats.sort(key=attrgetter('timestamp'))
-            return self._remove_timestamps(all_chats)
+    async def fetch_session(self, user_id: str, session_id: str) -> SessionSnapshot:
+        try:
+            items = await self._run(self._query_items, **self._session_query_args(user_id, session_id))
+            conversations: dict[str, list[TimestampedMessage]] = {}
+            for item in items:
+                parsed_item = self._parse_item(item)
+                if parsed_item:
+                    _, agent_id, messages = parsed_item
+                    conversations.setdefault(agent_id, []).extend(messages)
+            return SessionSnapshot(user_id, session_id, conversations)
         except Exception as error:
             Logger.error(f"Error querying conversations from DynamoDB:{str(error)}")
             raise error
 
+    async def export_sessions(self, total_segments: int = 4) -> AsyncIterator[SessionSnapshot]:
+        """
+        Read every session of the table with a parallel scan, for exports and administration.
+
+        The scan segments are read one page at a time, each on a thread of the storage
+        executor, so that at most one page per segment is held in memory. Snapshots are
+        yielded per page: a session whose items span several pages is yielded in several
+        snapshots, each holding the messages read in one page.
+
+        Args:
+            total_segments: Number of scan segments read in parallel
+
+        Yields:
+            The snapshots of the sessions of each page read
+        """
+        try:
+            scans: dict[int, dict[str, Any]] = {
+                segment: {'Segment': segment, 'TotalSegments': total_segments}
+                for segment in range(total_segments)
+            }
+            while scans:
+                responses = await asyncio.gather(*[
+                    self._run(self.table.scan, **scan_args) for scan_args in scans.values()
+                ])
+                for (segment, scan_args), response in zip(list(scans.items()), responses):
+                    if 'LastEvaluatedKey' in response:
+                        scan_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+                    else:
+                        del scans[segment]
+                    for snapshot in self._page_snapshots(response.get('Items', [])):
+                        yield snapshot
+        except Exception as error:
+            Logger.error(f"Error scanning conversations from DynamoDB:{str(error)}")
+            raise error
+
+    def _page_snapshots(self, items: list[dict[str, Any]]) -> list[SessionSnapshot]:
+        """Group the conversations of a page of items by user and session."""
+        snapshots: dict[tuple[str, str], SessionSnapshot] = {}
+        for item in items:
+            parsed_item = self._parse_item(item)
+            if not parsed_item:
+                continue
+            session_id, agent_id, messages = parsed_item
+            snapshot = snapshots.setdefault((item['PK'], session_id),
+                                            SessionSnapshot(item['PK'], session_id))
+            snapshot.conversations.setdefault(agent_id, []).extend(messages)
+        return list(snapshots.values())
+
+    def _collect_session_messages(self,
+                                  user_id: str,
+                                  session_id: str,
+                                  since: Optional[int],
+                                  max_messages: Optional[int],
+                                  max_messages_per_agent: Optional[int] = None) -> list[ConversationMessage]:
+        """
+        Read the session page by page and return its messages ordered by timestamp.
+        With max_messages, only the most recent messages are kept in a bounded heap.
+        With max_messages_per_agent, the most recent messages of each agent are kept first.
+        """
+        selected: list[tuple[int, int, str, TimestampedMessage]] = []
+        agent_selected: dict[str, list[tuple[int, int, str, TimestampedMessage]]] = {}
+        position = 0
+        for page in self._query_pages(**self._session_query_args(user_id, session_id, since)):
+            for item in page:
+                parsed_item = self._parse_item(item)
+                if not parsed_item:
+                    continue
+                _, agent_id, messages = parsed_item
+                for message in messages:
+                    if since is not None and message.timestamp < since:
+                        continue
+                    entry = (message.timestamp, position, agent_id, message)
+                    position += 1
+                    if max_messages_per_agent:
+                        self._keep_recent(agent_selected.setdefault(agent_id, []), entry, max_messages_per_agent)
+                    else:
+                        self._keep_recent(selected, entry, max_messages)
+        for entries in agent_selected.values():
+            for entry in entries:
+                self._keep_recent(selected, entry, max_messages)
+        return self._entries_to_history(selected)
+
+    @staticmethod
+    def _entries_to_history(entries: list[tuple[int, int, str, TimestampedMessage]]) -> list[ConversationMessage]:
+        """Order (timestamp, position, agent ID, message) entries and format them as a session history."""
+        entries.sort(key=itemgetter(0, 1))
+        return [
+            ConversationMessage(role=message.role,
+                                content=SessionSnapshot.format_content(message.role, message.content, agent_id))
+            for _, _, agent_id, message in entries
+        ]
+
+    @staticmethod
+    def _keep_recent(selected: list, entry: tuple, max_entries: Optional[int]) -> None:
+        """Add an entry to a heap holding at most max_entries entries, the most recent ones."""
+        if max_entries is None:
+            selected.append(entry)
+        elif len(selected) < max_entries:
+            heapq.heappush(selected, entry)
+        elif max_entries:
+            heapq.heappushpop(selected, entry)
+
+    def _session_query_args(self,
+                            user_id: str,
+                            session_id: str,
+                            since: Optional[int] = None) -> dict[str, Any]:
+        """
+        Query arguments reading every item of a session. Conversations are stored as a whole
+        in a single item, so since is ignored here: every item of the session is read, and
+        the time window is applied to the messages after the read, which does not reduce
+        the read capacity consumed.
+        """
+        return {
+            'KeyConditionExpression': "PK = :pk AND begins_with(SK, :skPrefix)",
+            'ExpressionAttributeValues': {
+                ':pk': user_id,
+                ':skPrefix': f"{session_id}#"
+            }
+        }
+
+    def _parse_item(self, item: dict[str, Any]) -> Optional[tuple[str, str, list[TimestampedMessage]]]:
+        """Return the session ID, agent ID and messages of an item, or None if it holds no conversation."""
+        if not isinstance(item.get('conversation'), list):
+            Logger.error(f"Unexpected item structure:{item}")
+            return None
+        session_id, agent_id = item['SK'].split('#')[:2]
+        return session_id, agent_id, [TimestampedMessage(role=msg['role'],
+                                                         content=msg['content'],
+                                                         timestamp=int(msg['timestamp']))
+                                      for msg in item['conversation']]
+
+    def _query_pages(self, **query_args: Any) -> Iterator[list[dict]]:
+        """Run a query and yield its pages, following LastEvaluatedKey."""
+        while True:
+            response = self.table.query(**query_args)
+            yield response.get('Items', [])
+            if 'LastEvaluatedKey' not in response:
+                return
+            query_args['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def _query_items(self, **query_args: Any) -> list[dict]:
+        """Run a query and follow LastEvaluatedKey until every page is read."""
+        return [item for page in self._query_pages(**query_args) for item in page]
+
+    async def close(self) -> None:
+        """Release the threads used for the DynamoDB calls, once the calls in flight are done."""
+        loop = asyncio.get_running_loop()
+        # Waiting for the calls in flight would otherwise block the event loop
+        await loop.run_in_executor(None, functools.partial(self.executor.shutdown, wait=True))
+
+    async def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking boto3 call on the storage executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
     def _generate_key(self, user_id: str, session_id: str, agent_id: str) -> str:
         return f"{session_id}#{agent_id}"
 
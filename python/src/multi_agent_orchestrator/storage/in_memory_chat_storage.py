@@ -1,14 +1,41 @@
 from typing import Optional, Union
+import heapq
+import json
 import time
-from collections import defaultdict
-from multi_agent_orchestrator.storage import ChatStorage
+from collections import OrderedDict, deque
+from itertools import islice
+from operator import attrgetter
+from multi_agent_orchestrator.storage import ChatStorage, SessionSnapshot
 from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage
 from multi_agent_orchestrator.utils import Logger
 
 class InMemoryChatStorage(ChatStorage):
-    def __init__(self):
+    def __init__(self,
+                 session_ttl: Optional[float] = None,
+                 max_sessions: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            session_ttl: Optional time in seconds after which a session that was not
+                read nor written is evicted.
+            max_sessions: Optional maximum number of sessions kept in memory. The least
+                recently used sessions are evicted first.
+            max_bytes: Optional budget for the estimated size of the stored message contents.
+                The least recently used sessions are evicted until the budget is met,
+                except the session being written.
+        """
         super().__init__()
-        self.conversations = defaultdict(list)
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        # (user_id, session_id) -> agent_id -> messages, oldest first.
+        # Sessions are ordered from the least to the most recently used.
+        self.conversations: OrderedDict[tuple[str, str], dict[str, deque[TimestampedMessage]]] = OrderedDict()
+        self.last_access: dict[tuple[str, str], float] = {}
+        self.session_bytes: dict[tuple[str, str], int] = {}
+        self.total_bytes = 0
+        self.evictions: dict[str, int] = {'ttl': 0, 'max_sessions': 0, 'max_bytes': 0}
+        self.evicted_bytes = 0
 
     async def save_chat_message(
         self,
@@ -18,24 +45,7 @@ class InMemoryChatStorage(ChatStorage):
         new_message: Union[ConversationMessage, TimestampedMessage],
         max_history_size: Optional[int] = None
     ) -> list[dict]:
-        key = self._generate_key(user_id, session_id, agent_id)
-        conversation = self.conversations[key]
-
-        if self.is_same_role_as_last_message(conversation, new_message):
-            Logger.debug(f"> Consecutive {new_message.role} \
-                       message detected for agent {agent_id}. Not saving.")
-            return self._remove_timestamps(conversation)
-
-        if isinstance(new_message, ConversationMessage):
-            timestamped_message = TimestampedMessage(
-                role=new_message.role,
-                content=new_message.content)
-
-        conversation.append(timestamped_message)
-
-        conversation = self.trim_conversation(conversation, max_history_size)
-        self.conversations[key] = conversation
-        return self._remove_timestamps(conversation)
+        return await self.save_chat_messages(user_id, session_id, agent_id, [new_message], max_history_size)
 
 
     async def save_chat_messages(self,
@@ -45,14 +55,17 @@ class InMemoryChatStorage(ChatStorage):
                                 new_messages: Union[list[ConversationMessage], list[TimestampedMessage]],
                                 max_history_size: Optional[int] = None
     ) -> bool:
-        key = self._generate_key(user_id, session_id, agent_id)
-        conversation = self.conversations[key]
-        #TODO: check messages are consecutive
+        key = (user_id, session_id)
+        self._evict_expired()
+        conversation = self._get_conversation(key, agent_id)
 
-        # if self.is_same_role_as_last_message(conversation, new_message):
-        #     Logger.debug(f"> Consecutive {new_message.role} \
-        #                message detected for agent {agent_id}. Not saving.")
-        #     return self._remove_timestamps(conversation)
+        if new_messages and self.is_same_role_as_last_message(conversation, new_messages[0]):
+            Logger.debug(f"> Consecutive {new_messages[0].role} \
+                       message detected for agent {agent_id}. Not saving.")
+            new_messages = new_messages[1:]
+
+        if not new_messages:
+            return self._remove_timestamps(conversation)
 
         if isinstance(new_messages[0], ConversationMessage):  # Check only first message
             new_messages = [TimestampedMessage(
@@ -61,9 +74,11 @@ class InMemoryChatStorage(ChatStorage):
                     )
                 for new_message in new_messages]
 
-        conversation.extend(new_messages)
-        conversation = self.trim_conversation(conversation, max_history_size)
-        self.conversations[key] = conversation
+        for new_message in new_messages:
+            conversation.append(new_message)
+            self._track_size(key, new_message)
+        self._trim(key, conversation, max_history_size)
+        self._enforce_limits(key)
         return self._remove_timestamps(conversation)
 
 
@@ -74,8 +89,7 @@ class InMemoryChatStorage(ChatStorage):
         agent_id: str,
         max_history_size: Optional[int] = None
     ) -> list[dict]:
-        key = self._generate_key(user_id, session_id, agent_id)
-        conversation = self.conversations[key]
+        conversation = list(self._get_session(user_id, session_id).get(agent_id, []))
         if max_history_size is not None:
             conversation = self.trim_conversation(conversation, max_history_size)
         return self._remove_timestamps(conversation)
@@ -85,25 +99,159 @@ class InMemoryChatStorage(ChatStorage):
         user_id: str,
         session_id: str
     ) -> list[ConversationMessage]:
-        all_messages = []
-        for key, messages in self.conversations.items():
-            stored_user_id, stored_session_id, agent_id = key.split('#')
-            if stored_user_id == user_id and stored_session_id == session_id:
-                for message in messages:
-                    new_content = message.content if message.content else []
-
-                    if len(new_content) > 0 and message.role == "assistant":
-                        new_content = [{'text':f"[{agent_id}] {new_content[0]['text']}"}]
-                    all_messages.append(TimestampedMessage(
-                        role=message.role,
-                        content=new_content,
-                        timestamp=message.timestamp
-                    ))
-
-        # Sort messages by timestamp
-        all_messages.sort(key=lambda x: x.timestamp)
+        agent_chats = [
+            [self._format_message(message, agent_id) for message in messages]
+            for agent_id, messages in self._get_session(user_id, session_id).items()
+        ]
+        # Each agent conversation is already ordered by timestamp
+        return self._remove_timestamps(heapq.merge(*agent_chats, key=attrgetter('timestamp')))
+
+    async def fetch_recent_chats(
+        self,
+        user_id: str,
+        session_id: str,
+        max_messages: Optional[int] = None,
+        max_messages_per_agent: Optional[int] = None
+    ) -> list[ConversationMessage]:
+        limits = [limit for limit in (max_messages, max_messages_per_agent) if limit]
+        # No agent contributes more than max_messages to the window
+        limit = min(limits) if limits else 0
+        agent_chats = [
+            [self._format_message(message, agent_id)
+             for message in islice(messages, max(0, len(messages) - limit) if limit else 0, None)]
+            for agent_id, messages in self._get_session(user_id, session_id).items()
+        ]
+        all_messages = list(heapq.merge(*agent_chats, key=attrgetter('timestamp')))
+        if max_messages:
+            all_messages = all_messages[-max_messages:]
         return self._remove_timestamps(all_messages)
 
+    async def fetch_session(
+        self,
+        user_id: str,
+        session_id: str
+    ) -> SessionSnapshot:
+        conversations = {
+            agent_id: list(messages)
+            for agent_id, messages in self._get_session(user_id, session_id).items()
+        }
+        return SessionSnapshot(user_id, session_id, conversations)
+
+    def get_metrics(self) -> dict[str, int]:
+        """
+        Return the size of the storage and the number of evicted sessions.
+
+        Returns:
+            dict[str, int]: The number of sessions, the estimated size of the stored contents
+                (only tracked when max_bytes is set),
+                the evictions per reason and the estimated size of the evicted contents.
+        """
+        return {
+            'sessions': len(self.conversations),
+            'bytes': self.total_bytes,
+            'evicted_sessions_ttl': self.evictions['ttl'],
+            'evicted_sessions_max_sessions': self.evictions['max_sessions'],
+            'evicted_sessions_max_bytes': self.evictions['max_bytes'],
+            'evicted_bytes': self.evicted_bytes,
+        }
+
+    def _get_session(self, user_id: str, session_id: str) -> dict[str, deque[TimestampedMessage]]:
+        """Return the conversations of a session without creating it, and mark it as used."""
+        self._evict_expired()
+        key = (user_id, session_id)
+        agents = self.conversations.get(key)
+        if agents is None:
+            return {}
+        self._touch(key)
+        return agents
+
+    def _get_conversation(self, key: tuple[str, str], agent_id: str) -> deque[TimestampedMessage]:
+        """Return the conversation of an agent, creating it if needed, and mark the session as used."""
+        agents = self.conversations.setdefault(key, {})
+        self._touch(key)
+        conversation = agents.get(agent_id)
+        if conversation is None:
+            conversation = agents[agent_id] = deque()
+        return conversation
+
+    def _trim(self,
+              key: tuple[str, str],
+              conversation: deque[TimestampedMessage],
+              max_history_size: Optional[int]) -> None:
+        """
+        Drop the oldest messages beyond max_history_size, with the same rule as trim_conversation.
+        The limit is given by each save, so the deque itself is not bounded: callers saving
+        with different limits do not rebuild it.
+        """
+        if max_history_size is None:
+            return
+        # Keep complete pairs only
+        max_size = max_history_size - (max_history_size % 2)
+        if not max_size:
+            return
+        while len(conversation) > max_size:
+            self._track_size(key, conversation.popleft(), -1)
+
+    def _touch(self, key: tuple[str, str]) -> None:
+        self.conversations.move_to_end(key)
+        self.last_access[key] = time.monotonic()
+
+    def _track_size(self, key: tuple[str, str], message: ConversationMessage, sign: int = 1) -> None:
+        """Add (or remove) the estimated size of a message, only when a byte budget is set."""
+        if self.max_bytes is None:
+            return
+        size = sign * self._estimate_size(message)
+        self.session_bytes[key] = self.session_bytes.get(key, 0) + size
+        self.total_bytes += size
+
+    def _evict_expired(self) -> None:
+        """Evict the sessions unused for longer than the TTL, which are the least recently used ones."""
+        if self.session_ttl is None:
+            return
+        expiry = time.monotonic() - self.session_ttl
+        while self.conversations:
+            key = next(iter(self.conversations))
+            if self.last_access[key] > expiry:
+                return
+            self._evict(key, 'ttl')
+
+    def _enforce_limits(self, current_key: tuple[str, str]) -> None:
+        """Evict the least recently used sessions until the session and size limits are met."""
+        if self.max_sessions is not None:
+            while len(self.conversations) > max(self.max_sessions, 1):
+                self._evict(next(iter(self.conversations)), 'max_sessions')
+        if self.max_bytes is not None:
+            while self.total_bytes > self.max_bytes:
+                key = next(iter(self.conversations))
+                if key == current_key:
+                    return
+                self._evict(key, 'max_bytes')
+
+    def _evict(self, key: tuple[str, str], reason: str) -> None:
+        del self.conversations[key]
+        del self.last_access[key]
+        size = self.session_bytes.pop(key, 0)
+        self.total_bytes -= size
+        self.evictions[reason] += 1
+        self.evicted_bytes += size
+        Logger.debug(f"> Evicted session {key[1]} of user {key[0]} ({reason}, {size} bytes)")
+
+    @staticmethod
+    def _estimate_size(message: ConversationMessage) -> int:
+        """Estimate the memory used by a message from the size of its serialized content."""
+        return len(json.dumps(message.content, default=str))
+
+    @staticmethod
+    def _format_message(message: TimestampedMessage, agent_id: str) -> TimestampedMessage:
+        new_content = message.content if message.content else []
+        if len(new_content) > 0 and message.role == "assistant":
+            new_content = [{'text':f"[{agent_id}] {new_content[0]['text']}"}]
+        return TimestampedMessage(
+            role=message.role,
+            content=new_content,
+            timestamp=message.timestamp
+        )
+
     @staticmethod
     def _generate_key(user_id: str, session_id: str, agent_id: str) -> str:
         return f"{user_id}#{session_id}#{agent_id}"
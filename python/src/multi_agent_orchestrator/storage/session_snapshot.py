@@ -0,0 +1,95 @@
+from typing import Optional, Union
+from operator import attrgetter
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole, TimestampedMessage
+
+
+class SessionSnapshot:
+    """
+    In-memory copy of all the conversations of a session, loaded with a single storage read.
+
+    The orchestrator loads one snapshot per request and derives both the classifier
+    history and the selected agent history from it, instead of reading the storage twice.
+    """
+    def __init__(self,
+                 user_id: str,
+                 session_id: str,
+                 conversations: Optional[dict[str, list[TimestampedMessage]]] = None):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.conversations: dict[str, list[TimestampedMessage]] = conversations or {}
+
+    def agent_chat(self, agent_id: str) -> list[ConversationMessage]:
+        """
+        Return the chat history of one agent, as fetch_chat would.
+
+        Args:
+            agent_id (str): The agent ID.
+
+        Returns:
+            list[ConversationMessage]: The agent chat history, oldest first.
+        """
+        return [ConversationMessage(role=message.role, content=message.content)
+                for message in self.conversations.get(agent_id, [])]
+
+    def all_chats(self,
+                  max_messages: Optional[int] = None,
+                  max_messages_per_agent: Optional[int] = None) -> list[ConversationMessage]:
+        """
+        Return the messages of every agent ordered by timestamp, as fetch_all_chats would.
+        Assistant messages are prefixed with the ID of the agent that produced them.
+
+        Args:
+            max_messages (Optional[int]): Only return the most recent messages of the session.
+            max_messages_per_agent (Optional[int]): Only include the most recent messages
+                of each agent.
+
+        Returns:
+            list[ConversationMessage]: All chat messages of the session.
+        """
+        all_messages = [
+            TimestampedMessage(role=message.role,
+                               content=self.format_content(message.role, message.content, agent_id),
+                               timestamp=message.timestamp)
+            for agent_id, conversation in self.conversations.items()
+            for message in (conversation[-max_messages_per_agent:] if max_messages_per_agent
+                            else conversation)
+        ]
+        all_messages.sort(key=attrgetter('timestamp'))
+        if max_messages:
+            all_messages = all_messages[-max_messages:]
+        return [ConversationMessage(role=message.role, content=message.content)
+                for message in all_messages]
+
+    def append(self,
+               agent_id: str,
+               message: Union[ConversationMessage, TimestampedMessage],
+               max_history_size: Optional[int] = None) -> None:
+        """
+        Keep the snapshot in sync with a message that was just saved to the storage.
+
+        Args:
+            agent_id (str): The agent ID.
+            message (ConversationMessage or TimestampedMessage): The saved message.
+            max_history_size (Optional[int]): The maximum history size used when saving.
+        """
+        conversation = self.conversations.setdefault(agent_id, [])
+        if conversation and conversation[-1].role == message.role:
+            return
+        if not isinstance(message, TimestampedMessage):
+            message = TimestampedMessage(role=message.role, content=message.content)
+        conversation.append(message)
+        if max_history_size:
+            # Same rule as ChatStorage.trim_conversation: keep complete pairs only
+            adjusted_max_history_size = max_history_size - (max_history_size % 2)
+            if adjusted_max_history_size:
+                del conversation[:-adjusted_max_history_size]
+
+    @staticmethod
+    def format_content(role: str, content: Union[list, str, None], agent_id: str) -> list:
+        """Format message content, prefixing assistant messages with the agent ID."""
+        if role == ParticipantRole.ASSISTANT.value and content:
+            text = content[0]['text'] if isinstance(content, list) else content
+            return [{'text': f"[{agent_id}] {text}"}]
+        if content is None:
+            return []
+        return content if isinstance(content, list) else [{'text': content}]
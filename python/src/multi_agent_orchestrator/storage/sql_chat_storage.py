@@ -1,30 +1,40 @@
 import time
 import json
+from collections import OrderedDict
 from typing import Optional, Union
-from libsql_client import create_client
-from multi_agent_orchestrator.storage import ChatStorage
+from libsql_client import create_client, LibsqlError, Statement
+from multi_agent_orchestrator.storage import ChatStorage, SessionSnapshot
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole, TimestampedMessage
 from multi_agent_orchestrator.utils import Logger
 
 class SqlChatStorage(ChatStorage):
     """SQL-based chat storage implementation supporting both local SQLite and remote Turso databases."""
 
+    MAX_CACHED_CONVERSATIONS = 10000
+
     def __init__(
         self,
         url: str,
-        auth_token: str | None = None
+        auth_token: str | None = None,
+        fetch_after_save: bool = True
     ):
         """Initialize SQL storage.
 
         Args:
             url: Database URL (e.g., 'file:local.db' or 'libsql://your-db-url.com')
             auth_token: Authentication token for remote databases (optional)
+            fetch_after_save: Return the updated conversation from the save methods, which
+                costs one more query per save. When False, they return whether messages were saved.
         """
         super().__init__()
         self.client = create_client(
             url=url,
             auth_token=auth_token
         )
+        self.fetch_after_save = fetch_after_save
+        # Next message index and last role per (user_id, session_id, agent_id),
+        # so that saving a message does not need to read the conversation first
+        self.last_messages: OrderedDict[tuple[str, str, str], tuple[int, Optional[str]]] = OrderedDict()
 
     async def initialize(self) -> None:
         """Initialize the database asynchronously. Must be called after creating the instance."""
@@ -52,6 +62,12 @@ class SqlChatStorage(ChatStorage):
                 CREATE INDEX IF NOT EXISTS idx_conversations_lookup
                 ON conversations(user_id, session_id, agent_id)
             """)
+
+            # Messages of a session in timestamp order, for fetch_all_chats
+            await self.client.execute("""
+                CREATE INDEX IF NOT EXISTS idx_conversations_timeline
+                ON conversations(user_id, session_id, timestamp)
+            """)
         except Exception as error:
             Logger.error(f"Error initializing database: {str(error)}")
             raise error
@@ -63,69 +79,9 @@ class SqlChatStorage(ChatStorage):
         agent_id: str,
         new_message: Union[ConversationMessage, TimestampedMessage],
         max_history_size: Optional[int] = None
-    ) -> list[ConversationMessage]:
+    ) -> Union[list[ConversationMessage], bool]:
         """Save a new chat message."""
-        try:
-            # Fetch existing conversation
-            existing_conversation = await self.fetch_chat(user_id, session_id, agent_id)
-
-            if self.is_same_role_as_last_message(existing_conversation, new_message):
-                Logger.debug(f"> Consecutive {new_message.role} message detected for agent {agent_id}. Not saving.")
-                return existing_conversation
-
-            # Convert to TimestampedMessage if needed
-            if isinstance(new_message, ConversationMessage):
-                new_message = TimestampedMessage(
-                    role=new_message.role,
-                    content=new_message.content
-                )
-
-            # Get next message index
-            result = await self.client.execute("""
-                SELECT COALESCE(MAX(message_index) + 1, 0) as next_index
-                FROM conversations
-                WHERE user_id = ? AND session_id = ? AND agent_id = ?
-            """, [user_id, session_id, agent_id])
-            next_index = result[0]['next_index']
-            content = json.dumps(new_message.content)
-
-            # Insert new message
-            await self.client.execute("""
-                INSERT INTO conversations (
-                    user_id, session_id, agent_id, message_index,
-                    role, content, timestamp
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, [
-                user_id, session_id, agent_id, next_index,
-                new_message.role, content, new_message.timestamp or int(time.time() * 1000)
-            ])
-
-            # Clean up old messages if max_history_size is set
-            if max_history_size is not None:
-                await self.client.execute("""
-                    DELETE FROM conversations
-                    WHERE user_id = ?
-                        AND session_id = ?
-                        AND agent_id = ?
-                        AND message_index <= (
-                            SELECT MAX(message_index) - ?
-                            FROM conversations
-                            WHERE user_id = ?
-                                AND session_id = ?
-                                AND agent_id = ?
-                        )
-                """, [
-                    user_id, session_id, agent_id,
-                    max_history_size,
-                    user_id, session_id, agent_id
-                ])
-
-            # Return updated conversation
-            return await self.fetch_chat(user_id, session_id, agent_id)
-
-        except Exception as error:
-            Logger.error(f"Error saving message: {str(error)}")
-            raise error
+        return await self.save_chat_messages(user_id, session_id, agent_id, [new_message], max_history_size)
 
     def _validate_message_content(self, content: Optional[list[dict[str, str]]]) -> None:
         """Validate message content before serialization."""
@@ -143,74 +99,22 @@ class SqlChatStorage(ChatStorage):
         agent_id: str,
         new_messages: Union[list[ConversationMessage], list[TimestampedMessage]],
         max_history_size: Optional[int] = None
-    ) -> list[ConversationMessage]:
+    ) -> Union[list[ConversationMessage], bool]:
         """Save multiple chat messages in a single transaction."""
         try:
             if not new_messages:
-                return await self.fetch_chat(user_id, session_id, agent_id)
+                return await self.fetch_chat(user_id, session_id, agent_id) if self.fetch_after_save else False
 
-            # Convert messages to TimestampedMessage if needed
-            timestamped_messages = []
             base_timestamp = int(time.time() * 1000)
-
-            for i, message in enumerate(new_messages):
-                if isinstance(message, ConversationMessage):
-                    timestamped_messages.append(TimestampedMessage(
-                        role=message.role,
-                        content=message.content,
-                        timestamp=base_timestamp + i
-                    ))
-                else:
-                    timestamped_messages.append(message)
-
-            # Get next message index
-            result = await self.client.execute("""
-                SELECT COALESCE(MAX(message_index) + 1, 0) as next_index
-                FROM conversations
-                WHERE user_id = ? AND session_id = ? AND agent_id = ?
-            """, [user_id, session_id, agent_id])
-
-            next_index = result[0]['next_index']
-
-            # Validate and prepare all messages first to catch any errors
-            message_params = []
-            for i, message in enumerate(timestamped_messages):
-                self._validate_message_content(message.content)
-                content = json.dumps(message.content)
-                message_params.append([
-                    user_id, session_id, agent_id, next_index + i,
-                    message.role, content, message.timestamp or (base_timestamp + i)
-                ])
-
-            # Insert messages one by one
-            for params in message_params:
-                await self.client.execute("""
-                    INSERT INTO conversations (
-                        user_id, session_id, agent_id, message_index,
-                        role, content, timestamp
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, params)
-
-            # Clean up old messages if max_history_size is set
-            if max_history_size is not None:
-                await self.client.execute("""
-                    DELETE FROM conversations
-                    WHERE user_id = ?
-                        AND session_id = ?
-                        AND agent_id = ?
-                        AND message_index <= (
-                            SELECT MAX(message_index) - ?
-                            FROM conversations
-                            WHERE user_id = ?
-                                AND session_id = ?
-                                AND agent_id = ?
-                        )
-                """, [
-                    user_id, session_id, agent_id,
-                    max_history_size,
-                    user_id, session_id, agent_id
-                ])
-
+            timestamped_messages = self._timestamp_messages(new_messages, base_timestamp)
+            saved = await self._insert_with_retry(user_id,
+                                                  session_id,
+                                                  {agent_id: timestamped_messages},
+                                                  max_history_size,
+                                                  base_timestamp)
+
+            if not self.fetch_after_save:
+                return bool(saved)
             # Return updated conversation
             return await self.fetch_chat(user_id, session_id, agent_id)
 
@@ -218,6 +122,174 @@ class SqlChatStorage(ChatStorage):
             Logger.error(f"Error saving messages: {str(error)}")
             raise error
 
+    async def save_session_messages(
+        self,
+        user_id: str,
+        session_id: str,
+        messages_by_agent: dict[str, Union[list[ConversationMessage], list[TimestampedMessage]]],
+        max_history_size: Optional[int] = None
+    ) -> bool:
+        """Save the messages of several agents in a single transaction."""
+        try:
+            base_timestamp = int(time.time() * 1000)
+            timestamped_messages = {
+                agent_id: self._timestamp_messages(messages, base_timestamp)
+                for agent_id, messages in messages_by_agent.items() if messages
+            }
+            if not timestamped_messages:
+                return False
+            saved = await self._insert_with_retry(user_id,
+                                                  session_id,
+                                                  timestamped_messages,
+                                                  max_history_size,
+                                                  base_timestamp)
+            return len(saved) == len(timestamped_messages)
+
+        except Exception as error:
+            Logger.error(f"Error saving messages: {str(error)}")
+            raise error
+
+    def _timestamp_messages(
+        self,
+        messages: Union[list[ConversationMessage], list[TimestampedMessage]],
+        base_timestamp: int
+    ) -> list[TimestampedMessage]:
+        """Timestamp the messages in their order, and validate their content."""
+        timestamped_messages = [
+            TimestampedMessage(role=message.role, content=message.content, timestamp=base_timestamp + i)
+            for i, message in enumerate(messages)
+        ]
+        # Validate all messages first to catch any errors
+        for message in timestamped_messages:
+            self._validate_message_content(message.content)
+        return timestamped_messages
+
+    async def _insert_with_retry(
+        self,
+        user_id: str,
+        session_id: str,
+        messages_by_agent: dict[str, list[TimestampedMessage]],
+        max_history_size: Optional[int],
+        base_timestamp: int
+    ) -> set[str]:
+        for attempt in range(2):
+            try:
+                return await self._insert_messages(user_id,
+                                                   session_id,
+                                                   messages_by_agent,
+                                                   max_history_size,
+                                                   base_timestamp)
+            except LibsqlError as error:
+                # Another writer used the cached index: reload it from the database once
+                if attempt or not error.code.startswith('SQLITE_CONSTRAINT'):
+                    raise error
+        return set()
+
+    async def _insert_messages(
+        self,
+        user_id: str,
+        session_id: str,
+        messages_by_agent: dict[str, list[TimestampedMessage]],
+        max_history_size: Optional[int],
+        base_timestamp: int
+    ) -> set[str]:
+        """
+        Insert the messages and trim the conversations in a single transaction.
+        Returns the IDs of the agents whose messages were saved.
+        """
+        statements = []
+        reserved = {}
+        for agent_id, messages in messages_by_agent.items():
+            agent_statements = await self._insert_statements(user_id,
+                                                             session_id,
+                                                             agent_id,
+                                                             messages,
+                                                             max_history_size,
+                                                             base_timestamp)
+            if agent_statements:
+                statements.extend(agent_statements)
+                reserved[agent_id] = self.last_messages[(user_id, session_id, agent_id)]
+        if not statements:
+            return set()
+
+        try:
+            await self.client.batch(statements)
+        except Exception as error:
+            for agent_id in reserved:
+                self.last_messages.pop((user_id, session_id, agent_id), None)
+            raise error
+        if max_history_size is not None and max_history_size < 1:
+            # The whole conversations were deleted: there is no last role anymore
+            for agent_id, (next_index, _role) in reserved.items():
+                self._remember_last_message((user_id, session_id, agent_id), next_index, None)
+        return set(reserved)
+
+    async def _insert_statements(
+        self,
+        user_id: str,
+        session_id: str,
+        agent_id: str,
+        messages: list[TimestampedMessage],
+        max_history_size: Optional[int],
+        base_timestamp: int
+    ) -> list[Statement]:
+        """Build the statements saving the messages of an agent, and reserve their indexes."""
+        key = (user_id, session_id, agent_id)
+        last_message = self.last_messages.get(key)
+        if last_message is None:
+            # Get next message index and the role of the last stored message
+            result = await self.client.execute("""
+                SELECT message_index, role
+                FROM conversations
+                WHERE user_id = ? AND session_id = ? AND agent_id = ?
+                ORDER BY message_index DESC
+                LIMIT 1
+            """, [user_id, session_id, agent_id])
+            rows = list(result)
+            last_message = self.last_messages.get(key) or (
+                (rows[0]['message_index'] + 1, rows[0]['role']) if rows else (0, None)
+            )
+        next_index, last_role = last_message
+
+        if last_role == messages[0].role:
+            Logger.debug(f"> Consecutive {messages[0].role} message detected for agent {agent_id}. Not saving.")
+            messages = messages[1:]
+            if not messages:
+                return []
+
+        statements = [
+            Statement("""
+                INSERT INTO conversations (
+                    user_id, session_id, agent_id, message_index,
+                    role, content, timestamp
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                user_id, session_id, agent_id, next_index + i,
+                message.role, json.dumps(message.content), message.timestamp or (base_timestamp + i)
+            ])
+            for i, message in enumerate(messages)
+        ]
+
+        # Clean up old messages if max_history_size is set
+        if max_history_size is not None:
+            statements.append(Statement("""
+                DELETE FROM conversations
+                WHERE user_id = ?
+                    AND session_id = ?
+                    AND agent_id = ?
+                    AND message_index <= ?
+            """, [user_id, session_id, agent_id, next_index + len(messages) - 1 - max_history_size]))
+
+        # Reserve the indexes before awaiting, so that concurrent saves do not reuse them
+        self._remember_last_message(key, next_index + len(messages), messages[-1].role)
+        return statements
+
+    def _remember_last_message(self, key: tuple[str, str, str], next_index: int, role: Optional[str]) -> None:
+        self.last_messages[key] = (next_index, role)
+        self.last_messages.move_to_end(key)
+        while len(self.last_messages) > self.MAX_CACHED_CONVERSATIONS:
+            self.last_messages.popitem(last=False)
+
     async def fetch_chat(
         self,
         user_id: str,
@@ -227,27 +299,30 @@ class SqlChatStorage(ChatStorage):
     ) -> list[ConversationMessage]:
         """Fetch chat messages."""
         try:
-            query = """
-                SELECT role, content, timestamp
-                FROM conversations
-                WHERE user_id = ? AND session_id = ? AND agent_id = ?
-                ORDER BY message_index {}
-            """.format('DESC' if max_history_size else 'ASC')
-
-            params = [user_id, session_id, agent_id]
-
-            result = await self.client.execute(query, params)
-            messages = list(result)  # Convert ResultSet to list
-
             if max_history_size:
-                messages = messages[:max_history_size]
-                messages.reverse()
-
+                # Read only the most recent rows, newest first, using the primary key order
+                result = await self.client.execute("""
+                    SELECT role, content
+                    FROM conversations
+                    WHERE user_id = ? AND session_id = ? AND agent_id = ?
+                    ORDER BY message_index DESC
+                    LIMIT ?
+                """, [user_id, session_id, agent_id, max_history_size])
+                rows = reversed(list(result))
+            else:
+                rows = await self.client.execute("""
+                    SELECT role, content
+                    FROM conversations
+                    WHERE user_id = ? AND session_id = ? AND agent_id = ?
+                    ORDER BY message_index ASC
+                """, [user_id, session_id, agent_id])
+
+            # Content is decoded only for the rows that are returned
             return [
                 ConversationMessage(
                     role=msg['role'],
                     content=json.loads(msg['content'])
-                ) for msg in messages
+                ) for msg in rows
             ]
         except Exception as error:
             Logger.error(f"Error fetching chat: {str(error)}")
@@ -281,6 +356,85 @@ class SqlChatStorage(ChatStorage):
             Logger.error(f"Error fetching all chats: {str(error)}")
             raise error
 
+    async def fetch_recent_chats(
+        self,
+        user_id: str,
+        session_id: str,
+        max_messages: int | None = None,
+        max_messages_per_agent: int | None = None
+    ) -> list[ConversationMessage]:
+        """Fetch the most recent chat messages of a session, reading only those rows."""
+        if not max_messages and not max_messages_per_agent:
+            return await self.fetch_all_chats(user_id, session_id)
+        try:
+            # A negative LIMIT means no limit in SQLite
+            limit = max_messages or -1
+            if max_messages_per_agent:
+                result = await self.client.execute("""
+                    SELECT role, content, timestamp, agent_id
+                    FROM (
+                        SELECT role, content, timestamp, agent_id, message_index,
+                            ROW_NUMBER() OVER (
+                                PARTITION BY agent_id ORDER BY message_index DESC
+                            ) AS agent_rank
+                        FROM conversations
+                        WHERE user_id = ? AND session_id = ?
+                    )
+                    WHERE agent_rank <= ?
+                    ORDER BY timestamp DESC, agent_id DESC, message_index DESC
+                    LIMIT ?
+                """, [user_id, session_id, max_messages_per_agent, limit])
+            else:
+                result = await self.client.execute("""
+                    SELECT role, content, timestamp, agent_id
+                    FROM conversations
+                    WHERE user_id = ? AND session_id = ?
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                """, [user_id, session_id, limit])
+
+            return [
+                ConversationMessage(
+                    role=msg['role'],
+                    content=self._format_content(
+                        msg['role'],
+                        json.loads(msg['content']),
+                        msg['agent_id']
+                    )
+                ) for msg in reversed(list(result))
+            ]
+        except Exception as error:
+            Logger.error(f"Error fetching recent chats: {str(error)}")
+            raise error
+
+    async def fetch_session(
+        self,
+        user_id: str,
+        session_id: str
+    ) -> SessionSnapshot:
+        """Fetch every agent conversation of a session with a single query."""
+        try:
+            result = await self.client.execute("""
+                SELECT agent_id, role, content, timestamp
+                FROM conversations
+                WHERE user_id = ? AND session_id = ?
+                ORDER BY agent_id, message_index ASC
+            """, [user_id, session_id])
+
+            conversations: dict[str, list[TimestampedMessage]] = {}
+            for msg in result:
+                conversations.setdefault(msg['agent_id'], []).append(
+                    TimestampedMessage(
+                        role=msg['role'],
+                        content=json.loads(msg['content']),
+                        timestamp=msg['timestamp']
+                    )
+                )
+            return SessionSnapshot(user_id, session_id, conversations)
+        except Exception as error:
+            Logger.error(f"Error fetching session: {str(error)}")
+            raise error
+
     def _format_content(
         self,
         role: str,
@@ -0,0 +1,294 @@
+from typing import Optional, Union, Callable, Awaitable, Hashable
+from collections import OrderedDict
+from multi_agent_orchestrator.storage import ChatStorage, SessionSnapshot
+from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage
+from multi_agent_orchestrator.utils import Logger
+
+ConversationKey = tuple[str, str, str]
+SessionKey = tuple[str, str]
+
+
+class TieredChatStorage(ChatStorage):
+    """
+    Chat storage that keeps a local LRU cache of conversations in front of a durable storage.
+
+    Reads are served from memory and go to the durable storage on a miss (read-through).
+    A miss loads the whole session with fetch_session when the storage supports it, so the
+    other agents of the session are cached by the same read. Writes are sent to the durable
+    storage first, then applied to the cached conversation (write-through).
+
+    The cache is local to the process. When several processes write the same sessions,
+    pass a version_provider returning a value that changes whenever a session is written:
+    cached entries loaded with another version are considered stale and reloaded. To keep
+    the cache across its own writes, the version must be a counter incremented by each write
+    to the durable storage: after a write, the cache is kept only if the counter moved by
+    one, and invalidated if another process wrote the session too. With other versions,
+    each write invalidates the session.
+    """
+    def __init__(self,
+                 storage: ChatStorage,
+                 max_conversations: int = 10000,
+                 version_provider: Optional[Callable[[str, str], Awaitable[Hashable]]] = None):
+        """
+        Args:
+            storage: The durable storage.
+            max_conversations: Maximum number of agent conversations kept in memory.
+            version_provider: Optional coroutine function returning the current version of
+                a session, from its user ID and session ID, preferably a write counter.
+        """
+        super().__init__()
+        self.storage = storage
+        self.max_conversations = max_conversations
+        self.version_provider = version_provider
+        # (user_id, session_id, agent_id) -> messages, from the least to the most recently used
+        self.conversations: OrderedDict[ConversationKey, list[TimestampedMessage]] = OrderedDict()
+        self.session_agents: dict[SessionKey, set[str]] = {}
+        # Sessions whose every agent conversation is cached
+        self.complete_sessions: set[SessionKey] = set()
+        self.versions: dict[SessionKey, Hashable] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def save_chat_message(self,
+                                user_id: str,
+                                session_id: str,
+                                agent_id: str,
+                                new_message: Union[ConversationMessage, TimestampedMessage],
+                                max_history_size: Optional[int] = None) -> bool:
+        try:
+            result = await self.storage.save_chat_message(user_id,
+                                                          session_id,
+                                                          agent_id,
+                                                          new_message,
+                                                          max_history_size)
+        except Exception as error:
+            self.invalidate_session(user_id, session_id)
+            raise error
+        if await self._check_own_write(user_id, session_id):
+            self._apply_saved_messages(user_id, session_id, agent_id, [new_message], max_history_size)
+        return result
+
+    async def save_chat_messages(self,
+                                 user_id: str,
+                                 session_id: str,
+                                 agent_id: str,
+                                 new_messages: Union[list[ConversationMessage], list[TimestampedMessage]],
+                                 max_history_size: Optional[int] = None) -> bool:
+        try:
+            result = await self.storage.save_chat_messages(user_id,
+                                                           session_id,
+                                                           agent_id,
+                                                           new_messages,
+                                                           max_history_size)
+        except Exception as error:
+            self.invalidate_session(user_id, session_id)
+            raise error
+        if await self._check_own_write(user_id, session_id):
+            self._apply_saved_messages(user_id, session_id, agent_id, new_messages, max_history_size)
+        return result
+
+    async def save_session_messages(self,
+                                    user_id: str,
+                                    session_id: str,
+                                    messages_by_agent: dict[str, Union[list[ConversationMessage], list[TimestampedMessage]]],
+                                    max_history_size: Optional[int] = None) -> bool:
+        try:
+            result = await self.storage.save_session_messages(user_id,
+                                                              session_id,
+                                                              messages_by_agent,
+                                                              max_history_size)
+        except Exception as error:
+            self.invalidate_session(user_id, session_id)
+            raise error
+        if await self._check_own_write(user_id, session_id):
+            for agent_id, new_messages in messages_by_agent.items():
+                self._apply_saved_messages(user_id, session_id, agent_id, new_messages, max_history_size)
+        return result
+
+    async def fetch_chat(self,
+                         user_id: str,
+                         session_id: str,
+                         agent_id: str,
+                         max_history_size: Optional[int] = None) -> list[ConversationMessage]:
+        await self._check_version(user_id, session_id)
+        key = (user_id, session_id, agent_id)
+        # An agent missing from a complete session has no conversation yet
+        if key in self.conversations or (user_id, session_id) in self.complete_sessions:
+            self.hits += 1
+        else:
+            self.misses += 1
+            await self._load(user_id, session_id, agent_id)
+        conversation = self._get(key)
+        if max_history_size is not None:
+            conversation = self.trim_conversation(conversation, max_history_size)
+        return [ConversationMessage(role=message.role, content=message.content) for message in conversation]
+
+    async def fetch_all_chats(self, user_id: str, session_id: str) -> list[ConversationMessage]:
+        snapshot = await self.fetch_session(user_id, session_id)
+        if snapshot is None:
+            return await self.storage.fetch_all_chats(user_id, session_id)
+        return snapshot.all_chats()
+
+    async def fetch_recent_chats(self,
+                                 user_id: str,
+                                 session_id: str,
+                                 max_messages: Optional[int] = None,
+                                 max_messages_per_agent: Optional[int] = None) -> list[ConversationMessage]:
+        snapshot = await self.fetch_session(user_id, session_id)
+        if snapshot is None:
+            return await self.storage.fetch_recent_chats(user_id, session_id, max_messages, max_messages_per_agent)
+        return snapshot.all_chats(max_messages, max_messages_per_agent)
+
+    async def fetch_session(self, user_id: str, session_id: str) -> Optional[SessionSnapshot]:
+        await self._check_version(user_id, session_id)
+        session_key = (user_id, session_id)
+        if session_key in self.complete_sessions:
+            self.hits += 1
+        else:
+            self.misses += 1
+            if not await self._load(user_id, session_id):
+                return None
+        conversations = {
+            agent_id: list(self._get((user_id, session_id, agent_id)))
+            for agent_id in self.session_agents.get(session_key, ())
+        }
+        return SessionSnapshot(user_id, session_id, conversations)
+
+    def invalidate_session(self, user_id: str, session_id: str) -> None:
+        """
+        Drop the cached conversations of a session, which are read again from the
+        durable storage on the next access.
+
+        Args:
+            user_id (str): The user ID.
+            session_id (str): The session ID.
+        """
+        session_key = (user_id, session_id)
+        for agent_id in self.session_agents.pop(session_key, ()):
+            self.conversations.pop((user_id, session_id, agent_id), None)
+        self.complete_sessions.discard(session_key)
+        self.versions.pop(session_key, None)
+
+    def get_metrics(self) -> dict[str, int]:
+        """
+        Return the cache hits and misses and the number of cached conversations.
+
+        Returns:
+            dict[str, int]: The cache metrics.
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'conversations': len(self.conversations),
+        }
+
+    async def close(self) -> None:
+        """Close the durable storage, if it needs to be closed."""
+        close = getattr(self.storage, 'close', None)
+        if close:
+            await close()
+
+    async def _load(self, user_id: str, session_id: str, agent_id: Optional[str] = None) -> bool:
+        """
+        Read a session from the durable storage into the cache.
+        Returns False if the storage cannot load whole sessions, in which case only
+        the given agent conversation is cached.
+        """
+        version = await self.version_provider(user_id, session_id) if self.version_provider else None
+        snapshot = await self.storage.fetch_session(user_id, session_id)
+        if snapshot is None:
+            if agent_id is not None:
+                messages = await self.storage.fetch_chat(user_id, session_id, agent_id)
+                self._put((user_id, session_id, agent_id), [
+                    TimestampedMessage(role=message.role, content=message.content) for message in messages
+                ])
+            return False
+
+        self.invalidate_session(user_id, session_id)
+        for loaded_agent_id, messages in snapshot.conversations.items():
+            self._put((user_id, session_id, loaded_agent_id), list(messages))
+        if agent_id is not None and agent_id not in snapshot.conversations:
+            self._put((user_id, session_id, agent_id), [])
+        if self.version_provider:
+            self.versions[(user_id, session_id)] = version
+        # A session larger than the cache cannot be served from memory
+        if all((user_id, session_id, loaded_agent_id) in self.conversations
+               for loaded_agent_id in snapshot.conversations):
+            self.complete_sessions.add((user_id, session_id))
+        return True
+
+    def _apply_saved_messages(self,
+                                    user_id: str,
+                                    session_id: str,
+                                    agent_id: str,
+                                    new_messages: Union[list[ConversationMessage], list[TimestampedMessage]],
+                                    max_history_size: Optional[int]) -> None:
+        """Apply messages saved to the durable storage to the cached conversation, with the same rules."""
+        key = (user_id, session_id, agent_id)
+        session_key = (user_id, session_id)
+        if key in self.conversations:
+            conversation = self.conversations[key]
+        elif session_key in self.complete_sessions:
+            conversation = []
+        else:
+            return
+
+        if new_messages and self.is_same_role_as_last_message(conversation, new_messages[0]):
+            Logger.debug(f"> Consecutive {new_messages[0].role} \
+                       message detected for agent {agent_id}. Not caching.")
+            new_messages = new_messages[1:]
+        conversation.extend(
+            message if isinstance(message, TimestampedMessage)
+            else TimestampedMessage(role=message.role, content=message.content)
+            for message in new_messages
+        )
+        self._put(key, self.trim_conversation(conversation, max_history_size))
+
+    async def _check_own_write(self, user_id: str, session_id: str) -> bool:
+        """
+        Adopt the version of a session after a write to the durable storage, if only this write
+        changed it. Otherwise, such as when another process wrote the session between the write
+        and the version read, the session is invalidated.
+        Returns whether the saved messages can be applied to the cached session.
+        """
+        session_key = (user_id, session_id)
+        if not self.version_provider or session_key not in self.versions:
+            return True
+        version = await self.version_provider(user_id, session_id)
+        cached_version = self.versions[session_key]
+        if isinstance(cached_version, int) and version == cached_version + 1:
+            self.versions[session_key] = version
+            return True
+        Logger.debug(f"> Session {session_id} of user {user_id} written by another process. Invalidating.")
+        self.invalidate_session(user_id, session_id)
+        return False
+
+    async def _check_version(self, user_id: str, session_id: str) -> None:
+        """Invalidate the cached session if it was written by another process."""
+        session_key = (user_id, session_id)
+        if not self.version_provider or session_key not in self.versions:
+            return
+        if await self.version_provider(user_id, session_id) != self.versions[session_key]:
+            Logger.debug(f"> Stale cached session {session_id} of user {user_id}. Reloading.")
+            self.invalidate_session(user_id, session_id)
+
+    def _get(self, key: ConversationKey) -> list[TimestampedMessage]:
+        conversation = self.conversations.get(key, [])
+        if key in self.conversations:
+            self.conversations.move_to_end(key)
+        return conversation
+
+    def _put(self, key: ConversationKey, conversation: list[TimestampedMessage]) -> None:
+        self.conversations[key] = conversation
+        self.conversations.move_to_end(key)
+        self.session_agents.setdefault(key[:2], set()).add(key[2])
+        while len(self.conversations) > self.max_conversations:
+            evicted_key, _ = self.conversations.popitem(last=False)
+            evicted_session = evicted_key[:2]
+            agents = self.session_agents.get(evicted_session)
+            if agents is not None:
+                agents.discard(evicted_key[2])
+                if not agents:
+                    del self.session_agents[evicted_session]
+            # The session cannot be served from memory anymore
+            self.complete_sessions.discard(evicted_session)
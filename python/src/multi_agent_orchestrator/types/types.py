@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import TypedDict, Optional, Any
+from typing import TypedDict, Optional, Any, Callable
 from dataclasses import dataclass
 import time
 
@@ -41,6 +41,8 @@ class ParticipantRole(Enum):
 
 
 class ConversationMessage:
+    __slots__ = ('role', 'content')
+
     role: ParticipantRole
     content: list[Any]
 
@@ -49,6 +51,8 @@ class ConversationMessage:
         self.content = content
 
 class TimestampedMessage(ConversationMessage):
+    __slots__ = ('timestamp',)
+
     def __init__(self,
                  role: ParticipantRole,
                  content: Optional[list[Any]] = None,
@@ -71,4 +75,21 @@ class OrchestratorConfig:
     NO_SELECTED_AGENT_MESSAGE: str = "I'm sorry, I couldn't determine how to handle your request.\
     Could you please rephrase it?"  # pylint: disable=invalid-name
     GENERAL_ROUTING_ERROR_MSG_MESSAGE: str = None
-    MAX_MESSAGE_PAIRS_PER_AGENT: int = 100  # pylint: disable=invalid-name
\ No newline at end of file
+    MAX_MESSAGE_PAIRS_PER_AGENT: int = 100  # pylint: disable=invalid-name
+    PREFETCH_AGENT_HISTORY: bool = False    # pylint: disable=invalid-name
+    USE_SESSION_SNAPSHOT: bool = False  # pylint: disable=invalid-name
+    WRITE_BEHIND_MESSAGES: bool = False # pylint: disable=invalid-name
+    WAIT_FOR_MESSAGE_WRITES: bool = True    # pylint: disable=invalid-name
+    CLASSIFICATION_CACHE_SIZE: int = 0  # pylint: disable=invalid-name
+    CLASSIFICATION_CACHE_TTL: float = 300   # pylint: disable=invalid-name
+    STICKY_AGENT_MAX_WORDS: int = 0 # pylint: disable=invalid-name
+    CLASSIFIER_HISTORY_MAX_TURNS: int = 0   # pylint: disable=invalid-name
+    CLASSIFIER_HISTORY_MAX_MESSAGES_PER_AGENT: int = 0  # pylint: disable=invalid-name
+    CLASSIFIER_HISTORY_MAX_CHARS: int = 0   # pylint: disable=invalid-name
+    # Speculative routing needs a classifier ranking several candidates with classify_candidates.
+    # Of the built-in classifiers, only the EmbeddingClassifier does: the LLM classifiers select
+    # a single agent, so requests they classify are never dispatched speculatively.
+    SPECULATIVE_TOP_K: int = 0  # pylint: disable=invalid-name
+    SPECULATIVE_CONFIDENCE_THRESHOLD: float = 0.8   # pylint: disable=invalid-name
+    SPECULATIVE_SCORER: Optional[Callable[[Any, ConversationMessage], float]] = None  # pylint: disable=invalid-name
+    SPECULATIVE_MIN_SCORE: Optional[float] = None   # pylint: disable=invalid-name
\ No newline at end of file
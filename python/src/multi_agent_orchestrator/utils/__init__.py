@@ -1,12 +1,20 @@
 """Module for importing helper functions and Logger."""
-from .helpers import is_tool_input, conversation_to_dict
+from .helpers import is_tool_input, conversation_to_dict, iterate_in_executor
 from .logger import Logger
+from .http_clients import (HttpClientMetrics, get_shared_http_client, get_default_http_client,
+                           get_http_client_metrics, close_shared_http_clients)
 from .tool import AgentTool, AgentTools
 
 __all__ = [
     'is_tool_input',
     'conversation_to_dict',
+    'iterate_in_executor',
     'Logger',
+    'HttpClientMetrics',
+    'get_shared_http_client',
+    'get_default_http_client',
+    'get_http_client_metrics',
+    'close_shared_http_clients',
     'AgentTool',
     'AgentTools',
 ]
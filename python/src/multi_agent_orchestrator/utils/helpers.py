@@ -1,9 +1,14 @@
 """
 Helpers method
 """
-from typing import Any
+from typing import Any, AsyncIterator, Callable, Iterable, Optional, TypeVar
+from concurrent.futures import Executor
+import asyncio
+import threading
 from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage
 
+T = TypeVar('T')
+
 def is_tool_input(input_obj: Any) -> bool:
     """Check if the input object is a tool input."""
     return (
@@ -32,3 +37,40 @@ def message_to_dict(message: ConversationMessage | TimestampedMessage) -> dict[s
     if isinstance(message, TimestampedMessage):
         result["timestamp"] = message.timestamp
     return result
+
+async def iterate_in_executor(executor: Optional[Executor], iterable_factory: Callable[[], Iterable[T]]) -> AsyncIterator[T]:
+    """
+    Iterate a blocking iterable, such as a boto3 event stream, on an executor thread.
+    Items are passed to the event loop through a queue as soon as they are read,
+    so the loop keeps serving other requests while the stream is open.
+    The iterable is created by iterable_factory on the executor thread too.
+    Pass None as executor to use the default executor of the loop.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    end = object()
+    stopped = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in iterable_factory():
+                if stopped.is_set():
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as error:
+            loop.call_soon_threadsafe(queue.put_nowait, (end, error))
+        else:
+            loop.call_soon_threadsafe(queue.put_nowait, (end, None))
+
+    loop.run_in_executor(executor, produce)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Stop reading the stream if the consumer stops early
+        stopped.set()
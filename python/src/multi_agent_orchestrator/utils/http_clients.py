@@ -0,0 +1,134 @@
+"""Async HTTP clients shared by the model clients of the agents and classifiers."""
+from typing import Any, Callable, Optional
+from weakref import WeakKeyDictionary
+import asyncio
+
+# Emitted by the connection pool of httpx when it opens a new TCP connection
+CONNECT_EVENT = 'connection.connect_tcp.complete'
+
+
+class HttpClientMetrics:
+    """
+    Requests sent by a shared HTTP client and connections it opened.
+
+    Connections are counted through the trace extension of the httpx requests,
+    so a request sent on a kept-alive connection counts as reused.
+    """
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+
+    async def on_request(self, request: Any) -> None:
+        """httpx request event hook."""
+        self.requests += 1
+        trace = request.extensions.get('trace')
+
+        async def count_connections(event_name: str, info: dict) -> None:
+            if event_name == CONNECT_EVENT:
+                self.connections += 1
+            if trace:
+                await trace(event_name, info)
+
+        request.extensions['trace'] = count_connections
+
+    @property
+    def reused(self) -> int:
+        """Number of requests sent on an already open connection."""
+        return max(self.requests - self.connections, 0)
+
+    def to_dict(self) -> dict[str, int]:
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'reused': self.reused,
+        }
+
+
+# The shared clients of each event loop: httpx clients are bound to the loop of their first
+# requests, so a process running several loops, such as a Lambda function calling
+# asyncio.run per invocation, gets one client per loop
+_shared_clients: WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, tuple[Any, HttpClientMetrics]]] = \
+    WeakKeyDictionary()
+
+
+def get_shared_http_client(name: str, factory: Callable[..., Any]) -> Any:
+    """
+    Return the async HTTP client shared by the model clients of a provider on the running
+    event loop, so that they reuse the same connection pool instead of opening their own.
+
+    Must be called from a coroutine, as the client is bound to the running event loop.
+
+    Args:
+        name (str): The provider name, such as 'anthropic'.
+        factory (Callable[..., Any]): Creates the httpx.AsyncClient from keyword
+            arguments, such as anthropic.DefaultAsyncHttpxClient.
+
+    Returns:
+        Any: The shared httpx.AsyncClient.
+    """
+    clients = _shared_clients.setdefault(asyncio.get_running_loop(), {})
+    shared = clients.get(name)
+    if shared is None or shared[0].is_closed:
+        metrics = HttpClientMetrics()
+        client = factory(event_hooks={'request': [metrics.on_request]})
+        shared = clients[name] = (client, metrics)
+    return shared[0]
+
+
+# The loop-independent HTTP clients of the providers, see get_default_http_client
+_default_clients: dict[str, Any] = {}
+
+
+def get_default_http_client(name: str, factory: type) -> Any:
+    """
+    Return the HTTP client the default model clients of a provider are created with.
+
+    It sends each request on the client returned by get_shared_http_client for the running
+    event loop, so it can be created without a running event loop, when the agents and
+    classifiers are built, and be used from every loop of the process.
+
+    Args:
+        name (str): The provider name, such as 'anthropic'.
+        factory (type): The httpx.AsyncClient class of the provider,
+            such as anthropic.DefaultAsyncHttpxClient.
+
+    Returns:
+        Any: An instance of factory forwarding its requests to the shared client.
+    """
+    client = _default_clients.get(name)
+    if client is None or client.is_closed:
+        class LoopSharedHttpClient(factory):
+            async def send(self, request: Any, **kwargs: Any) -> Any:
+                return await get_shared_http_client(name, factory).send(request, **kwargs)
+
+        client = _default_clients[name] = LoopSharedHttpClient()
+    return client
+
+
+def get_http_client_metrics(name: Optional[str] = None) -> dict[str, Any]:
+    """
+    Return the connection reuse metrics of the shared HTTP clients, summed over the event loops.
+
+    Args:
+        name (Optional[str]): Only return the metrics of this provider.
+
+    Returns:
+        dict[str, Any]: The metrics of each provider, or of the given provider.
+    """
+    totals: dict[str, HttpClientMetrics] = {}
+    for clients in list(_shared_clients.values()):
+        for provider, (_client, metrics) in clients.items():
+            total = totals.setdefault(provider, HttpClientMetrics())
+            total.requests += metrics.requests
+            total.connections += metrics.connections
+    if name is not None:
+        return totals.get(name, HttpClientMetrics()).to_dict()
+    return {provider: metrics.to_dict() for provider, metrics in totals.items()}
+
+
+async def close_shared_http_clients() -> None:
+    """Close the shared HTTP clients of the running event loop. New ones are created on the next use."""
+    clients = _shared_clients.pop(asyncio.get_running_loop(), {})
+    while clients:
+        _name, (client, _metrics) = clients.popitem()
+        await client.aclose()
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock, call
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
@@ -56,11 +57,22 @@ def test_client(mock_anthropic):
     except Exception as e:
         assert(str(e) == "If streaming is enabled, the provided client must be an AsyncAnthropic client")
 
+    # The async client is used for single responses too
+    options = AnthropicAgentOptions(
+        name="TestAgent",
+        description="A test agent",
+        client=AsyncAnthropic(),
+        streaming=False
+
+    )
+    _anthropic_llm_agent = AnthropicAgent(options)
+    assert isinstance(_anthropic_llm_agent.client, AsyncAnthropic)
+
     try:
         options = AnthropicAgentOptions(
             name="TestAgent",
             description="A test agent",
-            client=AsyncAnthropic(),
+            client=MagicMock(),
             streaming=False
 
         )
@@ -68,7 +80,7 @@ def test_client(mock_anthropic):
         _anthropic_llm_agent = AnthropicAgent(options)
         assert False, "Should have raised an exception"
     except Exception as e:
-        assert(str(e) == "If streaming is disabled, the provided client must be an Anthropic client")
+        assert(str(e) == "The provided client must be an AsyncAnthropic or Anthropic client")
 
     options = AnthropicAgentOptions(
         name="TestAgent",
@@ -768,4 +780,27 @@ async def test_handle_streaming_with_tool_use():
     anthropic_agent._process_tool_block.assert_called_once()
 
     # Verify the messages list was updated with the tool response
-    assert input_data["messages"][-1] == tool_response
\ No newline at end of file
+    assert input_data["messages"][-1] == tool_response
+
+@pytest.mark.asyncio
+async def test_single_responses_use_async_client():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def create(**kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return MagicMock(content=[MagicMock(type="text", text="Test response")])
+
+    client = AsyncAnthropic(api_key='test-api-key')
+    agent = AnthropicAgent(AnthropicAgentOptions(name="TestAgent", description="A test agent", client=client))
+    with patch.object(client.messages, 'create', side_effect=create):
+        responses = await asyncio.gather(*(agent.process_request('Test prompt', 'user', f'session{i}', [], {})
+                                           for i in range(5)))
+
+    assert [response.content[0]['text'] for response in responses] == ["Test response"] * 5
+    # The requests were sent concurrently, without blocking the event loop
+    assert max_in_flight == 5
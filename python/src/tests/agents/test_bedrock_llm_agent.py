@@ -1,3 +1,6 @@
+import asyncio
+import threading
+import time
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from typing import AsyncIterable
@@ -494,4 +497,95 @@ def test_client_provided(client_fixture):
     )
 
     agent = BedrockLLMAgent(options)
-    assert agent.client is client_fixture
\ No newline at end of file
+    assert agent.client is client_fixture
+
+class SlowBedrockClient:
+    """Stub of the bedrock-runtime client whose calls block like network round trips."""
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def _call(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+
+    def converse(self, **kwargs):
+        self._call()
+        return {'output': {'message': {'role': 'assistant', 'content': [{'text': 'Response'}]}}}
+
+    def converse_stream(self, **kwargs):
+        def stream():
+            yield {'messageStart': {'role': 'assistant'}}
+            for word in ('Hello', ' world'):
+                self._call()
+                yield {'contentBlockDelta': {'delta': {'text': word}}}
+            yield {'contentBlockStop': {}}
+        return {'stream': stream()}
+
+
+async def measure_throughput(agent, requests):
+    start = time.perf_counter()
+    await asyncio.gather(*(agent.process_request("Question", "user", f"session{i}", []) for i in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_do_not_block_event_loop(mock_boto3_client):
+    """Throughput scales with the requests in flight, up to max_pool_connections"""
+    client = SlowBedrockClient(latency=0.1)
+    agent = BedrockLLMAgent(BedrockLLMAgentOptions(name="TestAgent", description="A test agent",
+                                                   client=client, max_pool_connections=8))
+
+    single = await measure_throughput(agent, 1)
+    concurrent = await measure_throughput(agent, 8)
+
+    assert 4 <= client.max_in_flight <= 8
+    # Blocking calls would run one after the other, at the single request throughput
+    assert concurrent > 2 * single
+
+    many = await measure_throughput(agent, 16)
+    assert client.max_in_flight <= 8
+    assert many < 1.5 * concurrent
+
+
+@pytest.mark.asyncio
+async def test_streaming_chunks_are_bridged_to_event_loop(mock_boto3_client):
+    client = SlowBedrockClient(latency=0.05)
+    agent = BedrockLLMAgent(BedrockLLMAgentOptions(name="TestAgent", description="A test agent",
+                                                   client=client, streaming=True))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker_task = asyncio.create_task(ticker())
+    chunks = [chunk async for chunk in agent.handle_streaming_response({})]
+    ticker_task.cancel()
+
+    assert [chunk.text for chunk in chunks[:2]] == ['Hello', ' world']
+    assert chunks[-1].final_message.content == [{'text': 'Hello world'}]
+    # The loop kept running while the stream was read
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_close_releases_executor_threads(mock_boto3_client):
+    def agent_threads():
+        return [thread for thread in threading.enumerate() if thread.name.startswith('bedrock-llm-agent')]
+    threads_before = len(agent_threads())
+    agent = BedrockLLMAgent(BedrockLLMAgentOptions(name="TestAgent", description="A test agent",
+                                                   client=SlowBedrockClient(latency=0.01), max_pool_connections=4))
+    await measure_throughput(agent, 4)
+    assert len(agent_threads()) > threads_before
+
+    await agent.close()
+    assert len(agent_threads()) == threads_before
@@ -1,8 +1,12 @@
+import asyncio
+import time
 import pytest
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from unittest.mock import Mock, AsyncMock, patch
 from typing import AsyncIterable
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
 from multi_agent_orchestrator.agents import OpenAIAgent, OpenAIAgentOptions, AgentStreamResponse
+from multi_agent_orchestrator.classifiers import OpenAIClassifier, OpenAIClassifierOptions
 
 @pytest.fixture
 def mock_openai_client():
@@ -171,3 +175,85 @@ def test_is_streaming_enabled(openai_agent):
     openai_agent.streaming = True
     assert openai_agent.is_streaming_enabled()
 
+
+
+class MockChunk:
+    def __init__(self, content):
+        self.choices = [Mock()]
+        self.choices[0].delta = Mock()
+        self.choices[0].delta.content = content
+
+
+@pytest.mark.asyncio
+async def test_async_client_streams_are_multiplexed():
+    client = AsyncOpenAI(api_key="test-api-key")
+    events = []
+
+    async def create(**request_options):
+        name = request_options['messages'][-1]['content']
+
+        async def stream():
+            for word in ("one ", "two ", "three"):
+                events.append(name)
+                await asyncio.sleep(0.01)
+                yield MockChunk(word)
+        return stream()
+
+    # One client shared by both agents
+    agents = [OpenAIAgent(OpenAIAgentOptions(name=f"Agent{i}", description="A test agent",
+                                             client=client, streaming=True)) for i in range(2)]
+
+    async def collect(agent, name):
+        stream = await agent.process_request(name, "user", "session", [])
+        return [chunk async for chunk in stream]
+
+    with patch.object(client.chat.completions, 'create', side_effect=create):
+        results = await asyncio.gather(collect(agents[0], "first"), collect(agents[1], "second"))
+
+    for chunks in results:
+        assert [chunk.text for chunk in chunks[:-1]] == ["one ", "two ", "three"]
+        assert chunks[-1].final_message.content[0]['text'] == "one two three"
+    # Both streams progressed at the same time
+    assert events[:2] == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_sync_client_stream_does_not_block_event_loop(openai_agent, mock_openai_client):
+    openai_agent.streaming = True
+
+    def stream():
+        for word in ("one ", "two "):
+            time.sleep(0.05)
+            yield MockChunk(word)
+    mock_openai_client.chat.completions.create.side_effect = lambda **kwargs: stream()
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker_task = asyncio.create_task(ticker())
+    result = await openai_agent.process_request("Test question", "test_user", "test_session", [])
+    chunks = [chunk async for chunk in result]
+    ticker_task.cancel()
+
+    assert chunks[-1].final_message.content[0]['text'] == "one two "
+    assert ticks >= 10
+
+
+def test_http_client_option():
+    # Built without a running event loop, the default clients still share their connections
+    agents = [OpenAIAgent(OpenAIAgentOptions(name=f"Agent{i}", description="A test agent", api_key="test-api-key"))
+              for i in range(2)]
+    classifier = OpenAIClassifier(OpenAIClassifierOptions(api_key="test-api-key"))
+    assert all(isinstance(agent.client, AsyncOpenAI) for agent in agents)
+    assert agents[0].client._client is agents[1].client._client is classifier.client._client
+
+    http_client = DefaultAsyncHttpxClient()
+    agents = [OpenAIAgent(OpenAIAgentOptions(name=f"Agent{i}", description="A test agent", api_key="test-api-key",
+                                             http_client=http_client))
+              for i in range(2)]
+    assert all(agent.client._client is http_client for agent in agents)
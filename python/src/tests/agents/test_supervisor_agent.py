@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import asyncio
+import random
+import time
 from typing import List
 
 from multi_agent_orchestrator.agents import (
@@ -8,9 +10,12 @@ from multi_agent_orchestrator.agents import (
     SupervisorAgentOptions,
     BedrockLLMAgent,
     BedrockLLMAgentOptions,
-    Agent
+    Agent,
+    AgentStreamResponse
 )
 from multi_agent_orchestrator.storage import InMemoryChatStorage
+from multi_agent_orchestrator.orchestrator import MultiAgentOrchestrator
+from multi_agent_orchestrator.classifiers import ClassifierResult
 from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
 from multi_agent_orchestrator.utils import AgentTools, AgentTool, Logger
 
@@ -127,13 +132,14 @@ async def test_supervisor_agent_validation(mock_boto3_client):
             team=[]
         ))
 
-def test_send_message(supervisor_agent, mock_boto3_client):
+@pytest.mark.asyncio
+async def test_send_message(supervisor_agent, mock_boto3_client):
     """Test send_message functionality"""
     agent = MockBedrockLLMAgent(BedrockLLMAgentOptions(
         name="Test Agent",
         description="Test agent"
     ))
-    response = supervisor_agent.send_message(
+    response = await supervisor_agent.send_message(
         agent=agent,
         content="Test message",
         user_id="test_user",
@@ -386,3 +392,369 @@ async def test_supervisor_agent_memory_management(mock_boto3_client):
 
     response = await agent.process_request(input_text, user_id, session_id, [])
     history = await agent.storage.fetch_all_chats(user_id, session_id)
+
+
+class ConcurrentLeadAgent(BedrockLLMAgent):
+    """Yields to the other requests, then builds its prompt and messages the team."""
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        await asyncio.sleep(random.random() / 100)
+        system_prompt = await self._prepare_system_prompt(input_text)
+        await asyncio.sleep(random.random() / 100)
+        team_response = await self.tool_config['tool'].tools[0].func(
+            messages=[{'recipient': 'Team Member', 'content': input_text}]
+        )
+        return ConversationMessage(
+            role=ParticipantRole.ASSISTANT.value,
+            content=[{"text": system_prompt}, {"text": team_response}]
+        )
+
+
+class RecordingTeamMember(MockBedrockLLMAgent):
+    def __init__(self, options):
+        super().__init__(options)
+        self.requests = []
+
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        self.requests.append((input_text, user_id, session_id, additional_params))
+        return await super().process_request()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_isolated(mock_boto3_client):
+    """A shared supervisor serving concurrent requests keeps their prompts and identifiers apart"""
+    team_member = RecordingTeamMember(BedrockLLMAgentOptions(name="Team Member", description="Test team member"))
+    storage = InMemoryChatStorage()
+    agent = SupervisorAgent(SupervisorAgentOptions(
+        name="SupervisorAgent",
+        description="My Supervisor agent description",
+        lead_agent=ConcurrentLeadAgent(BedrockLLMAgentOptions(name="Supervisor", description="Test lead_agent")),
+        team=[team_member],
+        storage=storage
+    ))
+    users = [f"user{i}" for i in range(50)]
+    for user_id in users:
+        await storage.save_chat_messages(user_id, "session", "team-member", [
+            ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": f"Memory of {user_id}"}]),
+            ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": "Noted"}]),
+        ])
+
+    responses = await asyncio.gather(*(
+        agent.process_request(f"Question of {user_id}", user_id, "session", [], {"user": user_id})
+        for user_id in users
+    ))
+
+    for user_id, response in zip(users, responses):
+        system_prompt = response.content[0]["text"]
+        assert f"Memory of {user_id}\n" in system_prompt
+        assert system_prompt.count("Memory of") == 1
+        assert "{{AGENTS_MEMORY}}" not in system_prompt
+    assert sorted(team_member.requests) == sorted(
+        (f"Question of {user_id}", user_id, "session", {"user": user_id}) for user_id in users
+    )
+    assert "{{AGENTS_MEMORY}}" in agent.lead_agent.prompt_template
+
+
+class TrackingTeamMember(MockBedrockLLMAgent):
+    """Records the event loop and the concurrency of the requests it processes."""
+    in_flight = 0
+    max_in_flight = 0
+
+    def __init__(self, options, delay=0.02, error=None):
+        super().__init__(options)
+        self.delay = delay
+        self.error = error
+        self.loops = set()
+
+    async def process_request(self, *args, **kwargs):
+        cls = TrackingTeamMember
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        self.loops.add(asyncio.get_running_loop())
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return await super().process_request(*args, **kwargs)
+        finally:
+            cls.in_flight -= 1
+
+
+def make_supervisor(team, **options):
+    return SupervisorAgent(SupervisorAgentOptions(
+        name="SupervisorAgent",
+        description="My Supervisor agent description",
+        lead_agent=MockBedrockLLMAgent(BedrockLLMAgentOptions(name="Supervisor", description="Test lead_agent")),
+        team=team,
+        storage=InMemoryChatStorage(),
+        **options
+    ))
+
+
+@pytest.mark.asyncio
+async def test_send_messages_runs_team_on_caller_loop_with_concurrency_limit(mock_boto3_client):
+    TrackingTeamMember.max_in_flight = 0
+    team = [TrackingTeamMember(BedrockLLMAgentOptions(name=f"Agent{i}", description=f"Test agent {i}"))
+            for i in range(6)]
+    agent = make_supervisor(team, max_concurrency=2)
+
+    response = await agent.send_messages([
+        {"recipient": f"Agent{i}", "content": f"Test message {i}"} for i in range(6)
+    ])
+
+    assert response.count("Mock response") == 6
+    assert TrackingTeamMember.max_in_flight == 2
+    assert all(member.loops == {asyncio.get_running_loop()} for member in team)
+    # The exchanges are saved on the same loop
+    assert len(await agent.storage.fetch_chat("", "", "agent5")) == 2
+
+
+@pytest.mark.asyncio
+async def test_send_messages_returns_partial_results(mock_boto3_client):
+    team = [
+        TrackingTeamMember(BedrockLLMAgentOptions(name="Fast", description="Fast agent")),
+        TrackingTeamMember(BedrockLLMAgentOptions(name="Slow", description="Slow agent"), delay=5),
+        TrackingTeamMember(BedrockLLMAgentOptions(name="Broken", description="Broken agent"),
+                           error=Exception("Service unavailable")),
+    ]
+    agent = make_supervisor(team, agent_timeout=0.1)
+
+    start_time = asyncio.get_running_loop().time()
+    response = await agent.send_messages([
+        {"recipient": name, "content": "Test message"} for name in ("Fast", "Slow", "Broken")
+    ])
+
+    assert asyncio.get_running_loop().time() - start_time < 1
+    assert "Fast: Mock response" in response
+    assert "Slow: No response within 0.1 seconds." in response
+    assert "Broken: Failed to respond (Service unavailable)." in response
+    # The abandoned exchange is not saved
+    assert await agent.storage.fetch_chat("", "", "slow") == []
+
+
+def test_max_concurrency_validation(mock_boto3_client):
+    with pytest.raises(ValueError, match="max_concurrency must be at least 1"):
+        make_supervisor([], max_concurrency=0)
+
+
+class StreamingTeamMember(MockBedrockLLMAgent):
+    """Streams its response token by token."""
+    def is_streaming_enabled(self):
+        return True
+
+    async def process_request(self, *args, **kwargs):
+        async def stream():
+            for token in ("Streamed ", "team ", "answer"):
+                await asyncio.sleep(0.01)
+                yield AgentStreamResponse(text=token)
+            yield AgentStreamResponse(final_message=ConversationMessage(
+                role=ParticipantRole.ASSISTANT.value,
+                content=[{"text": "Streamed team answer"}]
+            ))
+        return stream()
+
+
+class StreamingLeadAgent(BedrockLLMAgent):
+    """Asks the team on its first turn, then streams its final answer slowly."""
+    def __init__(self, options):
+        super().__init__(options)
+        self.turns = []
+
+    async def handle_streaming_response(self, converse_input):
+        self.turns.append(converse_input['messages'])
+        if len(self.turns) == 1:
+            yield AgentStreamResponse(final_message=ConversationMessage(
+                role=ParticipantRole.ASSISTANT.value,
+                content=[{'toolUse': {'toolUseId': 'tool_1', 'name': 'send_messages', 'input': {
+                    'messages': [{'recipient': 'Team Member', 'content': 'Question'}]
+                }}}]
+            ))
+            return
+        for token in ("Final ", "answer ", "from ", "the ", "lead"):
+            yield AgentStreamResponse(text=token)
+            await asyncio.sleep(0.05)
+        yield AgentStreamResponse(final_message=ConversationMessage(
+            role=ParticipantRole.ASSISTANT.value,
+            content=[{'text': "Final answer from the lead"}]
+        ))
+
+
+@pytest.mark.asyncio
+async def test_send_messages_reads_streaming_team_agents(mock_boto3_client):
+    agent = make_supervisor([StreamingTeamMember(BedrockLLMAgentOptions(name="Team Member", description="Test"))])
+
+    response = await agent.send_messages([{"recipient": "Team Member", "content": "Question"}])
+
+    assert response == "Team Member: Streamed team answer"
+    history = await agent.storage.fetch_chat("", "", "team-member")
+    assert history[1].content[0]['text'] == "Streamed team answer"
+
+
+@pytest.mark.asyncio
+async def test_supervisor_streams_final_answer_of_lead_agent(mock_boto3_client):
+    lead_agent = StreamingLeadAgent(BedrockLLMAgentOptions(name="Supervisor", description="Test lead_agent",
+                                                           streaming=True))
+    agent = SupervisorAgent(SupervisorAgentOptions(
+        name="SupervisorAgent",
+        description="My Supervisor agent description",
+        lead_agent=lead_agent,
+        team=[StreamingTeamMember(BedrockLLMAgentOptions(name="Team Member", description="Test"))]
+    ))
+    assert agent.is_streaming_enabled()
+    orchestrator = MultiAgentOrchestrator(classifier=MagicMock(), default_agent=agent)
+
+    start_time = time.perf_counter()
+    response = await orchestrator.agent_process_request(
+        "Question", "user", "session", ClassifierResult(selected_agent=agent, confidence=1.0), stream_response=True
+    )
+    assert response.streaming
+    arrivals = []
+    async for chunk in response.output:
+        if chunk.text:
+            arrivals.append((time.perf_counter() - start_time, chunk.text))
+
+    assert ''.join(text for _, text in arrivals) == "Final answer from the lead"
+    # The first token arrives as soon as the last turn starts, not once it is complete
+    assert arrivals[-1][0] - arrivals[0][0] >= 0.15
+    # The team response was given to the lead agent for its last turn
+    tool_result = lead_agent.turns[1][-1]['content'][0]['toolResult']
+    assert tool_result['content'][0]['text'] == "Team Member: Streamed team answer"
+    saved = await orchestrator.storage.fetch_chat("user", "session", agent.id)
+    assert saved[-1].content[0]['text'] == "Final answer from the lead"
+
+
+class AskingStreamingLeadAgent(BedrockLLMAgent):
+    """Asks the team the user question while its stream is read."""
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        send_messages = self.tool_config['tool'].tools[0].func
+
+        async def stream():
+            yield AgentStreamResponse(text="Asking the team")
+            await asyncio.sleep(0.01)
+            answer = await send_messages(messages=[{'recipient': 'Team Member', 'content': input_text}])
+            yield AgentStreamResponse(final_message=ConversationMessage(
+                role=ParticipantRole.ASSISTANT.value, content=[{"text": answer}]
+            ))
+        return stream()
+
+
+class SessionRecordingTeamMember(MockBedrockLLMAgent):
+    def __init__(self, options):
+        super().__init__(options)
+        self.requests = []
+
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        self.requests.append((user_id, session_id, input_text))
+        return ConversationMessage(role=ParticipantRole.ASSISTANT.value,
+                                   content=[{"text": f"Answer to {input_text}"}])
+
+
+@pytest.mark.asyncio
+async def test_interleaved_streams_keep_their_request_context(mock_boto3_client):
+    team_member = SessionRecordingTeamMember(BedrockLLMAgentOptions(name="Team Member", description="Test"))
+    agent = SupervisorAgent(SupervisorAgentOptions(
+        name="SupervisorAgent",
+        description="My Supervisor agent description",
+        lead_agent=AskingStreamingLeadAgent(BedrockLLMAgentOptions(name="Supervisor", description="Test lead_agent",
+                                                                   streaming=True)),
+        team=[team_member]
+    ))
+
+    # Both streams are created in this task, then read concurrently
+    stream_a = await agent.process_request("Question A", "userA", "sA", [])
+    stream_b = await agent.process_request("Question B", "userB", "sB", [])
+
+    async def read(stream):
+        return [chunk async for chunk in stream][-1].final_message.content[0]['text']
+
+    answers = await asyncio.gather(read(stream_a), read(stream_b))
+
+    assert answers == ["Team Member: Answer to Question A", "Team Member: Answer to Question B"]
+    assert sorted(team_member.requests) == [("userA", "sA", "Question A"), ("userB", "sB", "Question B")]
+    for user_id, session_id, question in team_member.requests:
+        saved = await agent.storage.fetch_chat(user_id, session_id, team_member.id)
+        assert [message.content[0]['text'] for message in saved] == [question, f"Answer to {question}"]
+
+    # No request context is left in this task: a direct message is saved immediately
+    await agent.send_messages([{"recipient": "Team Member", "content": "Direct question"}])
+    assert len(await agent.storage.fetch_chat("", "", team_member.id)) == 2
+
+
+class TwoRoundsLeadAgent(BedrockLLMAgent):
+    """Messages the team twice in its turn and returns its system prompt."""
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        system_prompt = await self._prepare_system_prompt(input_text)
+        send_messages = self.tool_config['tool'].tools[0].func
+        for round_index in range(2):
+            await send_messages(messages=[
+                {'recipient': name, 'content': f"{input_text} round {round_index}"} for name in ("Agent0", "Agent1")
+            ])
+        return ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": system_prompt}])
+
+
+class HistoryRecordingTeamMember(MockBedrockLLMAgent):
+    def __init__(self, options):
+        super().__init__(options)
+        self.histories = []
+
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        self.histories.append([message.content[0]['text'] for message in chat_history])
+        return ConversationMessage(role=ParticipantRole.ASSISTANT.value,
+                                   content=[{"text": f"{self.name} answers {input_text}"}])
+
+
+@pytest.mark.asyncio
+async def test_team_exchanges_are_saved_once_per_turn(mock_boto3_client):
+    team = [HistoryRecordingTeamMember(BedrockLLMAgentOptions(name=f"Agent{i}", description="Test")) for i in range(2)]
+    storage = InMemoryChatStorage()
+    agent = SupervisorAgent(SupervisorAgentOptions(
+        name="SupervisorAgent",
+        description="My Supervisor agent description",
+        lead_agent=TwoRoundsLeadAgent(BedrockLLMAgentOptions(name="Supervisor", description="Test lead_agent")),
+        team=team,
+        storage=storage
+    ))
+
+    with patch.object(storage, 'save_session_messages', wraps=storage.save_session_messages) as save_session_messages, \
+         patch.object(storage, 'save_chat_messages', wraps=storage.save_chat_messages) as save_chat_messages:
+        await agent.process_request("Question", "user", "session", [])
+
+    save_session_messages.assert_awaited_once()
+    assert set(save_session_messages.call_args.args[2]) == {"agent0", "agent1"}
+    # The default implementation writes each conversation once
+    assert save_chat_messages.await_count == 2
+    # The second round sees the unsaved exchange of the first one
+    assert team[0].histories[1] == ["Question round 0", "Agent0 answers Question round 0"]
+    assert len(await storage.fetch_chat("user", "session", "agent1")) == 4
+
+
+@pytest.mark.asyncio
+async def test_agents_memory_is_updated_incrementally(mock_boto3_client):
+    team = [HistoryRecordingTeamMember(BedrockLLMAgentOptions(name=f"Agent{i}", description="Test")) for i in range(2)]
+    storage = InMemoryChatStorage()
+    await storage.save_chat_messages("user", "session", "agent0", [
+        ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": "Earlier question"}]),
+        ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": "Earlier answer"}]),
+    ])
+    agent = SupervisorAgent(SupervisorAgentOptions(
+        name="SupervisorAgent",
+        description="My Supervisor agent description",
+        lead_agent=TwoRoundsLeadAgent(BedrockLLMAgentOptions(name="Supervisor", description="Test lead_agent")),
+        team=team,
+        storage=storage,
+        max_agents_memory_chars=300
+    ))
+
+    with patch.object(storage, 'fetch_all_chats', wraps=storage.fetch_all_chats) as fetch_all_chats:
+        first = (await agent.process_request("First", "user", "session", [])).content[0]['text']
+        second = (await agent.process_request("Second", "user", "session", [])).content[0]['text']
+        third = (await agent.process_request("Third", "user", "session", [])).content[0]['text']
+
+    fetch_all_chats.assert_awaited_once()
+    assert "user:Earlier question\nassistant:[agent0] Earlier answer\n" in first
+    assert "assistant:[agent1] Agent1 answers First round 1\n" in second
+    memory = agent.agents_memories[("user", "session")]
+    assert memory.size <= 300
+    # The oldest exchanges were dropped to stay within the budget
+    assert "Earlier question" not in third
+    assert "assistant:[agent1] Agent1 answers Second round 1\n" in third
+    assert memory.render() == ''.join(memory.exchanges)
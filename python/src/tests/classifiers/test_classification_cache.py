@@ -0,0 +1,57 @@
+from unittest.mock import Mock, patch
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from multi_agent_orchestrator.classifiers import ClassificationCache, ClassifierResult
+
+def agent(agent_id):
+    mock = Mock()
+    mock.id = agent_id
+    return mock
+
+AGENTS = {'tech-agent': agent('tech-agent'), 'billing-agent': agent('billing-agent')}
+
+def history(*texts):
+    roles = [ParticipantRole.USER.value, ParticipantRole.ASSISTANT.value]
+    return [ConversationMessage(role=roles[i % 2], content=[{'text': text}]) for i, text in enumerate(texts)]
+
+def test_key_ignores_case_punctuation_and_spacing():
+    cache = ClassificationCache()
+    chat = history('Hi', '[tech-agent] Hello')
+    assert cache.make_key('What is my  balance?', chat, AGENTS) == cache.make_key('what is my balance', chat, AGENTS)
+
+def test_key_depends_on_recent_history_and_agents():
+    cache = ClassificationCache(history_size=2)
+    key = cache.make_key('yes', history('Hi', '[tech-agent] Hello'), AGENTS)
+    assert key != cache.make_key('yes', history('Hi', '[billing-agent] Hello'), AGENTS)
+    assert key != cache.make_key('yes', history('Hi', '[tech-agent] Hello'), {'tech-agent': AGENTS['tech-agent']})
+    # Older messages than history_size do not change the key
+    assert key == cache.make_key('yes', history('Old', '[billing-agent] Old') + history('Hi', '[tech-agent] Hello'), AGENTS)
+
+def test_results_expire_and_are_bounded():
+    cache = ClassificationCache(max_size=2, ttl=10)
+    result = ClassifierResult(selected_agent=AGENTS['tech-agent'], confidence=0.9)
+    with patch('multi_agent_orchestrator.classifiers.classification_cache.time.monotonic') as monotonic:
+        monotonic.return_value = 100
+        for key in ('a', 'b', 'c'):
+            cache.put(key, result)
+        assert cache.get('a') is None
+        assert cache.get('b') is result
+
+        monotonic.return_value = 111
+        assert cache.get('c') is None
+        assert list(cache.results) == ['b']
+
+def test_disabled_cache_stores_nothing():
+    cache = ClassificationCache(max_size=0)
+    cache.put('a', ClassifierResult(selected_agent=AGENTS['tech-agent'], confidence=0.9))
+    assert cache.get('a') is None
+
+def test_sticky_agent_for_short_follow_ups():
+    cache = ClassificationCache(sticky_max_words=2)
+    chat = history('Printer help', '[tech-agent] Do you want the steps?')
+
+    result = cache.get_sticky_result('Yes please', chat, AGENTS)
+    assert result.selected_agent is AGENTS['tech-agent']
+    assert cache.get_sticky_result('Yes, show me the steps', chat, AGENTS) is None
+    assert cache.get_sticky_result('Yes', history('Hi'), AGENTS) is None
+    assert cache.get_sticky_result('Yes', history('Hi', '[removed-agent] Hello'), AGENTS) is None
+    assert ClassificationCache().get_sticky_result('Yes', chat, AGENTS) is None
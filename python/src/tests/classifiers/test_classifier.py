@@ -2,11 +2,12 @@ import unittest
 from unittest.mock import AsyncMock, patch, MagicMock
 from multi_agent_orchestrator.types import ConversationMessage, AgentTypes
 from multi_agent_orchestrator.agents import Agent
-from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult
+from multi_agent_orchestrator.classifiers import Classifier, ClassifierResult, classifier_session
 import re
 from typing import List, Dict
 import pytest
 import asyncio
+import random
 
 class MockAgent(Agent):
     def __init__(self, agent_id, description):
@@ -139,3 +140,87 @@ class TestClassifier(unittest.TestCase):
 
         # Check that custom variables are included in system prompt
         self.assertIn("Additional context", self.classifier.system_prompt)
+
+    def test_compiled_prompt_matches_placeholder_replacement(self):
+        self.classifier.set_system_prompt(variables={"EXTRA_INFO": "Additional context"})
+        history = "user: What is {{EXTRA_INFO}}?"
+        self.classifier.history = history
+        self.classifier.update_system_prompt()
+
+        expected = self.classifier.replace_placeholders(self.classifier.prompt_template, {
+            "EXTRA_INFO": "Additional context",
+            "AGENT_DESCRIPTIONS": self.classifier.agent_descriptions,
+            "HISTORY": history,
+        })
+        self.assertEqual(self.classifier.system_prompt, expected)
+        self.assertIn("agent-billing:Billing support agent", self.classifier.system_prompt)
+
+        # A template assigned directly is compiled on the next request
+        self.classifier.prompt_template = "Agents: {{AGENT_DESCRIPTIONS}} History: {{HISTORY}}"
+        self.assertTrue(self.classifier.build_system_prompt("user: Hi").endswith("History: user: Hi"))
+
+        # So are custom variables modified directly
+        self.classifier.prompt_template = "Info: {{EXTRA_INFO}} History: {{HISTORY}}"
+        self.classifier.custom_variables["EXTRA_INFO"] = "Updated context"
+        self.assertEqual(self.classifier.build_system_prompt("user: Hi"), "Info: Updated context History: user: Hi")
+
+
+class PromptEchoClassifier(Classifier):
+    """Returns the system prompt seen after yielding to the other requests."""
+    async def process_request(self, input_text, chat_history):
+        await asyncio.sleep(random.random() / 100)
+        return ClassifierResult(selected_agent=None, confidence=0.0), self.system_prompt, self.history
+
+
+@pytest.mark.asyncio
+async def test_concurrent_classifications_are_isolated():
+    classifier = PromptEchoClassifier()
+    classifier.set_agents({'agent-test': MockAgent('agent-test', 'Test agent description')})
+
+    async def classify(user):
+        chat_history = [
+            ConversationMessage(role='user', content=[{'text': f'Secret of {user}'}]),
+            ConversationMessage(role='assistant', content=[{'text': f'[agent-test] Noted, {user}'}]),
+        ]
+        _, system_prompt, history = await classifier.classify(f'Question of {user}', chat_history)
+        return user, system_prompt, history
+
+    results = await asyncio.gather(*(classify(f'user{i}') for i in range(200)))
+
+    for user, system_prompt, history in results:
+        assert history == f"user: Secret of {user}\nassistant: [agent-test] Noted, {user}"
+        assert f"<history>\n{history}\n</history>" in system_prompt
+        assert system_prompt.count('Secret of') == 1
+    # Nothing is left on the shared instance
+    assert classifier.history == ""
+    assert classifier.system_prompt == ""
+
+
+def make_history(*texts):
+    return [ConversationMessage(role='user' if i % 2 == 0 else 'assistant', content=[{'text': text}])
+            for i, text in enumerate(texts)]
+
+
+@pytest.mark.asyncio
+async def test_session_history_is_formatted_incrementally():
+    classifier = ConcreteClassifier()
+    classifier.set_agents({'agent-test': MockAgent('agent-test', 'Test agent description')})
+    history = make_history('Q1', 'A1', 'Q2', 'A2')
+
+    with classifier_session(('user1', 'session1')):
+        await classifier.classify('Q2', history[:2])
+        with patch.object(Classifier, 'format_message', wraps=Classifier.format_message) as format_message:
+            formatted = classifier.format_history(history)
+    assert formatted == Classifier.format_messages(history)
+    # The first and last cached messages are checked, and the two new ones formatted
+    assert format_message.call_count == 4
+
+    # The history of another session is formatted from its own messages
+    with classifier_session(('user2', 'session1')):
+        other_history = make_history('Q1', 'Other answer', 'Q2')
+        assert classifier.format_history(other_history) == Classifier.format_messages(other_history)
+
+    # So is a history window whose oldest messages were dropped
+    with classifier_session(('user1', 'session1')):
+        window = history[2:] + make_history('Q3')
+        assert classifier.format_history(window) == Classifier.format_messages(window)
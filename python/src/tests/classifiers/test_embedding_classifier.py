@@ -0,0 +1,147 @@
+import time
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock, Mock
+from multi_agent_orchestrator.classifiers import (
+    Classifier,
+    ClassifierResult,
+    EmbeddingClassifier,
+    EmbeddingClassifierOptions,
+    HashedNgramEmbedder,
+)
+
+def agent(agent_id, description):
+    mock = Mock()
+    mock.id = agent_id
+    mock.name = agent_id.replace('-', ' ').title()
+    mock.description = description
+    return mock
+
+AGENTS = {
+    'tech-agent': agent('tech-agent', 'Software development, hardware, cloud computing and cybersecurity'),
+    'health-agent': agent('health-agent', 'Health and medical topics: wellness, nutrition, diseases and treatments'),
+    'travel-agent': agent('travel-agent', 'Flights, hotels, booking trips and vacation planning'),
+    'weather-agent': agent('weather-agent', 'Weather forecasts and current conditions for cities'),
+}
+
+@pytest.fixture
+def fallback_classifier():
+    fallback = Mock(spec=Classifier)
+    fallback.classify = AsyncMock(return_value=ClassifierResult(selected_agent=AGENTS['tech-agent'], confidence=0.5))
+    return fallback
+
+@pytest.fixture
+def classifier(fallback_classifier):
+    classifier = EmbeddingClassifier(EmbeddingClassifierOptions(fallback_classifier=fallback_classifier))
+    classifier.set_agents(AGENTS)
+    return classifier
+
+def test_embedder_returns_normalized_vectors():
+    embedder = HashedNgramEmbedder(dimensions=256)
+    embedder.fit(['cloud computing', 'weather forecasts'])
+    vectors = embedder(['Cloud computing!', 'cloud computing', ''])
+
+    assert vectors.shape == (3, 256)
+    assert np.allclose(np.linalg.norm(vectors[:2], axis=1), 1.0)
+    assert np.allclose(vectors[0], vectors[1])
+    assert not vectors[2].any()
+
+@pytest.mark.asyncio
+async def test_routes_locally_above_threshold(classifier, fallback_classifier):
+    result = await classifier.classify('What is the weather forecast in Paris?', [])
+    assert result.selected_agent is AGENTS['weather-agent']
+    assert 0 < result.confidence <= 1
+
+    result = await classifier.classify('Book me a flight and a hotel', [])
+    assert result.selected_agent is AGENTS['travel-agent']
+    fallback_classifier.classify.assert_not_awaited()
+    fallback_classifier.set_agents.assert_called_once_with(AGENTS)
+
+@pytest.mark.asyncio
+async def test_falls_back_below_threshold(classifier, fallback_classifier):
+    result = await classifier.classify('yes', [])
+    assert result.confidence == 0.5
+    fallback_classifier.classify.assert_awaited_once_with('yes', [])
+
+@pytest.mark.asyncio
+async def test_ambiguous_input_falls_back(fallback_classifier):
+    classifier = EmbeddingClassifier(EmbeddingClassifierOptions(fallback_classifier=fallback_classifier,
+                                                                threshold=0.0,
+                                                                margin=0.5))
+    classifier.set_agents(AGENTS)
+    await classifier.classify('cloud weather', [])
+    fallback_classifier.classify.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_without_fallback_no_agent_is_selected():
+    classifier = EmbeddingClassifier()
+    assert (await classifier.classify('anything', [])).selected_agent is None
+
+    classifier.set_agents(AGENTS)
+    result = await classifier.classify('yes', [])
+    assert result.selected_agent is None
+    assert result.confidence == 0.0
+
+@pytest.mark.asyncio
+async def test_custom_embedding_function():
+    topics = ['weather', 'flights']
+    def embed(texts):
+        return np.array([[float(topic in text.lower()) for topic in topics] for text in texts])
+
+    classifier = EmbeddingClassifier(EmbeddingClassifierOptions(embedding_function=embed, threshold=0.9))
+    classifier.set_agents({
+        'weather-agent': agent('weather-agent', 'Weather'),
+        'travel-agent': agent('travel-agent', 'Flights'),
+    })
+    result = await classifier.classify('Any flights to Rome?', [])
+    assert result.selected_agent.id == 'travel-agent'
+
+@pytest.mark.asyncio
+async def test_classify_candidates_ranks_ambiguous_inputs(fallback_classifier):
+    topics = ['weather', 'flights', 'hotels']
+    def embed(texts):
+        vectors = np.array([[float(topic in text.lower()) for topic in topics] for text in texts])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    classifier = EmbeddingClassifier(EmbeddingClassifierOptions(fallback_classifier=fallback_classifier,
+                                                                embedding_function=embed,
+                                                                threshold=0.3))
+    classifier.set_agents({
+        'weather-agent': agent('weather-agent', 'Weather'),
+        'travel-agent': agent('travel-agent', 'Flights and hotels'),
+        'hotel-agent': agent('hotel-agent', 'Hotels'),
+    })
+
+    candidates = await classifier.classify_candidates('Any flights to Rome?', [], 3)
+    assert [candidate.selected_agent.id for candidate in candidates] == ['travel-agent']
+    assert candidates[0].confidence == 1.0
+
+    candidates = await classifier.classify_candidates('Weather at the hotels?', [], 3)
+    assert [candidate.selected_agent.id for candidate in candidates] == ['weather-agent', 'hotel-agent', 'travel-agent']
+    assert candidates[0].confidence >= candidates[1].confidence > candidates[2].confidence
+    # Confidences are shares of the similarity of the candidates, below the default threshold of the orchestrator
+    assert sum(candidate.confidence for candidate in candidates) == pytest.approx(1.0)
+    assert candidates[0].confidence < 0.8
+    assert len(await classifier.classify_candidates('Weather at the hotels?', [], 2)) == 2
+
+    fallback_classifier.classify_candidates = AsyncMock(return_value=[])
+    assert await classifier.classify_candidates('yes', [], 3) == []
+    fallback_classifier.classify_candidates.assert_awaited_once_with('yes', [], 3)
+
+def test_batched_scoring_of_many_agents():
+    rng = np.random.default_rng(0)
+    words = [''.join(rng.choice(list('abcdefghijklmnopqrstuvwxyz'), 8)) for _ in range(500)]
+    agents = {f'agent-{i}': agent(f'agent-{i}', f'Specialist of {word} products') for i, word in enumerate(words)}
+    classifier = EmbeddingClassifier()
+    classifier.set_agents(agents)
+    inputs = [f'Question about {word}' for word in words[:100]]
+
+    start = time.perf_counter()
+    scores = classifier.score(inputs)
+    elapsed = time.perf_counter() - start
+
+    assert scores.shape == (100, 500)
+    assert (np.argmax(scores, axis=1) == np.arange(100)).all()
+    assert np.allclose(scores[:1], classifier.score(inputs[:1]))
+    assert elapsed < 5
@@ -120,4 +120,17 @@ async def test_fetch_all_chats(chat_storage):
         user_id="user1",
         session_id="session1"
     )
-    assert isinstance(chats, list)
\ No newline at end of file
+    assert isinstance(chats, list)
+
+@pytest.mark.asyncio
+async def test_fetch_recent_chats_defaults_to_fetch_all_chats(chat_storage):
+    messages = [ConversationMessage(role="user", content=[{"text": f"Message {i}"}]) for i in range(5)]
+    chat_storage.fetch_all_chats = lambda user_id, session_id: _async(messages)
+
+    assert await chat_storage.fetch_recent_chats("user1", "session1") == messages
+    assert await chat_storage.fetch_recent_chats("user1", "session1", max_messages=2) == messages[-2:]
+    # Without fetch_session, the messages cannot be attributed to their agent
+    assert await chat_storage.fetch_recent_chats("user1", "session1", max_messages_per_agent=1) == messages
+
+async def _async(value):
+    return value
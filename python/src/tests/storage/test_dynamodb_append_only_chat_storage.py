@@ -0,0 +1,230 @@
+import json
+import math
+import pytest
+from moto import mock_aws
+import boto3
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole, TimestampedMessage
+from multi_agent_orchestrator.storage import DynamoDbChatStorage, DynamoDbAppendOnlyChatStorage
+
+@pytest.fixture
+def dynamodb_table():
+    with mock_aws():
+        dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+        table = dynamodb.create_table(
+            TableName='test_table',
+            KeySchema=[
+                {'AttributeName': 'PK', 'KeyType': 'HASH'},
+                {'AttributeName': 'SK', 'KeyType': 'RANGE'}
+            ],
+            AttributeDefinitions=[
+                {'AttributeName': 'PK', 'AttributeType': 'S'},
+                {'AttributeName': 'SK', 'AttributeType': 'S'}
+            ],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        yield table
+
+@pytest.fixture
+def chat_storage(dynamodb_table):
+    return DynamoDbAppendOnlyChatStorage(table_name='test_table', region='us-east-1', ttl_key='TTL', ttl_duration=3600)
+
+def user_message(text):
+    return ConversationMessage(role=ParticipantRole.USER.value, content=[{'text': text}])
+
+def assistant_message(text):
+    return ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': text}])
+
+class CapacityUnitCounter:
+    """
+    Estimate the capacity units consumed by the requests of a storage: 1 WCU per started KB
+    per item written, and 1 RCU per started 4KB read by each read request.
+    """
+    def __init__(self, storage):
+        self.write_units = 0
+        self.read_units = 0
+        events = storage.dynamodb.meta.client.meta.events
+        events.register('before-parameter-build.dynamodb.*', self._count_writes)
+        events.register('after-call.dynamodb.*', self._count_reads)
+
+    @property
+    def units(self):
+        return self.write_units + self.read_units
+
+    def _count_writes(self, model, params, **kwargs):
+        if model.name == 'PutItem':
+            self.write_units += self._item_units(params['Item'])
+        elif model.name == 'UpdateItem':
+            self.write_units += 1
+        elif model.name == 'BatchWriteItem':
+            for requests in params['RequestItems'].values():
+                for request in requests:
+                    item = request.get('PutRequest', {}).get('Item')
+                    self.write_units += self._item_units(item) if item else 1
+
+    def _count_reads(self, model, parsed, **kwargs):
+        if model.name in ('GetItem', 'Query', 'Scan'):
+            items = parsed.get('Items', [parsed['Item']] if 'Item' in parsed else [])
+            size = sum(len(json.dumps(item, default=str)) for item in items)
+            self.read_units += max(1, math.ceil(size / 4096))
+
+    @staticmethod
+    def _item_units(item):
+        return max(1, math.ceil(len(json.dumps(item, default=str)) / 1024))
+
+@pytest.mark.asyncio
+async def test_save_and_fetch_chat_message(chat_storage):
+    assert await chat_storage.save_chat_message('user1', 'session1', 'agent1', user_message('Hello'))
+    assert await chat_storage.save_chat_message('user1', 'session1', 'agent1', assistant_message('Hi'))
+
+    fetched = await chat_storage.fetch_chat('user1', 'session1', 'agent1')
+    assert [(m.role, m.content) for m in fetched] == [
+        (ParticipantRole.USER.value, [{'text': 'Hello'}]),
+        (ParticipantRole.ASSISTANT.value, [{'text': 'Hi'}])
+    ]
+
+@pytest.mark.asyncio
+async def test_one_item_per_message(chat_storage, dynamodb_table):
+    await chat_storage.save_chat_messages('user1', 'session1', 'agent1', [user_message('Hello'), assistant_message('Hi')])
+
+    keys = sorted(item['SK'] for item in dynamodb_table.scan()['Items'])
+    assert keys == [
+        'session1#agent1',
+        'session1#agent1#00000000000000000001',
+        'session1#agent1#00000000000000000002'
+    ]
+
+@pytest.mark.asyncio
+async def test_consecutive_role_is_not_saved(chat_storage):
+    await chat_storage.save_chat_message('user1', 'session1', 'agent1', user_message('Hello'))
+    assert not await chat_storage.save_chat_message('user1', 'session1', 'agent1', user_message('Again'))
+
+    await chat_storage.save_chat_messages('user1', 'session1', 'agent1', [user_message('Again'), assistant_message('Hi')])
+
+    fetched = await chat_storage.fetch_chat('user1', 'session1', 'agent1')
+    assert [m.content[0]['text'] for m in fetched] == ['Hello', 'Hi']
+
+@pytest.mark.asyncio
+async def test_trim_deletes_oldest_messages(chat_storage):
+    capacity = CapacityUnitCounter(chat_storage)
+    for i in range(5):
+        await chat_storage.save_chat_messages('user1', 'session1', 'agent1',
+                                              [user_message(f'Q{i}'), assistant_message(f'A{i}')],
+                                              max_history_size=4)
+    for i in range(5, 8):
+        await chat_storage.save_chat_message('user1', 'session1', 'agent1', user_message(f'Q{i}'), max_history_size=4)
+        await chat_storage.save_chat_message('user1', 'session1', 'agent1', assistant_message(f'A{i}'), max_history_size=4)
+    # The messages out of the window are deleted by key, without reading them
+    assert capacity.read_units == 0
+
+    fetched = await chat_storage.fetch_chat('user1', 'session1', 'agent1')
+    assert [m.content[0]['text'] for m in fetched] == ['Q6', 'A6', 'Q7', 'A7']
+
+@pytest.mark.asyncio
+async def test_fetch_all_chats_and_session(chat_storage):
+    await chat_storage.save_chat_messages('user1', 'session1', 'agent1', [user_message('Hello 1'), assistant_message('Hi 1')])
+    await chat_storage.save_chat_messages('user1', 'session1', 'agent2', [user_message('Hello 2'), assistant_message('Hi 2')])
+    await chat_storage.save_chat_message('user1', 'session2', 'agent1', user_message('Other session'))
+
+    all_chats = await chat_storage.fetch_all_chats('user1', 'session1')
+    assert [m.content[0]['text'] for m in all_chats] == ['Hello 1', '[agent1] Hi 1', 'Hello 2', '[agent2] Hi 2']
+
+    snapshot = await chat_storage.fetch_session('user1', 'session1')
+    assert set(snapshot.conversations) == {'agent1', 'agent2'}
+
+@pytest.mark.asyncio
+async def test_fetch_all_chats_time_window_is_pushed_down(chat_storage):
+    query_args = []
+    chat_storage.dynamodb.meta.client.meta.events.register(
+        'before-parameter-build.dynamodb.Query', lambda params, **kwargs: query_args.append(dict(params)))
+    for i in range(3):
+        await chat_storage.save_chat_messages('user1', 'session1', 'agent1', [
+            TimestampedMessage(role=ParticipantRole.USER.value, content=[{'text': f'Q{i}'}], timestamp=1000 + 10 * i),
+            TimestampedMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': f'A{i}'}], timestamp=1005 + 10 * i),
+        ])
+
+    recent = await chat_storage.fetch_all_chats('user1', 'session1', since=1010)
+    assert [m.content[0]['text'] for m in recent] == ['Q1', '[agent1] A1', 'Q2', '[agent1] A2']
+    assert query_args[-1]['FilterExpression'] == '#timestamp >= :since'
+
+    last = await chat_storage.fetch_all_chats('user1', 'session1', max_messages=3)
+    assert [m.content[0]['text'] for m in last] == ['[agent1] A1', 'Q2', '[agent1] A2']
+
+    snapshots = [snapshot async for snapshot in chat_storage.export_sessions(total_segments=2)]
+    assert len(snapshots) == 1
+    assert len(snapshots[0].agent_chat('agent1')) == 6
+
+@pytest.mark.asyncio
+async def test_fetch_recent_chats_per_agent(chat_storage):
+    for i in range(3):
+        for agent_id in ('agent1', 'agent2'):
+            await chat_storage.save_chat_messages('user1', 'session1', agent_id,
+                                                  [user_message(f'Q{i} {agent_id}'), assistant_message(f'A{i}')])
+
+    # Each message is its own item: the limit applies to the messages of each agent, not to the items
+    recent = await chat_storage.fetch_recent_chats('user1', 'session1', max_messages_per_agent=2)
+    assert sorted(m.content[0]['text'] for m in recent) == ['Q2 agent1', 'Q2 agent2', '[agent1] A2', '[agent2] A2']
+
+@pytest.mark.asyncio
+async def test_fetch_recent_chats_reads_only_the_window(chat_storage):
+    # The space sorts before '#', so the keys of 'agent1 backup' sort among those of 'agent1'
+    agent_ids = ('agent1', 'agent1 backup', 'agent2')
+    for i in range(20):
+        for offset, agent_id in enumerate(agent_ids):
+            await chat_storage.save_chat_messages('user1', 'session1', agent_id, [
+                TimestampedMessage(role=ParticipantRole.USER.value, content=[{'text': f'Q{i} {agent_id}'}],
+                                   timestamp=1000 + 100 * i + 10 * offset),
+                TimestampedMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': f'A{i}'}],
+                                   timestamp=1005 + 100 * i + 10 * offset),
+            ])
+    expected = [m.content for m in await chat_storage.fetch_all_chats('user1', 'session1', max_messages=4)]
+
+    scanned = []
+    query = chat_storage.table.query
+    def counting_query(**kwargs):
+        response = query(**kwargs)
+        scanned.append(response['ScannedCount'])
+        return response
+    chat_storage.table.query = counting_query
+
+    recent = await chat_storage.fetch_recent_chats('user1', 'session1', max_messages=4)
+    assert [m.content for m in recent] == expected
+    assert [m.content[0]['text'] for m in recent] == ['Q19 agent1 backup', '[agent1 backup] A19',
+                                                     'Q19 agent2', '[agent2] A19']
+    # A few keys to find the agents, and four messages per agent, out of 123 items
+    assert sum(scanned) <= 3 * 4 + 2 * len(agent_ids) + 1
+
+    scanned.clear()
+    last = await chat_storage.fetch_chat('user1', 'session1', 'agent2', max_history_size=2)
+    assert [m.content[0]['text'] for m in last] == ['Q19 agent2', 'A19']
+    assert sum(scanned) == 2
+
+@pytest.mark.asyncio
+async def test_capacity_units_do_not_grow_with_history(chat_storage, dynamodb_table):
+    legacy_storage = DynamoDbChatStorage(table_name='test_table', region='us-east-1')
+    legacy_units = CapacityUnitCounter(legacy_storage)
+    append_only_units = CapacityUnitCounter(chat_storage)
+    long_answer = 'x' * 600
+    # The orchestrator saves with a window, MAX_MESSAGE_PAIRS_PER_AGENT
+    max_history_size = 20
+
+    legacy_per_turn = []
+    append_only_per_turn = []
+    for i in range(20):
+        before = legacy_units.units
+        await legacy_storage.save_chat_message('legacy', 'session1', 'agent1', user_message(f'Q{i}'),
+                                               max_history_size)
+        await legacy_storage.save_chat_message('legacy', 'session1', 'agent1', assistant_message(long_answer),
+                                               max_history_size)
+        legacy_per_turn.append(legacy_units.units - before)
+
+        before = append_only_units.units
+        await chat_storage.save_chat_message('append', 'session1', 'agent1', user_message(f'Q{i}'),
+                                             max_history_size)
+        await chat_storage.save_chat_message('append', 'session1', 'agent1', assistant_message(long_answer),
+                                             max_history_size)
+        append_only_per_turn.append(append_only_units.units - before)
+
+    # Once the window is full, each message also deletes the oldest one, reads included
+    assert append_only_per_turn[-1] == append_only_per_turn[10] <= append_only_per_turn[0] + 2
+    assert legacy_per_turn[-1] > legacy_per_turn[0]
+    assert sum(append_only_per_turn) < sum(legacy_per_turn)
@@ -1,3 +1,5 @@
+import asyncio
+import time
 import pytest
 from moto import mock_aws
 import boto3
@@ -172,4 +174,203 @@ async def test_save_and_fetch_chat_messages_timestamp(chat_storage):
     assert fetched_messages[3].content == [{'text': 'Message 3'}]
     assert fetched_messages[3].role == ParticipantRole.ASSISTANT.value
     assert fetched_messages[4].content == [{'text': 'Message 4'}]
-    assert fetched_messages[4].role == ParticipantRole.USER.value
\ No newline at end of file
+    assert fetched_messages[4].role == ParticipantRole.USER.value
+
+
+@pytest.mark.asyncio
+async def test_fetch_session(chat_storage):
+    user_id = 'user1'
+    session_id = 'session1'
+    for agent_id in ('agent1', 'agent2'):
+        await chat_storage.save_chat_message(user_id, session_id, agent_id,
+            ConversationMessage(role=ParticipantRole.USER.value, content=[{'text': f'Hello {agent_id}'}]))
+        await chat_storage.save_chat_message(user_id, session_id, agent_id,
+            ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': f'Hi from {agent_id}'}]))
+
+    snapshot = await chat_storage.fetch_session(user_id, session_id)
+
+    assert set(snapshot.conversations) == {'agent1', 'agent2'}
+    agent_chat = snapshot.agent_chat('agent2')
+    fetched = await chat_storage.fetch_chat(user_id, session_id, 'agent2')
+    assert [(m.role, m.content) for m in agent_chat] == [(m.role, m.content) for m in fetched]
+    all_chats = await chat_storage.fetch_all_chats(user_id, session_id)
+    assert [m.content for m in snapshot.all_chats()] == [m.content for m in all_chats]
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_chats_follows_pagination(chat_storage, dynamodb_table):
+    # Each conversation item is ~100KB, so the session spans several 1MB query pages
+    long_text = 'x' * 100_000
+    for i in range(15):
+        dynamodb_table.put_item(Item={
+            'PK': 'user1',
+            'SK': f'session1#agent{i:02d}',
+            'conversation': [
+                {'role': ParticipantRole.USER.value, 'content': [{'text': f'Question {i}'}], 'timestamp': 1000 + 2 * i},
+                {'role': ParticipantRole.ASSISTANT.value, 'content': [{'text': long_text}], 'timestamp': 1001 + 2 * i},
+            ]
+        })
+
+    all_chats = await chat_storage.fetch_all_chats('user1', 'session1')
+    assert len(all_chats) == 30
+    assert all_chats[-2].content == [{'text': 'Question 14'}]
+
+    snapshot = await chat_storage.fetch_session('user1', 'session1')
+    assert len(snapshot.conversations) == 15
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_chats_time_window_and_limit(chat_storage, dynamodb_table):
+    for agent_id, offset in (('agent1', 0), ('agent2', 1)):
+        dynamodb_table.put_item(Item={
+            'PK': 'user1',
+            'SK': f'session1#{agent_id}',
+            'conversation': [
+                {'role': ParticipantRole.USER.value, 'content': [{'text': f'Q{i}'}], 'timestamp': 1000 + 10 * i + offset}
+                for i in range(5)
+            ]
+        })
+
+    recent = await chat_storage.fetch_all_chats('user1', 'session1', since=1030)
+    assert [m.content[0]['text'] for m in recent] == ['Q3', 'Q3', 'Q4', 'Q4']
+
+    last = await chat_storage.fetch_all_chats('user1', 'session1', max_messages=3)
+    assert [m.content[0]['text'] for m in last] == ['Q3', 'Q4', 'Q4']
+
+    last_recent = await chat_storage.fetch_all_chats('user1', 'session1', since=1030, max_messages=10)
+    assert len(last_recent) == 4
+    assert await chat_storage.fetch_all_chats('user1', 'session1', max_messages=0) == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_recent_chats(chat_storage, dynamodb_table):
+    for agent_id, offset in (('agent1', 0), ('agent2', 1)):
+        dynamodb_table.put_item(Item={
+            'PK': 'user1',
+            'SK': f'session1#{agent_id}',
+            'conversation': [
+                {'role': ParticipantRole.USER.value, 'content': [{'text': f'Q{i} {agent_id}'}], 'timestamp': 1000 + 10 * i + offset}
+                for i in range(5)
+            ]
+        })
+
+    per_agent = await chat_storage.fetch_recent_chats('user1', 'session1', max_messages_per_agent=2)
+    assert [m.content[0]['text'] for m in per_agent] == ['Q3 agent1', 'Q3 agent2', 'Q4 agent1', 'Q4 agent2']
+    last = await chat_storage.fetch_recent_chats('user1', 'session1', max_messages=3, max_messages_per_agent=1)
+    assert [m.content[0]['text'] for m in last] == ['Q4 agent1', 'Q4 agent2']
+    assert len(await chat_storage.fetch_recent_chats('user1', 'session1')) == 10
+
+
+@pytest.mark.asyncio
+async def test_export_sessions(chat_storage):
+    for user_id in ('user1', 'user2'):
+        for session_id in ('session1', 'session2'):
+            await chat_storage.save_chat_message(user_id, session_id, 'agent1',
+                ConversationMessage(role=ParticipantRole.USER.value, content=[{'text': f'{user_id} {session_id}'}]))
+
+    snapshots = [snapshot async for snapshot in chat_storage.export_sessions(total_segments=3)]
+
+    assert sorted((s.user_id, s.session_id) for s in snapshots) == [
+        ('user1', 'session1'), ('user1', 'session2'), ('user2', 'session1'), ('user2', 'session2')
+    ]
+    for snapshot in snapshots:
+        assert snapshot.agent_chat('agent1')[0].content == [{'text': f'{snapshot.user_id} {snapshot.session_id}'}]
+
+
+@pytest.mark.asyncio
+async def test_export_sessions_yields_per_page(chat_storage):
+    for session_id in ('session1', 'session2', 'session3'):
+        await chat_storage.save_chat_message('user1', session_id, 'agent1',
+            ConversationMessage(role=ParticipantRole.USER.value, content=[{'text': session_id}]))
+    table = chat_storage.table
+    pages = []
+
+    class PagedTable:
+        def scan(self, **kwargs):
+            response = table.scan(Limit=1, **kwargs)
+            pages.append(len(response['Items']))
+            return response
+    chat_storage.table = PagedTable()
+
+    snapshots = [snapshot async for snapshot in chat_storage.export_sessions(total_segments=1)]
+
+    assert sorted(snapshot.session_id for snapshot in snapshots) == ['session1', 'session2', 'session3']
+    assert pages[:3] == [1, 1, 1]
+
+
+class BlockingTableStub:
+    """Stand-in for a boto3 Table whose calls block like a network round trip."""
+    def __init__(self, latency):
+        self.latency = latency
+        self.items = {}
+
+    def get_item(self, Key):
+        time.sleep(self.latency)
+        item = self.items.get((Key['PK'], Key['SK']))
+        return {'Item': item} if item else {}
+
+    def put_item(self, Item):
+        time.sleep(self.latency)
+        self.items[(Item['PK'], Item['SK'])] = Item
+        return {}
+
+
+async def measure_loop_blocking(coroutines):
+    """Run the coroutines and return the total time the event loop was blocked for more than 5ms."""
+    blocked = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal blocked
+        while running:
+            before = time.perf_counter()
+            await asyncio.sleep(0)
+            lag = time.perf_counter() - before
+            if lag > 0.005:
+                blocked += lag
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.gather(*coroutines)
+    running = False
+    await ticker_task
+    return blocked
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_do_not_block_event_loop():
+    latency = 0.005
+    sessions = 500
+    storage = DynamoDbChatStorage(table_name='test_table', region='us-east-1', max_pool_connections=50)
+    storage.table = BlockingTableStub(latency)
+    message = ConversationMessage(role=ParticipantRole.USER.value, content=[{'text': 'Hello'}])
+
+    # Before: the blocking boto3 calls were made directly on the event loop
+    async def blocking_save(user_id):
+        storage.table.get_item(Key={'PK': user_id, 'SK': 'session1#agent1'})
+        storage.table.put_item(Item={'PK': user_id, 'SK': 'session1#agent1'})
+    blocked_before = await measure_loop_blocking(blocking_save(f'user{i}') for i in range(sessions))
+
+    storage.table.items.clear()
+    blocked_after = await measure_loop_blocking(
+        storage.save_chat_message(f'user{i}', 'session1', 'agent1', message) for i in range(sessions)
+    )
+    await storage.close()
+
+    assert len(storage.table.items) == sessions
+    assert blocked_before >= sessions * 2 * latency * 0.9
+    assert blocked_after < blocked_before / 4
+
+
+@pytest.mark.asyncio
+async def test_close_does_not_block_event_loop():
+    latency = 0.2
+    storage = DynamoDbChatStorage(table_name='test_table', region='us-east-1')
+    storage.table = BlockingTableStub(latency)
+
+    fetch = asyncio.create_task(storage.fetch_chat('user1', 'session1', 'agent1'))
+    await asyncio.sleep(0.01)
+    # Closing waits for the call in flight, without blocking the other requests
+    blocked = await measure_loop_blocking([storage.close()])
+
+    assert fetch.done() and await fetch == []
+    assert blocked < latency / 4
@@ -1,3 +1,5 @@
+import time
+import tracemalloc
 import pytest
 from unittest.mock import patch
 from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage
@@ -162,4 +164,168 @@ async def test_save_chat_messages_timestamp(storage):
     assert result[0].role == "user"
     assert result[0].content == "Hello"
     assert result[1].role == "assistant"
-    assert result[1].content == "Hello from assistant"
\ No newline at end of file
+    assert result[1].content == "Hello from assistant"
+@pytest.mark.asyncio
+async def test_fetch_session(storage):
+    await storage.save_chat_message("user1", "session1", "agent1", ConversationMessage(role="user", content=[{'text': "Hello"}]))
+    await storage.save_chat_message("user1", "session1", "agent2", ConversationMessage(role="assistant", content=[{'text': "Hi"}]))
+    await storage.save_chat_message("user1", "session2", "agent1", ConversationMessage(role="user", content=[{'text': "Other"}]))
+
+    snapshot = await storage.fetch_session("user1", "session1")
+
+    assert set(snapshot.conversations) == {"agent1", "agent2"}
+    all_chats = await storage.fetch_all_chats("user1", "session1")
+    assert [m.content for m in snapshot.all_chats()] == [m.content for m in all_chats]
+    assert snapshot.agent_chat("agent1")[0].content == [{'text': "Hello"}]
+
+@pytest.mark.asyncio
+async def test_save_chat_messages_skips_consecutive_first_message(storage):
+    await storage.save_chat_message("user1", "session1", "agent1", ConversationMessage(role="user", content="Hello"))
+
+    result = await storage.save_chat_messages("user1", "session1", "agent1", [
+        ConversationMessage(role="user", content="Hello again"),
+        ConversationMessage(role="assistant", content="Hi")
+    ])
+
+    assert [(m.role, m.content) for m in result] == [("user", "Hello"), ("assistant", "Hi")]
+
+@pytest.mark.asyncio
+async def test_fetch_all_chats_merges_agents_by_timestamp(storage):
+    for i in range(3):
+        for agent_id in ("agent1", "agent2"):
+            await storage.save_chat_message("user1", "session1", agent_id, ConversationMessage(role="user", content=[{'text': f"Q{i} {agent_id}"}]))
+            await storage.save_chat_message("user1", "session1", agent_id, ConversationMessage(role="assistant", content=[{'text': f"A{i}"}]))
+    await storage.save_chat_message("user1", "session2", "agent1", ConversationMessage(role="user", content=[{'text': "Other"}]))
+
+    with patch.object(InMemoryChatStorage, '_remove_timestamps', side_effect=list):
+        result = await storage.fetch_all_chats("user1", "session1")
+
+    assert len(result) == 12
+    assert [m.timestamp for m in result] == sorted(m.timestamp for m in result)
+    assert [m.content[0]['text'] for m in result if 'agent1' in m.content[0]['text']] == [
+        "Q0 agent1", "[agent1] A0", "Q1 agent1", "[agent1] A1", "Q2 agent1", "[agent1] A2"
+    ]
+
+@pytest.mark.asyncio
+async def test_conversation_is_bounded_by_max_history_size(storage):
+    for i in range(5):
+        await storage.save_chat_messages("user1", "session1", "agent1", [
+            ConversationMessage(role="user", content=f"Question {i}"),
+            ConversationMessage(role="assistant", content=f"Answer {i}")
+        ], max_history_size=5)
+
+    conversation = storage.conversations[("user1", "session1")]["agent1"]
+    assert [m.content for m in conversation] == ["Question 3", "Answer 3", "Question 4", "Answer 4"]
+
+    # Saving without a limit, as the supervisor does, keeps the messages and the same deque
+    await storage.save_chat_message("user1", "session1", "agent1", ConversationMessage(role="user", content="Question 5"))
+    assert len(await storage.fetch_chat("user1", "session1", "agent1")) == 5
+    await storage.save_chat_message("user1", "session1", "agent1", ConversationMessage(role="assistant", content="Answer 5"),
+                                    max_history_size=4)
+    assert storage.conversations[("user1", "session1")]["agent1"] is conversation
+    assert [m.content for m in conversation] == ["Question 4", "Answer 4", "Question 5", "Answer 5"]
+
+@pytest.mark.asyncio
+async def test_fetch_unknown_conversation_stores_nothing(storage):
+    assert await storage.fetch_chat("user1", "session1", "agent1") == []
+    assert await storage.fetch_all_chats("user1", "session1") == []
+    assert storage.conversations == {}
+
+@pytest.mark.asyncio
+async def test_fetch_recent_chats(storage):
+    for i in range(3):
+        for agent_id in ("agent1", "agent2"):
+            await storage.save_chat_messages("user1", "session1", agent_id, [
+                ConversationMessage(role="user", content=[{'text': f"Q{i} {agent_id}"}]),
+                ConversationMessage(role="assistant", content=[{'text': f"A{i}"}])
+            ])
+
+    def texts(messages):
+        return [m.content[0]['text'] for m in messages]
+
+    all_chats = texts(await storage.fetch_all_chats("user1", "session1"))
+    assert texts(await storage.fetch_recent_chats("user1", "session1")) == all_chats
+    assert texts(await storage.fetch_recent_chats("user1", "session1", max_messages=3)) == all_chats[-3:]
+
+    per_agent = await storage.fetch_recent_chats("user1", "session1", max_messages_per_agent=2)
+    assert texts(per_agent) == ["Q2 agent1", "[agent1] A2", "Q2 agent2", "[agent2] A2"]
+    both = await storage.fetch_recent_chats("user1", "session1", max_messages=3, max_messages_per_agent=2)
+    assert texts(both) == texts(per_agent)[-3:]
+
+def turn(text):
+    return [ConversationMessage(role="user", content=[{'text': text}]),
+            ConversationMessage(role="assistant", content=[{'text': text}])]
+
+@pytest.mark.asyncio
+async def test_sessions_expire_after_ttl(mock_logger):
+    storage = InMemoryChatStorage(session_ttl=60)
+    with patch('multi_agent_orchestrator.storage.in_memory_chat_storage.time.monotonic') as monotonic:
+        monotonic.return_value = 1000
+        await storage.save_chat_messages("user1", "session1", "agent1", turn("Old"))
+        monotonic.return_value = 1030
+        await storage.save_chat_messages("user1", "session2", "agent1", turn("Recent"))
+
+        monotonic.return_value = 1070
+        assert await storage.fetch_chat("user1", "session1", "agent1") == []
+        assert len(await storage.fetch_chat("user1", "session2", "agent1")) == 2
+
+    metrics = storage.get_metrics()
+    assert metrics['sessions'] == 1
+    assert metrics['evicted_sessions_ttl'] == 1
+
+@pytest.mark.asyncio
+async def test_least_recently_used_session_is_evicted(storage):
+    storage.max_sessions = 2
+    await storage.save_chat_messages("user1", "session1", "agent1", turn("One"))
+    await storage.save_chat_messages("user1", "session2", "agent1", turn("Two"))
+    await storage.fetch_chat("user1", "session1", "agent1")
+    await storage.save_chat_messages("user1", "session3", "agent1", turn("Three"))
+
+    assert list(storage.conversations) == [("user1", "session1"), ("user1", "session3")]
+    assert storage.get_metrics()['evicted_sessions_max_sessions'] == 1
+
+@pytest.mark.asyncio
+async def test_byte_budget_evicts_sessions(storage):
+    message_size = len('[{"text": "xxxxxxxxxx"}]')
+    storage.max_bytes = message_size * 5
+    for i in range(3):
+        await storage.save_chat_messages("user1", f"session{i}", "agent1", turn("x" * 10))
+
+    metrics = storage.get_metrics()
+    assert metrics['sessions'] == 2
+    assert metrics['bytes'] == message_size * 4
+    assert metrics['evicted_sessions_max_bytes'] == 1
+    assert metrics['evicted_bytes'] == message_size * 2
+
+    # Messages dropped by max_history_size are no longer counted
+    for i in range(3):
+        await storage.save_chat_messages("user1", "session2", "agent1", turn("x" * 10), max_history_size=2)
+    assert storage.get_metrics()['bytes'] == message_size * 4
+
+class UnslottedTimestampedMessage:
+    """Message layout before __slots__, with a per-instance __dict__."""
+    def __init__(self, role, content=None, timestamp=0):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp or int(time.time() * 1000)
+
+async def store_memory(storage, sessions, turns):
+    """Return the memory allocated to store the given number of turns per session."""
+    messages = turn("Hello") * turns
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(sessions):
+        await storage.save_chat_messages("user1", f"session{i}", "agent1", messages)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return allocated
+
+@pytest.mark.asyncio
+async def test_slotted_messages_memory_benchmark(mock_logger):
+    """100k messages in memory: compare the slotted messages with the previous layout."""
+    sessions, turns = 1000, 50
+    slotted = await store_memory(InMemoryChatStorage(), sessions, turns)
+    with patch('multi_agent_orchestrator.storage.in_memory_chat_storage.TimestampedMessage', UnslottedTimestampedMessage):
+        unslotted = await store_memory(InMemoryChatStorage(), sessions, turns)
+
+    assert slotted < unslotted * 0.8
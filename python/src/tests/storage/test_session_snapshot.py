@@ -0,0 +1,49 @@
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole, TimestampedMessage
+from multi_agent_orchestrator.storage import SessionSnapshot
+
+
+def make_snapshot():
+    return SessionSnapshot("user1", "session1", {
+        "agent1": [
+            TimestampedMessage(role=ParticipantRole.USER.value, content=[{'text': 'Hello 1'}], timestamp=1),
+            TimestampedMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': 'Hi 1'}], timestamp=2),
+        ],
+        "agent2": [
+            TimestampedMessage(role=ParticipantRole.USER.value, content=[{'text': 'Hello 2'}], timestamp=3),
+            TimestampedMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': 'Hi 2'}], timestamp=4),
+        ],
+    })
+
+def test_agent_chat():
+    history = make_snapshot().agent_chat("agent2")
+
+    assert [message.content[0]['text'] for message in history] == ['Hello 2', 'Hi 2']
+    assert all(not isinstance(message, TimestampedMessage) for message in history)
+    assert make_snapshot().agent_chat("unknown") == []
+
+def test_all_chats():
+    all_chats = make_snapshot().all_chats()
+
+    assert [message.content[0]['text'] for message in all_chats] == [
+        'Hello 1', '[agent1] Hi 1', 'Hello 2', '[agent2] Hi 2'
+    ]
+
+def test_append_skips_consecutive_role_and_trims():
+    snapshot = make_snapshot()
+
+    snapshot.append("agent1", ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': 'Again'}]))
+    assert len(snapshot.agent_chat("agent1")) == 2
+
+    snapshot.append("agent1", ConversationMessage(role=ParticipantRole.USER.value, content=[{'text': 'Next'}]))
+    snapshot.append("agent1", ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': 'Reply'}]), 3)
+    assert [message.content[0]['text'] for message in snapshot.agent_chat("agent1")] == ['Next', 'Reply']
+
+def test_all_chats_window():
+    snapshot = make_snapshot()
+
+    assert [message.content[0]['text'] for message in snapshot.all_chats(max_messages=3)] == [
+        '[agent1] Hi 1', 'Hello 2', '[agent2] Hi 2'
+    ]
+    assert [message.content[0]['text'] for message in snapshot.all_chats(max_messages_per_agent=1)] == [
+        '[agent1] Hi 1', '[agent2] Hi 2'
+    ]
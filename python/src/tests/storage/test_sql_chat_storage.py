@@ -1,4 +1,6 @@
 import os
+import json
+import time
 import pytest
 import tempfile
 import pytest_asyncio
@@ -180,6 +182,29 @@ async def test_fetch_all_chats(sql_storage: SqlChatStorage):
     assert "[agent1] Message from agent1" in agent_messages
     assert "[agent2] Message from agent2" in agent_messages
 
+@pytest.mark.asyncio
+async def test_fetch_session(sql_storage: SqlChatStorage):
+    """Test loading every agent conversation of a session at once."""
+    for agent_id in ["agent1", "agent2"]:
+        await sql_storage.save_chat_messages(
+            user_id="test_user",
+            session_id="test_session",
+            agent_id=agent_id,
+            new_messages=[
+                ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": f"Hello {agent_id}"}]),
+                ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": f"Hi from {agent_id}"}])
+            ]
+        )
+
+    snapshot = await sql_storage.fetch_session("test_user", "test_session")
+
+    assert set(snapshot.conversations) == {"agent1", "agent2"}
+    agent_chat = snapshot.agent_chat("agent1")
+    assert [msg.content[0]["text"] for msg in agent_chat] == ["Hello agent1", "Hi from agent1"]
+    all_texts = [msg.content[0]["text"] for msg in snapshot.all_chats()]
+    assert "[agent2] Hi from agent2" in all_texts
+    assert len(all_texts) == 4
+
 @pytest.mark.asyncio
 async def test_multiple_users_and_sessions(sql_storage: SqlChatStorage):
     """Test handling multiple users and sessions independently."""
@@ -371,4 +396,157 @@ async def test_database_connection_handling():
                 session_id="test_session",
                 agent_id="test_agent",
                 new_message=message
-            ) 
\ No newline at end of file
+            ) 
+
+class RoundTripCounter:
+    """Count the statements and batches sent to the database by a storage."""
+    def __init__(self, storage: SqlChatStorage):
+        self.executes = 0
+        self.batches = 0
+        execute, batch = storage.client.execute, storage.client.batch
+
+        async def counted_execute(*args, **kwargs):
+            self.executes += 1
+            return await execute(*args, **kwargs)
+
+        async def counted_batch(*args, **kwargs):
+            self.batches += 1
+            return await batch(*args, **kwargs)
+
+        storage.client.execute = counted_execute
+        storage.client.batch = counted_batch
+
+    @property
+    def round_trips(self) -> int:
+        return self.executes + self.batches
+
+def turn(i: int) -> list[ConversationMessage]:
+    return [
+        ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": f"Question {i}"}]),
+        ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": f"Answer {i}"}])
+    ]
+
+@pytest.mark.asyncio
+async def test_save_turn_is_one_transaction(sql_storage: SqlChatStorage):
+    """Test that the next message index is cached and a turn is written with a single batch."""
+    sql_storage.fetch_after_save = False
+    counter = RoundTripCounter(sql_storage)
+
+    assert await sql_storage.save_chat_messages("test_user", "test_session", "test_agent", turn(0))
+    assert counter.round_trips == 2  # initial read of the last message, then the batch
+
+    for i in range(1, 5):
+        assert await sql_storage.save_chat_messages("test_user", "test_session", "test_agent", turn(i), max_history_size=4)
+    assert counter.executes == 1
+    assert counter.batches == 5
+
+    # The cached last role still rejects consecutive messages
+    assert not await sql_storage.save_chat_message("test_user", "test_session", "test_agent", turn(5)[1])
+
+    messages = await sql_storage.fetch_chat("test_user", "test_session", "test_agent")
+    assert [m.content[0]["text"] for m in messages] == ["Question 3", "Answer 3", "Question 4", "Answer 4"]
+
+@pytest.mark.asyncio
+async def test_save_session_messages_is_one_transaction(sql_storage: SqlChatStorage):
+    """Test that the turns of several agents are written with a single batch."""
+    await sql_storage.save_chat_messages("test_user", "test_session", "agent_0", turn(0))
+    counter = RoundTripCounter(sql_storage)
+
+    assert await sql_storage.save_session_messages("test_user", "test_session", {
+        f"agent_{i}": turn(i + 1) for i in range(3)
+    })
+    # The last message of the new agents is read, then everything is written at once
+    assert counter.executes == 2
+    assert counter.batches == 1
+
+    # Only the conversation whose last message has the same role is skipped
+    assert not await sql_storage.save_session_messages("test_user", "test_session", {
+        "agent_0": turn(4)[1:], "agent_1": turn(4)[1:]
+    })
+    for i in range(3):
+        messages = await sql_storage.fetch_chat("test_user", "test_session", f"agent_{i}")
+        assert [m.content[0]["text"] for m in messages][-2:] == [f"Question {i + 1}", f"Answer {i + 1}"]
+
+@pytest.mark.asyncio
+async def test_stale_index_cache_is_reloaded(sql_storage: SqlChatStorage):
+    """Test that a save still succeeds when another writer used the cached message index."""
+    await sql_storage.save_chat_messages("test_user", "test_session", "test_agent", turn(0))
+
+    # Another process appends a turn to the same conversation
+    for index, message in enumerate(turn(1), start=2):
+        await sql_storage.client.execute("""
+            INSERT INTO conversations (user_id, session_id, agent_id, message_index, role, content, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, ["test_user", "test_session", "test_agent", index, message.role, json.dumps(message.content), index])
+
+    messages = await sql_storage.save_chat_messages("test_user", "test_session", "test_agent", turn(2))
+    assert [m.content[0]["text"] for m in messages] == [
+        "Question 0", "Answer 0", "Question 1", "Answer 1", "Question 2", "Answer 2"
+    ]
+
+@pytest.mark.asyncio
+async def test_save_turns_per_second(sql_storage: SqlChatStorage):
+    """Benchmark the number of turns saved per second on a local SQLite file."""
+    turns = 200
+    counter = RoundTripCounter(sql_storage)
+
+    async def benchmark(agent_id: str) -> tuple[float, float]:
+        """Return the turns per second and the database round trips per turn."""
+        round_trips = counter.round_trips
+        start = time.perf_counter()
+        for i in range(turns):
+            await sql_storage.save_chat_messages("test_user", "test_session", agent_id, turn(i), max_history_size=20)
+        return turns / (time.perf_counter() - start), (counter.round_trips - round_trips) / turns
+
+    with_fetch_tps, with_fetch_round_trips = await benchmark("agent1")
+    sql_storage.fetch_after_save = False
+    without_fetch_tps, without_fetch_round_trips = await benchmark("agent2")
+
+    assert with_fetch_tps > 0 and without_fetch_tps > 0
+    assert with_fetch_round_trips == 2 + 1 / turns  # batch and re-fetch, plus the first index read
+    assert without_fetch_round_trips == 1 + 1 / turns
+    assert len(await sql_storage.fetch_chat("test_user", "test_session", "agent2")) == 20
+
+@pytest.mark.asyncio
+async def test_fetch_chat_limit(sql_storage: SqlChatStorage):
+    """Test that fetch_chat returns the most recent messages, oldest first."""
+    for i in range(5):
+        await sql_storage.save_chat_messages("test_user", "test_session", "test_agent", turn(i))
+
+    messages = await sql_storage.fetch_chat("test_user", "test_session", "test_agent", max_history_size=3)
+    assert [m.content[0]["text"] for m in messages] == ["Answer 3", "Question 4", "Answer 4"]
+
+@pytest.mark.asyncio
+async def test_fetch_recent_chats(sql_storage: SqlChatStorage):
+    """Test that fetch_recent_chats reads only the window of the session, in one query."""
+    for i in range(4):
+        for agent_id in ("agent1", "agent2"):
+            await sql_storage.save_chat_messages("test_user", "test_session", agent_id, turn(i))
+    all_chats = await sql_storage.fetch_all_chats("test_user", "test_session")
+
+    counter = RoundTripCounter(sql_storage)
+    recent = await sql_storage.fetch_recent_chats("test_user", "test_session", max_messages=3)
+    assert [m.content for m in recent] == [m.content for m in all_chats[-3:]]
+    per_agent = await sql_storage.fetch_recent_chats("test_user", "test_session", max_messages_per_agent=2)
+    assert [m.content[0]["text"] for m in per_agent] == [
+        "Question 3", "[agent1] Answer 3", "Question 3", "[agent2] Answer 3"
+    ]
+    both = await sql_storage.fetch_recent_chats("test_user", "test_session", max_messages=1, max_messages_per_agent=2)
+    assert [m.content[0]["text"] for m in both] == ["[agent2] Answer 3"]
+    assert counter.round_trips == 3
+
+@pytest.mark.asyncio
+async def test_queries_do_not_sort_in_memory(sql_storage: SqlChatStorage):
+    """Test that the history queries are served in index order."""
+    queries = [
+        ("""SELECT role, content FROM conversations
+            WHERE user_id = ? AND session_id = ? AND agent_id = ?
+            ORDER BY message_index DESC LIMIT ?""", ["test_user", "test_session", "test_agent", 3]),
+        ("""SELECT role, content, timestamp, agent_id FROM conversations
+            WHERE user_id = ? AND session_id = ?
+            ORDER BY timestamp ASC""", ["test_user", "test_session"]),
+    ]
+    for query, params in queries:
+        plan = " ".join(str(row[3]) for row in await sql_storage.client.execute(f"EXPLAIN QUERY PLAN {query}", params))
+        assert "USING INDEX" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,155 @@
+import pytest
+from unittest.mock import AsyncMock
+from multi_agent_orchestrator.types import ConversationMessage, ParticipantRole
+from multi_agent_orchestrator.storage import InMemoryChatStorage, TieredChatStorage
+
+def user_message(text):
+    return ConversationMessage(role=ParticipantRole.USER.value, content=[{'text': text}])
+
+def assistant_message(text):
+    return ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{'text': text}])
+
+class SessionlessChatStorage(InMemoryChatStorage):
+    """Durable storage that cannot load a whole session with one read."""
+    async def fetch_session(self, user_id, session_id):
+        return None
+
+@pytest.fixture
+def durable_storage():
+    storage = InMemoryChatStorage()
+    storage.fetch_session = AsyncMock(wraps=storage.fetch_session)
+    storage.fetch_chat = AsyncMock(wraps=storage.fetch_chat)
+    return storage
+
+@pytest.fixture
+def storage(durable_storage):
+    return TieredChatStorage(durable_storage)
+
+def texts(messages):
+    return [message.content[0]['text'] for message in messages]
+
+@pytest.mark.asyncio
+async def test_read_through_loads_the_session_once(storage, durable_storage):
+    await durable_storage.save_chat_messages('user1', 'session1', 'agent1', [user_message('Q1'), assistant_message('A1')])
+    await durable_storage.save_chat_messages('user1', 'session1', 'agent2', [user_message('Q2'), assistant_message('A2')])
+
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Q1', 'A1']
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent2')) == ['Q2', 'A2']
+    assert await storage.fetch_chat('user1', 'session1', 'agent3') == []
+    assert len(await storage.fetch_all_chats('user1', 'session1')) == 4
+
+    assert durable_storage.fetch_session.await_count == 1
+    assert durable_storage.fetch_chat.await_count == 0
+    assert storage.get_metrics() == {'hits': 3, 'misses': 1, 'conversations': 2}
+
+@pytest.mark.asyncio
+async def test_write_through_updates_the_cache(storage, durable_storage):
+    await storage.fetch_chat('user1', 'session1', 'agent1')
+    await storage.save_chat_messages('user1', 'session1', 'agent1', [user_message('Q1'), assistant_message('A1')])
+    await storage.save_chat_message('user1', 'session1', 'agent1', assistant_message('Consecutive'))
+    for i in range(2, 4):
+        await storage.save_chat_messages('user1', 'session1', 'agent1',
+                                         [user_message(f'Q{i}'), assistant_message(f'A{i}')], max_history_size=4)
+    await storage.save_chat_message('user1', 'session1', 'agent2', user_message('Hello'))
+
+    cached = await storage.fetch_chat('user1', 'session1', 'agent1')
+    durable = await durable_storage.fetch_chat('user1', 'session1', 'agent1')
+    assert texts(cached) == texts(durable) == ['Q2', 'A2', 'Q3', 'A3']
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent2')) == ['Hello']
+    assert durable_storage.fetch_session.await_count == 1
+
+@pytest.mark.asyncio
+async def test_invalidate_session(storage, durable_storage):
+    await storage.save_chat_message('user1', 'session1', 'agent1', user_message('Hello'))
+    await storage.fetch_chat('user1', 'session1', 'agent1')
+    await durable_storage.save_chat_message('user1', 'session1', 'agent1', assistant_message('Written elsewhere'))
+
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Hello']
+    storage.invalidate_session('user1', 'session1')
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Hello', 'Written elsewhere']
+
+class WriteCounter:
+    """Counts the writes of each session of a durable storage, as a counter kept next to the conversations would."""
+    def __init__(self, durable_storage):
+        self.writes = {}
+        save_chat_message = durable_storage.save_chat_message
+
+        async def counting_save(user_id, session_id, *args, **kwargs):
+            result = await save_chat_message(user_id, session_id, *args, **kwargs)
+            self.writes[(user_id, session_id)] = self.writes.get((user_id, session_id), 0) + 1
+            return result
+        durable_storage.save_chat_message = counting_save
+
+    async def __call__(self, user_id, session_id):
+        return self.writes.get((user_id, session_id), 0)
+
+@pytest.mark.asyncio
+async def test_stale_version_is_reloaded(durable_storage):
+    storage = TieredChatStorage(durable_storage, version_provider=WriteCounter(durable_storage))
+    await storage.fetch_chat('user1', 'session1', 'agent1')
+    await storage.save_chat_message('user1', 'session1', 'agent1', user_message('Hello'))
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Hello']
+    assert durable_storage.fetch_session.await_count == 1
+
+    # Another process writes the session
+    await durable_storage.save_chat_message('user1', 'session1', 'agent1', assistant_message('Hi'))
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Hello', 'Hi']
+    assert durable_storage.fetch_session.await_count == 2
+
+@pytest.mark.asyncio
+async def test_write_between_own_write_and_version_read_invalidates(durable_storage):
+    version_provider = WriteCounter(durable_storage)
+    storage = TieredChatStorage(durable_storage, version_provider=version_provider)
+    await storage.fetch_chat('user1', 'session1', 'agent1')
+
+    async def version_after_external_write(user_id, session_id):
+        # Another process writes the session right after our own write
+        if not await durable_storage.fetch_chat(user_id, session_id, 'agent2'):
+            await durable_storage.save_chat_message(user_id, session_id, 'agent2', user_message('Written elsewhere'))
+        return await version_provider(user_id, session_id)
+    storage.version_provider = version_after_external_write
+    await storage.save_chat_message('user1', 'session1', 'agent1', user_message('Hello'))
+
+    # The version moved by two writes: the cache does not adopt it
+    storage.version_provider = version_provider
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent2')) == ['Written elsewhere']
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Hello']
+    assert durable_storage.fetch_session.await_count == 2
+
+@pytest.mark.asyncio
+async def test_least_recently_used_conversations_are_evicted(durable_storage):
+    storage = TieredChatStorage(durable_storage, max_conversations=2)
+    for session_id in ('session1', 'session2', 'session3'):
+        await storage.fetch_chat('user1', session_id, 'agent1')
+
+    assert list(storage.conversations) == [('user1', 'session2', 'agent1'), ('user1', 'session3', 'agent1')]
+    assert ('user1', 'session1') not in storage.complete_sessions
+    await storage.fetch_chat('user1', 'session1', 'agent1')
+    assert storage.get_metrics()['misses'] == 4
+
+@pytest.mark.asyncio
+async def test_storage_without_sessions_caches_agent_conversations():
+    durable_storage = SessionlessChatStorage()
+    await durable_storage.save_chat_messages('user1', 'session1', 'agent1', [user_message('Q1'), assistant_message('A1')])
+    storage = TieredChatStorage(durable_storage)
+
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Q1', 'A1']
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent1')) == ['Q1', 'A1']
+    assert texts(await storage.fetch_all_chats('user1', 'session1')) == ['Q1', '[agent1] A1']
+    assert await storage.fetch_session('user1', 'session1') is None
+    assert storage.hits == 1
+
+@pytest.mark.asyncio
+async def test_save_session_messages_writes_through(storage, durable_storage):
+    await storage.fetch_session('user1', 'session1')
+    durable_storage.save_session_messages = AsyncMock(wraps=durable_storage.save_session_messages)
+
+    await storage.save_session_messages('user1', 'session1', {
+        'agent1': [user_message('Q1'), assistant_message('A1')],
+        'agent2': [user_message('Q2'), assistant_message('A2')],
+    })
+
+    durable_storage.save_session_messages.assert_awaited_once()
+    assert texts(await storage.fetch_chat('user1', 'session1', 'agent2')) == ['Q2', 'A2']
+    assert texts(await durable_storage.fetch_chat('user1', 'session1', 'agent2')) == ['Q2', 'A2']
+    assert durable_storage.fetch_session.await_count == 1
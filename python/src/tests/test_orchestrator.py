@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from typing import AsyncIterable
@@ -15,7 +16,8 @@ from multi_agent_orchestrator.agents import (
     Agent,
     AgentStreamResponse,
     AgentResponse,
-    AgentProcessingResult
+    AgentProcessingResult,
+    AgentOptions
 )
 from multi_agent_orchestrator.storage import ChatStorage, InMemoryChatStorage
 from multi_agent_orchestrator.utils.logger import Logger
@@ -275,7 +277,14 @@ async def test_save_messages(orchestrator, mock_agent):
         mock_agent
     )
 
-    assert orchestrator.storage.save_chat_message.call_count == 2
+    orchestrator.storage.save_chat_messages.assert_awaited_once_with(
+        "user1",
+        "session1",
+        mock_agent.id,
+        messages,
+        orchestrator.config.MAX_MESSAGE_PAIRS_PER_AGENT
+    )
+    orchestrator.storage.save_chat_message.assert_not_called()
 
 # Test execution time measurement
 @pytest.mark.asyncio
@@ -303,6 +312,19 @@ async def test_measure_execution_time_error(orchestrator):
     assert "test_timer" in orchestrator.execution_times
     assert isinstance(orchestrator.execution_times["test_timer"], float)
 
+@pytest.mark.asyncio
+async def test_execution_times_can_be_assigned(orchestrator):
+    async def test_fn():
+        return "test result"
+
+    orchestrator.config.LOG_EXECUTION_TIMES = True
+    execution_times = {}
+    orchestrator.execution_times = execution_times
+    await orchestrator.measure_execution_time("test_timer", test_fn)
+
+    assert orchestrator.execution_times is execution_times
+    assert "test_timer" in execution_times
+
 # Test metadata creation
 def test_create_metadata(orchestrator, mock_agent):
     classifier_result = ClassifierResult(selected_agent=mock_agent, confidence=0.9)
@@ -340,4 +362,457 @@ def test_create_metadata_no_agent(orchestrator):
 def test_get_fallback_result(orchestrator, mock_agent):
     result = orchestrator.get_fallback_result()
     assert result.selected_agent == mock_agent
-    assert result.confidence == 0
\ No newline at end of file
+    assert result.confidence == 0
+
+# Test history prefetch
+@pytest.mark.asyncio
+async def test_route_request_prefetches_last_agent_history(orchestrator, mock_agent):
+    orchestrator.config.PREFETCH_AGENT_HISTORY = True
+    orchestrator.config.LOG_EXECUTION_TIMES = True
+    orchestrator.add_agent(mock_agent)
+    orchestrator.classifier.classify.return_value = ClassifierResult(selected_agent=mock_agent, confidence=0.9)
+    history = [ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": "previous"}])]
+    orchestrator.storage.fetch_chat.return_value = history
+    mock_agent.process_request.return_value = ConversationMessage(
+        role=ParticipantRole.ASSISTANT.value,
+        content=[{"text": "Test response"}]
+    )
+
+    # First turn: nothing known about the session, history is fetched after classification
+    await orchestrator.route_request("first", "user1", "session1")
+    assert "Agent history prefetch | Latency saved" not in orchestrator.execution_times
+    assert orchestrator.last_selected_agents["user1#session1"] == mock_agent.id
+
+    # Second turn: the last agent's history is fetched while classifying
+    events = []
+
+    async def fetch_chat(*args):
+        events.append("fetch started")
+        await asyncio.sleep(0.05)
+        events.append("fetch finished")
+        return history
+
+    async def classify(*args):
+        await asyncio.sleep(0.05)
+        events.append("classified")
+        return ClassifierResult(selected_agent=mock_agent, confidence=0.9)
+
+    orchestrator.storage.fetch_chat.reset_mock()
+    orchestrator.storage.fetch_chat.side_effect = fetch_chat
+    orchestrator.classifier.classify.side_effect = classify
+    await orchestrator.route_request("second", "user1", "session1")
+
+    orchestrator.storage.fetch_chat.assert_called_once_with("user1", "session1", mock_agent.id)
+    assert mock_agent.process_request.call_args.args[3] == history
+    assert events.index("fetch started") < events.index("classified")
+    assert orchestrator.execution_times["Agent history prefetch | Latency saved"] > 0
+
+@pytest.mark.asyncio
+async def test_route_request_cancels_unused_prefetch(orchestrator, mock_agent):
+    orchestrator.config.PREFETCH_AGENT_HISTORY = True
+    other_agent = AsyncMock(spec=Agent)
+    other_agent.id = "other_agent"
+    other_agent.name = "Other Agent"
+    other_agent.description = "Other Agent Description"
+    other_agent.save_chat = True
+    orchestrator.add_agent(mock_agent)
+    orchestrator.add_agent(other_agent)
+    orchestrator.remember_selected_agent("user1", "session1", other_agent)
+
+    fetch_started = asyncio.Event()
+    async def slow_fetch(user_id, session_id, agent_id):
+        if agent_id == other_agent.id:
+            fetch_started.set()
+            await asyncio.sleep(10)
+        return []
+    orchestrator.storage.fetch_chat.side_effect = slow_fetch
+
+    prefetches = orchestrator.start_history_prefetch("user1", "session1")
+    await fetch_started.wait()
+    history = await orchestrator.resolve_history_prefetch(prefetches, mock_agent)
+    await asyncio.sleep(0)
+
+    assert history is None
+    assert prefetches[other_agent.id].cancelled()
+
+def test_remember_selected_agent_is_bounded(orchestrator, mock_agent):
+    orchestrator.MAX_TRACKED_SESSIONS = 2
+    for i in range(3):
+        orchestrator.remember_selected_agent("user1", f"session{i}", mock_agent)
+    assert list(orchestrator.last_selected_agents) == ["user1#session1", "user1#session2"]
+
+# Test session snapshot
+@pytest.mark.asyncio
+async def test_route_request_with_session_snapshot(mock_classifier, mock_agent, mock_boto3_client):
+    storage = InMemoryChatStorage()
+    await storage.save_chat_messages("user1", "session1", mock_agent.id, [
+        ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": "previous"}]),
+        ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": "answer"}])
+    ])
+    orchestrator = MultiAgentOrchestrator(
+        options=OrchestratorConfig(USE_SESSION_SNAPSHOT=True),
+        storage=storage,
+        classifier=mock_classifier,
+        default_agent=mock_agent
+    )
+    orchestrator.add_agent(mock_agent)
+    mock_classifier.classify.return_value = ClassifierResult(selected_agent=mock_agent, confidence=0.9)
+    mock_agent.process_request.return_value = ConversationMessage(
+        role=ParticipantRole.ASSISTANT.value,
+        content=[{"text": "Test response"}]
+    )
+
+    with patch.object(storage, 'fetch_all_chats', wraps=storage.fetch_all_chats) as fetch_all_chats, \
+         patch.object(storage, 'fetch_chat', wraps=storage.fetch_chat) as fetch_chat:
+        await orchestrator.route_request("test input", "user1", "session1")
+
+    fetch_all_chats.assert_not_called()
+    fetch_chat.assert_not_called()
+    classifier_history = mock_classifier.classify.call_args.args[1]
+    assert [m.content[0]['text'] for m in classifier_history] == ["previous", f"[{mock_agent.id}] answer"]
+    agent_history = mock_agent.process_request.call_args.args[3]
+    assert [m.content[0]['text'] for m in agent_history] == ["previous", "answer"]
+    assert len(await storage.fetch_chat("user1", "session1", mock_agent.id)) == 4
+
+# Test write-behind
+@pytest.mark.asyncio
+async def test_route_request_write_behind_saves_turn_once(orchestrator, mock_agent):
+    orchestrator.config.WRITE_BEHIND_MESSAGES = True
+    orchestrator.classifier.classify.return_value = ClassifierResult(selected_agent=mock_agent, confidence=0.9)
+    response_message = ConversationMessage(
+        role=ParticipantRole.ASSISTANT.value,
+        content=[{"text": "Test response"}]
+    )
+    mock_agent.process_request.return_value = response_message
+
+    await orchestrator.route_request("test input", "user1", "session1")
+
+    orchestrator.storage.save_chat_message.assert_not_called()
+    orchestrator.storage.save_chat_messages.assert_awaited_once()
+    saved = orchestrator.storage.save_chat_messages.call_args.args[3]
+    assert [m.role for m in saved] == [ParticipantRole.USER.value, ParticipantRole.ASSISTANT.value]
+    assert saved[0].content == [{"text": "test input"}]
+    assert saved[1] is response_message
+
+@pytest.mark.asyncio
+async def test_write_behind_streaming_flushes_when_stream_ends(orchestrator, mock_streaming_agent):
+    orchestrator.config.WRITE_BEHIND_MESSAGES = True
+    classifier_result = ClassifierResult(selected_agent=mock_streaming_agent, confidence=0.9)
+
+    async def mock_stream():
+        yield AgentStreamResponse(text="Test")
+        yield AgentStreamResponse(final_message=ConversationMessage(
+            role=ParticipantRole.ASSISTANT.value,
+            content=[{"text": "Test"}]
+        ))
+    mock_streaming_agent.process_request.return_value = mock_stream()
+
+    response = await orchestrator.agent_process_request(
+        "test input", "user1", "session1", classifier_result, stream_response=True
+    )
+    orchestrator.storage.save_chat_messages.assert_not_called()
+
+    async for _ in response.output:
+        pass
+
+    orchestrator.storage.save_chat_messages.assert_awaited_once()
+    assert len(orchestrator.storage.save_chat_messages.call_args.args[3]) == 2
+
+@pytest.mark.asyncio
+async def test_write_behind_without_waiting(orchestrator, mock_agent):
+    orchestrator.config.WRITE_BEHIND_MESSAGES = True
+    orchestrator.config.WAIT_FOR_MESSAGE_WRITES = False
+    orchestrator.classifier.classify.return_value = ClassifierResult(selected_agent=mock_agent, confidence=0.9)
+    mock_agent.process_request.return_value = ConversationMessage(
+        role=ParticipantRole.ASSISTANT.value,
+        content=[{"text": "Test response"}]
+    )
+    write_done = asyncio.Event()
+    async def slow_save(*args):
+        await asyncio.sleep(0.01)
+        write_done.set()
+    orchestrator.storage.save_chat_messages.side_effect = slow_save
+
+    response = await orchestrator.route_request("test input", "user1", "session1")
+
+    assert response.output.content == [{"text": "Test response"}]
+    assert not write_done.is_set()
+    assert len(orchestrator.pending_writes) == 1
+
+    await orchestrator.flush_pending_writes()
+
+    assert write_done.is_set()
+    assert not orchestrator.pending_writes
+
+@pytest.mark.asyncio
+async def test_classification_cache_skips_classifier(mock_classifier, mock_agent, mock_boto3_client):
+    orchestrator = MultiAgentOrchestrator(
+        options=OrchestratorConfig(CLASSIFICATION_CACHE_SIZE=10, STICKY_AGENT_MAX_WORDS=1, LOG_EXECUTION_TIMES=True),
+        storage=InMemoryChatStorage(),
+        classifier=mock_classifier
+    )
+    orchestrator.add_agent(mock_agent)
+    mock_classifier.classify.return_value = ClassifierResult(selected_agent=mock_agent, confidence=0.9)
+
+    await orchestrator.classify_request("What is the weather?", "user1", "session1")
+    assert "Classifying user intent" in orchestrator.execution_times
+
+    orchestrator.execution_times.clear()
+    result = await orchestrator.classify_request("what is the weather", "user1", "session1")
+    assert result.selected_agent == mock_agent
+    assert "Classifying user intent | Cache hit" in orchestrator.execution_times
+    assert mock_classifier.classify.call_count == 1
+
+    # A short follow-up goes to the agent that answered last
+    await orchestrator.storage.save_chat_messages("user1", "session1", mock_agent.id, [
+        ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": "Hello"}]),
+        ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": "More details?"}])
+    ])
+    orchestrator.execution_times.clear()
+    result = await orchestrator.classify_request("yes", "user1", "session1")
+    assert result.selected_agent == mock_agent
+    assert "Classifying user intent | Sticky agent" in orchestrator.execution_times
+    assert mock_classifier.classify.call_count == 1
+
+# Test classifier history window
+@pytest.mark.asyncio
+async def test_classifier_history_window(mock_classifier, mock_agent, mock_boto3_client):
+    storage = InMemoryChatStorage()
+    orchestrator = MultiAgentOrchestrator(
+        options=OrchestratorConfig(CLASSIFIER_HISTORY_MAX_TURNS=2, CLASSIFIER_HISTORY_MAX_MESSAGES_PER_AGENT=4),
+        storage=storage,
+        classifier=mock_classifier
+    )
+    orchestrator.add_agent(mock_agent)
+    mock_classifier.classify.return_value = ClassifierResult(selected_agent=mock_agent, confidence=0.9)
+    for i in range(5):
+        await storage.save_chat_messages("user1", "session1", mock_agent.id, [
+            ConversationMessage(role=ParticipantRole.USER.value, content=[{"text": f"Question {i}"}]),
+            ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": f"Answer {i}"}])
+        ])
+
+    with patch.object(storage, 'fetch_all_chats', wraps=storage.fetch_all_chats) as fetch_all_chats:
+        await orchestrator.classify_request("test input", "user1", "session1")
+    fetch_all_chats.assert_not_called()
+    classifier_history = mock_classifier.classify.call_args.args[1]
+    assert [m.content[0]['text'] for m in classifier_history] == [
+        "Question 3", f"[{mock_agent.id}] Answer 3", "Question 4", f"[{mock_agent.id}] Answer 4"
+    ]
+
+    # The character budget keeps the most recent messages that fit
+    orchestrator.config.CLASSIFIER_HISTORY_MAX_CHARS = len("Question 4") + len(f"[{mock_agent.id}] Answer 4")
+    await orchestrator.classify_request("test input", "user1", "session1")
+    classifier_history = mock_classifier.classify.call_args.args[1]
+    assert [m.content[0]['text'] for m in classifier_history] == ["Question 4", f"[{mock_agent.id}] Answer 4"]
+
+# Test speculative routing
+def make_candidate_agent(agent_id, text, delay=0.0, error=None):
+    agent = AsyncMock(spec=Agent)
+    agent.id = agent_id
+    agent.name = agent_id
+    agent.description = f"{agent_id} description"
+    agent.save_chat = True
+    agent.is_streaming_enabled = Mock(return_value=False)
+    agent.cancelled = False
+
+    async def process_request(*args):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            agent.cancelled = True
+            raise
+        if error:
+            raise error
+        return ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": text}])
+    agent.process_request.side_effect = process_request
+    return agent
+
+def make_speculative_orchestrator(mock_classifier, agents, confidences, **options):
+    orchestrator = MultiAgentOrchestrator(
+        options=OrchestratorConfig(SPECULATIVE_TOP_K=3, **options),
+        storage=InMemoryChatStorage(),
+        classifier=mock_classifier
+    )
+    for agent in agents:
+        orchestrator.add_agent(agent)
+    mock_classifier.classify_candidates.return_value = [
+        ClassifierResult(selected_agent=agent, confidence=confidence)
+        for agent, confidence in zip(agents, confidences)
+    ]
+    return orchestrator
+
+@pytest.mark.asyncio
+async def test_speculative_routing_first_response_wins(mock_classifier, mock_boto3_client):
+    fast = make_candidate_agent("fast", "fast answer", delay=0.01)
+    slow = make_candidate_agent("slow", "slow answer", delay=1)
+    failing = make_candidate_agent("failing", "", error=Exception("boom"))
+    orchestrator = make_speculative_orchestrator(mock_classifier, [slow, fast, failing], [0.5, 0.4, 0.3])
+
+    response = await orchestrator.route_request("test input", "user1", "session1")
+
+    assert response.output.content == [{"text": "fast answer"}]
+    assert response.metadata.agent_id == "fast"
+    assert slow.cancelled
+    mock_classifier.classify_candidates.assert_awaited_once_with("test input", [], 3)
+    reports = {report['agent_id']: report for report in response.metadata.candidates}
+    assert [reports[agent_id]['status'] for agent_id in ("slow", "fast", "failing")] == \
+        ["cancelled", "selected", "failed"]
+    assert reports["fast"]['output_chars'] == len("fast answer")
+    assert reports["fast"]['latency'] < 1
+    # Only the winning agent saves the turn
+    assert len(await orchestrator.storage.fetch_chat("user1", "session1", "fast")) == 2
+    assert await orchestrator.storage.fetch_chat("user1", "session1", "slow") == []
+
+@pytest.mark.asyncio
+async def test_speculative_routing_with_scorer(mock_classifier, mock_boto3_client):
+    short = make_candidate_agent("short", "ok", delay=0.01)
+    detailed = make_candidate_agent("detailed", "a detailed answer", delay=0.02)
+    scorer = lambda candidate, message: len(message.content[0]['text'])
+    orchestrator = make_speculative_orchestrator(mock_classifier, [short, detailed], [0.5, 0.5],
+                                                 SPECULATIVE_SCORER=scorer)
+
+    response = await orchestrator.route_request("test input", "user1", "session1")
+    assert response.metadata.agent_id == "detailed"
+    assert [report['score'] for report in response.metadata.candidates] == [2, len("a detailed answer")]
+
+    # The first response clearing the minimum score wins without waiting for the others
+    orchestrator.config.SPECULATIVE_MIN_SCORE = 1
+    response = await orchestrator.route_request("test input", "user2", "session1")
+    assert response.metadata.agent_id == "short"
+    assert response.metadata.candidates[1]['status'] == "cancelled"
+
+@pytest.mark.asyncio
+async def test_speculative_routing_skipped_when_confident(mock_classifier, mock_boto3_client):
+    first = make_candidate_agent("first", "first answer")
+    second = make_candidate_agent("second", "second answer")
+    orchestrator = make_speculative_orchestrator(mock_classifier, [first, second], [0.95, 0.2])
+
+    response = await orchestrator.route_request("test input", "user1", "session1")
+
+    assert response.output.content == [{"text": "first answer"}]
+    assert response.metadata.candidates == []
+    second.process_request.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_speculative_routing_all_candidates_fail(mock_classifier, mock_boto3_client):
+    agents = [make_candidate_agent(f"agent{i}", "", error=Exception(f"error {i}")) for i in range(2)]
+    orchestrator = make_speculative_orchestrator(mock_classifier, agents, [0.5, 0.4],
+                                                 GENERAL_ROUTING_ERROR_MSG_MESSAGE="Routing failed")
+
+    response = await orchestrator.route_request("test input", "user1", "session1")
+
+    assert response.output == "Routing failed"
+
+@pytest.mark.asyncio
+async def test_speculative_routing_reads_streaming_candidates(mock_classifier, mock_streaming_agent, mock_boto3_client):
+    slow = make_candidate_agent("slow", "slow answer", delay=1)
+    async def mock_stream():
+        yield AgentStreamResponse(text="Streamed ")
+        yield AgentStreamResponse(text="answer")
+    mock_streaming_agent.process_request.return_value = mock_stream()
+    orchestrator = make_speculative_orchestrator(mock_classifier, [slow, mock_streaming_agent], [0.5, 0.4])
+
+    response = await orchestrator.route_request("test input", "user1", "session1", stream_response=True)
+
+    assert not response.streaming
+    assert response.output.content == [{"text": "Streamed answer"}]
+    assert response.metadata.agent_id == mock_streaming_agent.id
+
+# Test batch routing
+class BatchAgent(Agent):
+    """Answers with the input after a delay, recording the concurrency of its requests."""
+    def __init__(self, name, delay=0.01):
+        super().__init__(AgentOptions(name=name, description=f"{name} description"))
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.inputs = []
+
+    async def process_request(self, input_text, user_id, session_id, chat_history, additional_params=None):
+        self.inputs.append((session_id, input_text, len(chat_history)))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if input_text == "fail":
+            raise Exception("Agent failure")
+        return ConversationMessage(role=ParticipantRole.ASSISTANT.value, content=[{"text": f"Answer to {input_text}"}])
+
+class OpenAIBatchAgent(BatchAgent):
+    pass
+
+class AnthropicBatchAgent(BatchAgent):
+    pass
+
+def make_batch_orchestrator(mock_classifier, agents, **options):
+    orchestrator = MultiAgentOrchestrator(options=OrchestratorConfig(**options),
+                                          storage=InMemoryChatStorage(),
+                                          classifier=mock_classifier)
+    for agent in agents:
+        orchestrator.add_agent(agent)
+    async def classify(user_input, chat_history):
+        return ClassifierResult(selected_agent=agents[0] if user_input.startswith("a") else agents[-1], confidence=0.9)
+    mock_classifier.classify.side_effect = classify
+    return orchestrator
+
+@pytest.mark.asyncio
+async def test_route_requests_batch_keeps_session_order(mock_classifier, mock_boto3_client):
+    agent = BatchAgent("batch agent")
+    orchestrator = make_batch_orchestrator(mock_classifier, [agent])
+    requests = [(f"a{turn}", "user1", f"session{session}") for turn in range(3) for session in range(5)]
+
+    results = [result async for result in orchestrator.route_requests_batch(requests, max_concurrency=4)]
+
+    assert sorted(result.index for result in results) == list(range(15))
+    assert all(result.response.output.content == [{"text": f"Answer to {result.user_input}"}] for result in results)
+    assert 1 < agent.max_in_flight <= 4
+    for session in range(5):
+        # Each turn sees the history saved by the previous turns of its session
+        assert [(text, history) for session_id, text, history in agent.inputs if session_id == f"session{session}"] \
+            == [("a0", 0), ("a1", 2), ("a2", 4)]
+
+    progress = max((result.progress for result in results), key=lambda progress: progress.completed)
+    assert (progress.total, progress.completed, progress.failed, progress.in_flight) == (15, 15, 0, 0)
+    assert progress.throughput > 0
+
+@pytest.mark.asyncio
+async def test_route_requests_batch_limits_each_provider(mock_classifier, mock_boto3_client):
+    openai_agent = OpenAIBatchAgent("openai agent")
+    anthropic_agent = AnthropicBatchAgent("anthropic agent")
+    orchestrator = make_batch_orchestrator(mock_classifier, [openai_agent, anthropic_agent])
+    assert orchestrator.get_provider(openai_agent) == "openai"
+    requests = ((f"{'a' if i % 2 else 'b'}{i}", "user1", f"session{i}") for i in range(20))
+
+    results = [result async for result in orchestrator.route_requests_batch(
+        requests, max_concurrency=10, max_concurrency_per_provider={"openai": 2})]
+
+    assert len(results) == 20
+    assert results[-1].progress.total is None
+    assert openai_agent.max_in_flight <= 2
+    assert anthropic_agent.max_in_flight > 2
+    assert len(openai_agent.inputs) == len(anthropic_agent.inputs) == 10
+
+@pytest.mark.asyncio
+async def test_route_requests_batch_reports_errors(mock_classifier, mock_boto3_client):
+    agent = BatchAgent("batch agent")
+    orchestrator = make_batch_orchestrator(mock_classifier, [agent], LOG_EXECUTION_TIMES=True)
+
+    results = [result async for result in orchestrator.route_requests_batch(
+        [("fail", "user1", "session1"), ("a1", "user1", "session1"), ("a2", "user2", "session2")])]
+
+    results.sort(key=lambda result: result.index)
+    assert results[0].response is None
+    assert str(results[0].error) == "Agent failure"
+    assert [result.error for result in results[1:]] == [None, None]
+    assert results[1].response.output.content == [{"text": "Answer to a1"}]
+    assert max(result.progress.failed for result in results) == 1
+    # The execution times of each request are kept apart
+    for result in results:
+        assert set(result.execution_times) == {"Classifying user intent", "Agent batch agent | Processing request"}
+    # route_request still reports the error in its response
+    response = await orchestrator.route_request("fail", "user1", "session1")
+    assert response.output == "Agent failure"
+    with pytest.raises(ValueError):
+        await orchestrator.route_requests_batch([], max_concurrency=0).__anext__()
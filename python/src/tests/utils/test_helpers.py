@@ -2,9 +2,12 @@ import pytest
 from datetime import datetime
 from multi_agent_orchestrator.types import ConversationMessage, TimestampedMessage, ParticipantRole
 import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Import the functions to be tested
-from multi_agent_orchestrator.utils import is_tool_input, conversation_to_dict
+from multi_agent_orchestrator.utils import is_tool_input, conversation_to_dict, iterate_in_executor
 
 def test_is_tool_input():
     # Test valid tool input
@@ -52,3 +55,55 @@ def test_conversation_to_dict():
     assert timestamped_message.timestamp != None
     assert timestamped_message.timestamp >= time_now
     assert timestamped_message.timestamp <= time_after
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_executor():
+    executor = ThreadPoolExecutor(max_workers=1)
+    threads = set()
+
+    def numbers():
+        for i in range(3):
+            threads.add(threading.current_thread())
+            time.sleep(0.01)
+            yield i
+
+    assert [item async for item in iterate_in_executor(executor, numbers)] == [0, 1, 2]
+    assert threading.current_thread() not in threads
+
+    def failing():
+        yield 'first'
+        raise ValueError("Stream error")
+
+    items = []
+    with pytest.raises(ValueError, match="Stream error"):
+        async for item in iterate_in_executor(executor, failing):
+            items.append(item)
+    assert items == ['first']
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_executor_stops_when_consumer_stops():
+    executor = ThreadPoolExecutor(max_workers=1)
+    produced = []
+
+    def endless():
+        i = 0
+        while True:
+            produced.append(i)
+            time.sleep(0.01)
+            yield i
+            i += 1
+
+    stream = iterate_in_executor(executor, endless)
+    async for item in stream:
+        if item == 2:
+            break
+    await stream.aclose()
+    # The producer notices the consumer stopped at its next item
+    await asyncio.get_running_loop().run_in_executor(executor, lambda: None)
+    count = len(produced)
+    await asyncio.sleep(0.05)
+    assert len(produced) == count
+    executor.shutdown()
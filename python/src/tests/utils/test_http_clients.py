@@ -0,0 +1,149 @@
+import asyncio
+import json
+import threading
+import pytest
+import pytest_asyncio
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+from anthropic.types import Message
+from multi_agent_orchestrator.agents import AnthropicAgent, AnthropicAgentOptions
+from multi_agent_orchestrator.classifiers import AnthropicClassifier, AnthropicClassifierOptions
+from multi_agent_orchestrator.utils import get_shared_http_client, get_http_client_metrics, close_shared_http_clients
+
+
+class FakeAnthropicServer:
+    """HTTP/1.1 server answering the Anthropic messages API, with keep-alive connections."""
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                headers = dict(line.split(': ', 1) for line in head.decode().split('\r\n')[1:] if ': ' in line)
+                length = int(next((value for key, value in headers.items() if key.lower() == 'content-length'), 0))
+                request = json.loads(await reader.readexactly(length))
+                self.requests += 1
+                # Some latency, so that concurrent requests need several connections
+                await asyncio.sleep(0.01)
+                body = json.dumps(self.message(request)).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                             + f'Content-Length: {len(body)}\r\n\r\n'.encode() + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def message(request):
+        if request.get('tools'):
+            content = [{'type': 'tool_use', 'id': 'tool_1', 'name': 'analyzePrompt',
+                        'input': {'userinput': 'Hello', 'selected_agent': 'agent-0', 'confidence': 0.9}}]
+        else:
+            content = [{'type': 'text', 'text': 'Hello from the fake server'}]
+        return {'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'model': request['model'],
+                'content': content, 'stop_reason': 'end_turn', 'stop_sequence': None,
+                'usage': {'input_tokens': 1, 'output_tokens': 1}}
+
+
+@pytest_asyncio.fixture
+async def fake_server(monkeypatch):
+    server = FakeAnthropicServer()
+    monkeypatch.setenv('ANTHROPIC_BASE_URL', await server.start())
+    await close_shared_http_clients()
+    yield server
+    await close_shared_http_clients()
+    await server.stop()
+
+
+async def send_message(client, text):
+    """Send a messages API request with the low level client API, as the agents would."""
+    return await client.post('/v1/messages', cast_to=Message, body={
+        'model': 'claude-3-5-sonnet-20240620',
+        'max_tokens': 100,
+        'messages': [{'role': 'user', 'content': text}],
+    })
+
+
+@pytest.mark.asyncio
+async def test_agents_and_classifier_share_connections(fake_server):
+    agents = [AnthropicAgent(AnthropicAgentOptions(name=f"Agent {i}", description="A test agent", api_key='test-key'))
+              for i in range(5)]
+    classifier = AnthropicClassifier(AnthropicClassifierOptions(api_key='test-key'))
+    clients = [agent.client for agent in agents] + [classifier.client]
+    assert all(isinstance(client, AsyncAnthropic) for client in clients)
+
+    for _ in range(4):
+        responses = await asyncio.gather(*(send_message(client, "Hello") for client in clients[:-1]))
+        await send_message(classifier.client, "Hello")
+        assert all(response.content[0].text == 'Hello from the fake server' for response in responses)
+
+    metrics = get_http_client_metrics('anthropic')
+    assert metrics['requests'] == fake_server.requests == 24
+    assert metrics['connections'] == fake_server.connections
+    # At most one connection per concurrent request, instead of one pool per agent
+    assert 1 <= metrics['connections'] <= 5
+    assert metrics['reused'] == metrics['requests'] - metrics['connections']
+
+
+@pytest.mark.asyncio
+async def test_custom_http_client_is_not_shared(fake_server):
+    http_client = DefaultAsyncHttpxClient()
+    agent = AnthropicAgent(AnthropicAgentOptions(name="Agent", description="A test agent",
+                                                 api_key='test-key', http_client=http_client))
+
+    await send_message(agent.client, "Hello")
+    assert get_http_client_metrics('anthropic') == {'requests': 0, 'connections': 0, 'reused': 0}
+    await http_client.aclose()
+
+
+def test_shared_client_per_event_loop(monkeypatch):
+    """A process calling asyncio.run per invocation, as Lambda functions do, gets a client per loop."""
+    server = FakeAnthropicServer()
+    server_loop = asyncio.new_event_loop()
+    monkeypatch.setenv('ANTHROPIC_BASE_URL', server_loop.run_until_complete(server.start()))
+    thread = threading.Thread(target=server_loop.run_forever, daemon=True)
+    thread.start()
+
+    # Built once, without a running event loop, as agents usually are
+    agent = AnthropicAgent(AnthropicAgentOptions(name="Agent", description="A test agent", api_key='test-key'))
+
+    async def invocation():
+        # Without retries, a connection left from a closed loop would fail the request
+        response = await send_message(agent.client.with_options(max_retries=0), "Hello")
+        http_client = get_shared_http_client('anthropic', DefaultAsyncHttpxClient)
+        return http_client, response.content[0].text
+
+    try:
+        first_client, first_text = asyncio.run(invocation())
+        second_client, second_text = asyncio.run(invocation())
+    finally:
+        async def shutdown():
+            await server.stop()
+            # Close the kept-alive connections left by the clients of the closed loops
+            handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for handler in handlers:
+                handler.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+        asyncio.run_coroutine_threadsafe(shutdown(), server_loop).result()
+        server_loop.call_soon_threadsafe(server_loop.stop)
+        thread.join()
+        server_loop.close()
+
+    assert first_text == second_text == 'Hello from the fake server'
+    assert second_client is not first_client
+    assert server.requests == 2
+    # Each loop sent its request on a connection of its own shared client
+    assert server.connections == 2